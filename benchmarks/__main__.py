@@ -0,0 +1,74 @@
+"""Offline micro-benchmarks: no Discord connection, no files outside a scratch directory.
+
+    python -m benchmarks                         # run everything, print a table
+    python -m benchmarks -o results.json         # also write machine-readable results
+    python -m benchmarks -k reminders --sizes 1000,10000
+    python -m benchmarks compare base.json new.json [--threshold 0.1]
+
+`compare` exits with status 1 if any case lost more than `threshold` of its ops/s or grew its
+peak memory by more than `threshold`.
+"""
+import argparse
+import asyncio
+import json
+import logging
+import os
+import sys
+import tempfile
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from benchmarks.cases import SIZES, all_cases
+from benchmarks.runner import run_cases, compare
+
+def run(args):
+    sizes = tuple(int(size) for size in args.sizes.split(',')) if args.sizes else SIZES
+    cases = [case for case in all_cases(sizes) if not args.filter or args.filter in case.name]
+    if not cases:
+        print(f"No benchmark matches '{args.filter}'")
+        return 1
+
+    output = os.path.abspath(args.output) if args.output else None
+    # The bot writes relative to the working directory (data/...); keep that out of the repo
+    os.chdir(tempfile.mkdtemp(prefix='bench-'))
+    results = asyncio.run(run_cases(cases, args.min_time, args.repeats))
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(results, f, indent=2)
+        print(f"Results written to {output}")
+    return 0
+
+def run_compare(args):
+    with open(args.baseline, encoding='utf-8') as f:
+        baseline = json.load(f)
+    with open(args.current, encoding='utf-8') as f:
+        current = json.load(f)
+    rows, regressed = compare(baseline, current, args.threshold)
+    for name, metric, before, after, change, flagged in rows:
+        print(f"{'REGRESSION ' if flagged else '           '}{name:<45} {metric:<12} {before:>14,.1f} -> {after:>14,.1f} ({change:+.1%})")
+    return 1 if regressed else 0
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m benchmarks', description="Offline micro-benchmarks for the bot's hot paths")
+    subcommands = parser.add_subparsers(dest='command')
+
+    compare_parser = subcommands.add_parser('compare', help="Compare two result files")
+    compare_parser.add_argument('baseline')
+    compare_parser.add_argument('current')
+    compare_parser.add_argument('--threshold', type=float, default=0.10, help="Allowed relative slowdown/growth (default 0.10)")
+
+    parser.add_argument('-o', '--output', help="Write results as JSON to this file")
+    parser.add_argument('-k', '--filter', help="Only run cases whose name contains this text")
+    parser.add_argument('--sizes', help=f"Stored match counts for the reminder cases (default {','.join(map(str, SIZES))})")
+    parser.add_argument('--min-time', type=float, default=0.2, help="Minimum seconds per timed repeat")
+    parser.add_argument('--repeats', type=int, default=5, help="Timed repeats per case; the best is kept")
+    args = parser.parse_args(argv)
+
+    # Per-reminder INFO logs would dominate the timings
+    logging.basicConfig(level=logging.WARNING)
+    logging.disable(logging.INFO)
+    return run_compare(args) if args.command == 'compare' else run(args)
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,174 @@
+"""Benchmark cases for the match management and message rendering hot paths"""
+import itertools
+import os
+import tempfile
+from datetime import datetime, timedelta
+from bot.match_manager import MatchManager
+from bot.outbox import DMOutbox
+from bot.recipients import parse_mentions
+from bot.translations import get_translation, detect_language
+from .fakes import FakeBot, FakeGuild, MemoryStorage
+
+SIZES = (1000, 10000, 100000)
+
+# Due reminders fired per check_match_reminders tick in the "due" cases
+DUE_PER_TICK = 100
+
+LANGUAGES = ('en', 'pt', 'es', 'ar')
+
+TRANSLATION_TEXTS = [
+    "New Match! Teams: Alpha vs Beta. Match Reminder: the match will start in 10 minutes",
+    "Match Notification: a new match has been created and you were mentioned",
+    "Match Reminder! Get ready now, the match starts soon",
+    "Translate to English",
+]
+
+DETECT_TEXTS = [
+    "Team Alpha vs Team Beta",
+    "Equipo Rojo contra Equipo Azul, partido amistoso",
+    "Equipe Verde contra Equipe Amarela - partida final",
+    "الفريق الأول ضد الفريق الثاني",
+    "Scrim tonight, be there",
+]
+
+
+class Case:
+    """A named benchmark.
+
+    `setup` is a coroutine function returning the callable to time (sync or async); each call
+    performs `ops` operations. Cases with `fresh=True` consume their state, so they are set up
+    again before every timed call.
+    """
+
+    def __init__(self, name, setup, ops=1, fresh=False):
+        self.name = name
+        self.setup = setup
+        self.ops = ops
+        self.fresh = fresh
+
+
+def make_matches(count, guild, start, spacing=60, offset=0):
+    """`count` stored matches of `guild`, one every `spacing` seconds from `start`"""
+    team1 = guild.mentions(users=2, roles=1)
+    team2 = guild.mentions(users=3)
+    user_ids, role_ids = parse_mentions(team1, team2)
+    matches = []
+    for i in range(count):
+        match_id = offset + i + 1
+        matches.append({
+            'id': match_id,
+            'team1': team1,
+            'team2': team2,
+            'time': (start + timedelta(seconds=i * spacing)).isoformat(),
+            'language': LANGUAGES[i % len(LANGUAGES)],
+            'creator': 42,
+            'guild_id': guild.id,
+            'channel_id': None,
+            'user_ids': list(user_ids),
+            'role_ids': list(role_ids),
+            'reminders_sent': {'created': True, '10min': False, '3min': False}
+        })
+    return matches
+
+
+def make_manager(matches, guild):
+    # MatchManager parses mentions and schedules every stored match on construction, as at startup
+    manager = MatchManager(FakeBot([guild], MemoryStorage(matches)))
+    # A fresh outbox journal per manager, so earlier runs' entries are never replayed as pending
+    manager.outbox = DMOutbox(os.path.join(tempfile.mkdtemp(prefix='bench-outbox-'), 'dm_outbox.jsonl'))
+    return manager
+
+
+def create_match_case(size):
+    async def setup():
+        guild = FakeGuild()
+        manager = make_manager(make_matches(size, guild, datetime.now() + timedelta(days=1)), guild)
+        team1 = guild.mentions(users=3, roles=2)
+        team2 = guild.mentions(users=3)
+        match_time = datetime.now() + timedelta(days=2)
+
+        async def create():
+            await manager.create_match(team1, team2, match_time, 'en', 42, guild.id, notify=False)
+        return create
+    return Case(f"create_match[{size}]", setup)
+
+
+def reminders_idle_case(size):
+    """A scheduler tick with nothing due: the cost every tick pays regardless of store size"""
+    async def setup():
+        guild = FakeGuild()
+        manager = make_manager(make_matches(size, guild, datetime.now() + timedelta(days=1)), guild)
+
+        async def tick():
+            await manager.check_match_reminders()
+        return tick
+    return Case(f"check_match_reminders[idle,{size}]", setup)
+
+
+def reminders_due_case(size):
+    """A tick firing DUE_PER_TICK reminders among `size` stored matches, journaling their DMs"""
+    async def setup():
+        guild = FakeGuild()
+        now = datetime.now()
+        # Starting 9.9 minutes out: the 10 minute reminder is due and still within its grace period
+        due = make_matches(DUE_PER_TICK, guild, now + timedelta(minutes=9.9), spacing=0)
+        later = make_matches(size - DUE_PER_TICK, guild, now + timedelta(days=1), offset=DUE_PER_TICK)
+        manager = make_manager(due + later, guild)
+
+        async def tick():
+            await manager.check_match_reminders()
+        return tick
+    return Case(f"check_match_reminders[due,{size}]", setup, ops=DUE_PER_TICK, fresh=True)
+
+
+def convert_mentions_case(users, roles):
+    async def setup():
+        guild = FakeGuild(member_count=max(1000, users))
+        manager = make_manager([], guild)
+        # Mix resolvable mentions with unknown ids, which fall back to @User/@Role placeholders
+        text = guild.mentions(users=users, roles=roles) + " <@1> <@&2> vs <@!3>"
+
+        def convert():
+            manager.convert_mentions_to_text(text, guild)
+        return convert
+    return Case(f"convert_mentions_to_text[{users}u,{roles}r]", setup)
+
+
+def translation_case(cached):
+    async def setup():
+        if cached:
+            pairs = itertools.cycle([(t, l) for t in TRANSLATION_TEXTS for l in LANGUAGES[1:]])
+        else:
+            # A unique text every call, so each one misses the LRU cache
+            pairs = ((f"{TRANSLATION_TEXTS[i % len(TRANSLATION_TEXTS)]} #{i}", LANGUAGES[1 + i % 3])
+                     for i in itertools.count())
+
+        def translate():
+            get_translation(*next(pairs))
+        return translate
+    return Case(f"get_translation[{'hit' if cached else 'miss'}]", setup)
+
+
+def detect_language_case():
+    async def setup():
+        texts = itertools.cycle(DETECT_TEXTS)
+
+        def detect():
+            detect_language(next(texts))
+        return detect
+    return Case("detect_language", setup)
+
+
+def all_cases(sizes=SIZES):
+    cases = [create_match_case(sizes[0])]
+    for size in sizes:
+        cases.append(reminders_idle_case(size))
+        cases.append(reminders_due_case(size))
+    cases += [
+        convert_mentions_case(5, 2),
+        convert_mentions_case(50, 10),
+        translation_case(cached=True),
+        translation_case(cached=False),
+        detect_language_case(),
+    ]
+    return cases
@@ -0,0 +1,105 @@
+"""Lightweight stand-ins for the discord.py objects and storage the bot's hot paths touch"""
+from bot.storage import StorageBackend, DEFAULT_SETTINGS
+
+class FakeRole:
+    def __init__(self, role_id, name, guild):
+        self.id = role_id
+        self.name = name
+        self.guild = guild
+        self.members = []
+        self.mention = f"<@&{role_id}>"
+
+
+class FakeMember:
+    def __init__(self, user_id, guild, roles=(), bot=False):
+        self.id = user_id
+        self.guild = guild
+        self.roles = list(roles)
+        self.bot = bot
+        self.display_name = f"player{user_id}"
+        self.mention = f"<@{user_id}>"
+
+    def get_role(self, role_id):
+        return next((role for role in self.roles if role.id == role_id), None)
+
+    async def send(self, **kwargs):
+        return None
+
+
+class FakeGuild:
+    """A chunked guild with `member_count` members spread across `role_count` roles"""
+
+    def __init__(self, guild_id=1, member_count=1000, role_count=20):
+        self.id = guild_id
+        self.name = f"Guild {guild_id}"
+        self.chunked = True
+        self.shard_id = 0
+        self.roles = {}
+        self.members = {}
+        for i in range(role_count):
+            role = FakeRole(guild_id * 1000 + i, f"team-{i}", self)
+            self.roles[role.id] = role
+        roles = list(self.roles.values())
+        for i in range(member_count):
+            role = roles[i % role_count]
+            member = FakeMember(10**6 + i, self, [role], bot=(i % 97 == 0))
+            self.members[member.id] = member
+            role.members.append(member)
+        self.member_count = member_count
+
+    def get_member(self, user_id):
+        return self.members.get(user_id)
+
+    def get_role(self, role_id):
+        return self.roles.get(role_id)
+
+    def mentions(self, users=0, roles=0):
+        """A team string mentioning the first `users` members and `roles` roles"""
+        parts = [m.mention for m in list(self.members.values())[:users]]
+        parts += [r.mention for r in list(self.roles.values())[:roles]]
+        return "Team " + " ".join(parts)
+
+
+class FakeBot:
+    """Just enough of DiscordBot for MatchManager: storage, settings and guild lookup"""
+
+    def __init__(self, guilds=(), storage=None):
+        self.storage = storage or MemoryStorage()
+        self.settings = self.storage.load_settings()
+        self.guilds = list(guilds)
+        self._guilds = {guild.id: guild for guild in self.guilds}
+
+    def get_guild(self, guild_id):
+        return self._guilds.get(guild_id)
+
+
+class MemoryStorage(StorageBackend):
+    """Storage backend that keeps everything in memory, so benchmarks time CPU work and not disk"""
+
+    name = 'memory'
+
+    def __init__(self, matches=()):
+        self.matches = list(matches)
+        self.settings = dict(DEFAULT_SETTINGS)
+        self.meta = {}
+
+    def load_matches(self):
+        return list(self.matches)
+
+    def write_matches(self, matches, changed=None, deleted_ids=None):
+        pass
+
+    def load_settings(self, default=None):
+        return dict(default if default is not None else self.settings)
+
+    def save_settings(self, settings):
+        self.settings = dict(settings)
+
+    def get_meta(self, key, default=None):
+        return self.meta.get(key, default)
+
+    def set_meta(self, key, value):
+        self.meta[key] = value
+
+    def close(self):
+        pass
@@ -0,0 +1,122 @@
+"""Times benchmark cases and compares result files"""
+import asyncio
+import gc
+import inspect
+import platform
+import subprocess
+import sys
+import time
+import tracemalloc
+from datetime import datetime, timezone
+
+async def _call(fn):
+    result = fn()
+    if inspect.isawaitable(result):
+        await result
+
+async def _settle():
+    """Cancel background tasks (debounced flushes, outbox commits) a case left behind"""
+    current = asyncio.current_task()
+    tasks = [task for task in asyncio.all_tasks() if task is not current]
+    for task in tasks:
+        task.cancel()
+    await asyncio.gather(*tasks, return_exceptions=True)
+    gc.collect()
+
+async def time_case(case, min_time=0.2, repeats=5):
+    """Best-of-`repeats` ops/s, each repeat looping the call for at least `min_time` seconds"""
+    best = None
+    if case.fresh:
+        for _ in range(repeats):
+            fn = await case.setup()
+            gc.disable()
+            started = time.perf_counter()
+            await _call(fn)
+            elapsed = time.perf_counter() - started
+            gc.enable()
+            await _settle()
+            rate = case.ops / elapsed
+            best = rate if best is None else max(best, rate)
+        return best
+
+    fn = await case.setup()
+    loops = 1
+    for _ in range(repeats):
+        while True:
+            gc.disable()
+            started = time.perf_counter()
+            for _ in range(loops):
+                await _call(fn)
+            elapsed = time.perf_counter() - started
+            gc.enable()
+            if elapsed >= min_time:
+                break
+            # Grow the loop count until one repeat takes at least min_time
+            loops = max(loops * 2, int(loops * min_time / max(elapsed, 1e-9)))
+        rate = loops * case.ops / elapsed
+        best = rate if best is None else max(best, rate)
+    await _settle()
+    return best
+
+async def measure_memory(case):
+    """(setup peak, call peak) in KiB, traced in a separate untimed pass"""
+    tracemalloc.start()
+    try:
+        fn = await case.setup()
+        setup_peak = tracemalloc.get_traced_memory()[1]
+        tracemalloc.reset_peak()
+        baseline = tracemalloc.get_traced_memory()[0]
+        await _call(fn)
+        call_peak = tracemalloc.get_traced_memory()[1] - baseline
+    finally:
+        tracemalloc.stop()
+        await _settle()
+    return setup_peak / 1024, call_peak / 1024
+
+def environment():
+    try:
+        commit = subprocess.run(['git', 'rev-parse', '--short', 'HEAD'], capture_output=True,
+                                text=True, timeout=5).stdout.strip() or None
+    except (OSError, subprocess.SubprocessError):
+        commit = None
+    return {
+        'python': sys.version.split()[0],
+        'platform': platform.platform(),
+        'commit': commit,
+        'timestamp': datetime.now(timezone.utc).isoformat()
+    }
+
+async def run_cases(cases, min_time=0.2, repeats=5, log=print):
+    results = {}
+    for case in cases:
+        ops_per_sec = await time_case(case, min_time, repeats)
+        setup_kib, call_kib = await measure_memory(case)
+        results[case.name] = {
+            'ops_per_sec': round(ops_per_sec, 1),
+            'peak_kib': round(call_kib, 1),
+            'setup_peak_kib': round(setup_kib, 1)
+        }
+        log(f"{case.name:<45} {ops_per_sec:>14,.1f} ops/s {call_kib:>12,.1f} KiB peak")
+    return {'environment': environment(), 'results': results}
+
+def compare(baseline, current, threshold=0.10):
+    """Rows of (name, metric, old, new, change) plus whether any got worse than `threshold`"""
+    rows = []
+    regressed = False
+    for name, new in current['results'].items():
+        old = baseline['results'].get(name)
+        if old is None:
+            continue
+        for metric, higher_is_better in (('ops_per_sec', True), ('peak_kib', False)):
+            before, after = old.get(metric), new.get(metric)
+            if not before or after is None:
+                continue
+            change = (after - before) / before
+            worse = -change if higher_is_better else change
+            # Tiny allocations are too noisy to flag
+            if metric == 'peak_kib' and max(before, after) < 64:
+                worse = 0
+            flagged = worse > threshold
+            regressed = regressed or flagged
+            rows.append((name, metric, before, after, change, flagged))
+    return rows, regressed
@@ -0,0 +1,47 @@
+import hashlib
+import json
+import logging
+import os
+import discord
+from .utils import FILE_WRITER
+
+logger = logging.getLogger(__name__)
+
+def dev_guild():
+    """Guild set by DEV_GUILD_ID: commands sync there instantly instead of globally"""
+    guild_id = os.getenv('DEV_GUILD_ID', '').strip()
+    return discord.Object(id=int(guild_id)) if guild_id else None
+
+def tree_fingerprint(tree, guild=None):
+    """SHA-256 of the command payload tree.sync(guild=guild) would upload"""
+    payload = sorted(
+        (command.to_dict(tree) for command in tree.get_commands(guild=guild)),
+        key=lambda command: (command.get('type', 1), command['name'])
+    )
+    return hashlib.sha256(json.dumps(payload, sort_keys=True).encode('utf-8')).hexdigest()
+
+async def sync_commands(bot, force=None):
+    """Upload the command tree only if it changed since the last sync; returns True if it synced.
+
+    The fingerprint is kept in storage metadata per application and target, so restarts,
+    reconnects and replicas sharing storage skip the rate-limited bulk-overwrite call.
+    Set BOT_FORCE_SYNC=1 to upload regardless.
+    """
+    if force is None:
+        force = os.getenv('BOT_FORCE_SYNC', '').lower() in ('1', 'true', 'yes')
+    guild = dev_guild()
+    if guild is not None:
+        bot.tree.copy_global_to(guild=guild)
+    target = f"guild:{guild.id}" if guild else 'global'
+    key = f"command_tree:{bot.application_id}:{target}"
+
+    fingerprint = tree_fingerprint(bot.tree, guild)
+    stored = await FILE_WRITER.run(bot.storage.get_meta, key)
+    if stored == fingerprint and not force:
+        logger.info(f"⚡ Slash commands unchanged ({target}), skipping sync")
+        return False
+
+    synced = await bot.tree.sync(guild=guild)
+    await bot.storage.set_meta_async(key, fingerprint)
+    logger.info(f"⚡ Synced {len(synced)} slash commands ({target})")
+    return True
@@ -1,14 +1,16 @@
 import discord
 from discord.ext import commands
 from discord import app_commands
-import asyncio
 from datetime import datetime, timedelta
 import pytz
 from .translations import TRANSLATIONS, get_translation, detect_language
-from .utils import load_data, save_data, has_admin_permission, is_channel_allowed
+from .templates import TEMPLATES
+from .dashboard import DashboardPages, MatchDashboardView
+from .utils import has_admin_permission, is_channel_allowed
 from .match_manager import MatchManager
 
 def setup_commands(bot):
+    dashboard = DashboardPages(bot)
     
     @bot.tree.command(name="create_match", description="Create a new match")
     @app_commands.describe(
@@ -47,7 +49,8 @@ def setup_commands(bot):
             
             # Create the match
             match_id = await bot.match_manager.create_match(
-                team1, team2, match_time, language, interaction.user.id
+                team1, team2, match_time, language, interaction.user.id,
+                guild_id=interaction.guild_id, channel_id=interaction.channel_id
             )
             
             # Create Discord timestamps
@@ -86,7 +89,7 @@ def setup_commands(bot):
             await interaction.response.send_message(embed=embed)
             
             # Send private messages to mentioned users/roles
-            await bot.match_manager.send_match_notifications(team1, team2, match_time, language, interaction.guild)
+            await bot.match_manager.send_match_notifications(match_id, interaction.guild)
             
         except ValueError as e:
             await interaction.response.send_message(f"❌ Invalid date/time: {str(e)}", ephemeral=True)
@@ -94,70 +97,38 @@ def setup_commands(bot):
             await interaction.response.send_message(f"❌ Error creating match: {str(e)}", ephemeral=True)
 
     @bot.tree.command(name="view_matches", description="View current matches")
-    async def view_matches(interaction: discord.Interaction):
+    @app_commands.describe(
+        creator="Only show matches created by this member",
+        page="Page to open (default: 1)"
+    )
+    async def view_matches(interaction: discord.Interaction, creator: discord.Member = None, page: int = 1):
         
         if not await has_admin_permission(interaction.user, bot.settings):
             await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
             return
         
-        matches = load_data('data/matches.json', [])
-        
-        if not matches:
-            embed = discord.Embed(
-                title="📅 Current Matches",
-                description="No matches scheduled.",
-                color=0xff9900
-            )
-            await interaction.response.send_message(embed=embed)
-            return
-        
-        embed = discord.Embed(
-            title="🏆 📅 CURRENT MATCHES 📅 🏆",
-            description="**Live Match Dashboard**",
-            color=0x00d4ff,
-            timestamp=datetime.utcnow()
-        )
-        
-        for i, match in enumerate(matches, 1):
-            match_time = datetime.fromisoformat(match['time'])
-            timestamp = int(match_time.timestamp())
-            
-            embed.add_field(
-                name=f"🏅 Match #{i:03d}",
-                value=f"""
-**⚔️ {match['team1']} vs {match['team2']}**
-⏰ **Time:** <t:{timestamp}:F>
-📅 **Date:** <t:{timestamp}:D>
-🕐 **Relative:** <t:{timestamp}:R>
-👑 **Organizer:** <@{match['creator']}>
-🌍 **Language:** {match.get('language', 'en').upper()}
-                """,
-                inline=False
-            )
-        
-        embed.set_footer(text=f"Total Active Matches: {len(matches)} | Auto-refresh enabled")
-        embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/trophy.png")
-        
-        await interaction.response.send_message(embed=embed)
+        # Pages come from the time-sorted index and are shared between admins until a match changes
+        view = MatchDashboardView(dashboard, interaction.guild_id, creator.id if creator else None)
+        embed = view.current(page - 1)
+        if view.page_total == 1:
+            view = discord.utils.MISSING
+        await interaction.response.send_message(embed=embed, view=view)
 
-    @bot.tree.command(name="end_match", description="End a match by its number")
-    @app_commands.describe(match_number="The match number from the matches list")
-    async def end_match(interaction: discord.Interaction, match_number: int):
+    @bot.tree.command(name="end_match", description="End a match by its ID")
+    @app_commands.describe(match_id="The match ID shown in /view_matches")
+    async def end_match(interaction: discord.Interaction, match_id: int):
         
         if not await has_admin_permission(interaction.user, bot.settings):
             await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
             return
         
-        matches = load_data('data/matches.json', [])
+        # Remove the match
+        ended_match = bot.match_manager.end_match(match_id, interaction.guild_id)
         
-        if match_number < 1 or match_number > len(matches):
-            await interaction.response.send_message("❌ Invalid match number.", ephemeral=True)
+        if ended_match is None:
+            await interaction.response.send_message("❌ No match with that ID.", ephemeral=True)
             return
         
-        # Remove the match
-        ended_match = matches.pop(match_number - 1)
-        save_data('data/matches.json', matches)
-        
         embed = discord.Embed(
             title="✅ Match Ended",
             description=f"Match **{ended_match['team1']} vs {ended_match['team2']}** has been ended.",
@@ -202,18 +173,28 @@ def setup_commands(bot):
         except discord.Forbidden:
             await interaction.response.send_message(f"❌ Cannot send DM to {user.mention} (DMs disabled)", ephemeral=True)
 
-    @bot.tree.command(name="send_role_dm", description="Send a private message to all users with a specific role")
+    @bot.tree.command(name="send_role_dm", description="Send a private message to all users with one or more roles")
     @app_commands.describe(
-        role="Role to send message to",
+        roles="Roles to send message to (mention them)",
         message="Message content"
     )
-    async def send_role_dm(interaction: discord.Interaction, role: discord.Role, message: str):
+    async def send_role_dm(interaction: discord.Interaction, roles: str, message: str):
         
         if not await has_admin_permission(interaction.user, bot.settings):
             await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
             return
         
-        await interaction.response.defer()
+        if not interaction.guild:
+            await interaction.response.send_message("❌ This command can only be used in a server.", ephemeral=True)
+            return
+        
+        # Extract role IDs from mentions; members holding several of them get one DM
+        import re
+        role_ids = dict.fromkeys(int(match) for match in re.findall(r'<@&(\d+)>', roles))
+        target_roles = [role for role in map(interaction.guild.get_role, role_ids) if role is not None]
+        if not target_roles:
+            await interaction.response.send_message("❌ Please mention at least one role.", ephemeral=True)
+            return
         
         # Detect language
         language = detect_language(message)
@@ -225,31 +206,60 @@ def setup_commands(bot):
             color=0x9932cc,
             timestamp=datetime.utcnow()
         )
-        if interaction.guild:
-            embed.set_footer(text=f"From: {interaction.guild.name}")
-        else:
-            embed.set_footer(text="From: Unknown Server")
+        embed.set_footer(text=f"From: {interaction.guild.name}")
+        
+        # One shared, stateless view for every recipient
+        view = TranslationView(embed, message, language)
+        job = bot.dm_jobs.start(
+            interaction.guild,
+            target_roles,
+            lambda member: {'embed': embed, 'view': view},
+            interaction.user.id,
+            channel=interaction.channel
+        )
         
-        sent_count = 0
-        failed_count = 0
-        
-        for member in role.members:
-            try:
-                view = TranslationView(embed, message, language)
-                await member.send(embed=embed, view=view)
-                sent_count += 1
-                await asyncio.sleep(1)  # Rate limiting
-            except:
-                failed_count += 1
-        
-        result_embed = discord.Embed(
-            title="📊 Bulk DM Results",
-            color=0x00ff00 if failed_count == 0 else 0xff9900
+        await interaction.response.send_message(
+            f"📨 Started DM job #{job.id}. Progress is posted below; use `/dm_job status` or `/dm_job cancel {job.id}`.",
+            ephemeral=True
         )
-        result_embed.add_field(name="✅ Sent", value=str(sent_count), inline=True)
-        result_embed.add_field(name="❌ Failed", value=str(failed_count), inline=True)
+
+    dm_job = app_commands.Group(name="dm_job", description="Inspect or cancel background bulk DM jobs")
+
+    @dm_job.command(name="status", description="Show the progress of a bulk DM job")
+    @app_commands.describe(job_id="Job number (defaults to the latest job in this server)")
+    async def dm_job_status(interaction: discord.Interaction, job_id: int = None):
+        
+        if not await has_admin_permission(interaction.user, bot.settings):
+            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+            return
         
-        await interaction.followup.send(embed=result_embed)
+        job = bot.dm_jobs.get(interaction.guild_id, job_id)
+        if job is None:
+            await interaction.response.send_message("❌ No DM job found.", ephemeral=True)
+            return
+        
+        await interaction.response.send_message(embed=job.embed(), ephemeral=True)
+
+    @dm_job.command(name="cancel", description="Cancel a running bulk DM job")
+    @app_commands.describe(job_id="Job number (defaults to the latest job in this server)")
+    async def dm_job_cancel(interaction: discord.Interaction, job_id: int = None):
+        
+        if not await has_admin_permission(interaction.user, bot.settings):
+            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        job = bot.dm_jobs.get(interaction.guild_id, job_id)
+        if job is None:
+            await interaction.response.send_message("❌ No DM job found.", ephemeral=True)
+            return
+        
+        if not bot.dm_jobs.cancel(job):
+            await interaction.response.send_message(f"ℹ️ DM job #{job.id} is already {job.status}.", ephemeral=True)
+            return
+        
+        await interaction.response.send_message(f"🛑 Cancelling DM job #{job.id} after {job.sent} DMs sent.", ephemeral=True)
+
+    bot.tree.add_command(dm_job)
 
     @bot.tree.command(name="set_allowed_channels", description="Set channels where bot commands can be used")
     @app_commands.describe(channels="Channels to allow bot usage (mention them)")
@@ -264,7 +274,7 @@ def setup_commands(bot):
         channel_ids = [int(match) for match in re.findall(r'<#(\d+)>', channels)]
         
         bot.settings['allowed_channels'] = channel_ids
-        save_data('data/settings.json', bot.settings)
+        await bot.storage.save_settings_async(bot.settings)
         
         channel_mentions = [f"<#{cid}>" for cid in channel_ids]
         
@@ -285,7 +295,7 @@ def setup_commands(bot):
             return
         
         bot.settings['log_channel'] = channel.id
-        save_data('data/settings.json', bot.settings)
+        await bot.storage.save_settings_async(bot.settings)
         
         embed = discord.Embed(
             title="✅ Log Channel Set",
@@ -376,7 +386,7 @@ def setup_commands(bot):
             value="""
 `/create_match` - Create a new match
 `/view_matches` - View all current matches
-`/end_match` - End a match by number
+`/end_match` - End a match by ID
 `/match_stats` - View match statistics
             """,
             inline=False
@@ -387,6 +397,7 @@ def setup_commands(bot):
             value="""
 `/send_dm` - Send private message to user
 `/send_role_dm` - Send message to role members
+`/dm_job` - Bulk DM job status / cancel
 `/announce` - Make server announcement
 `/poll` - Create interactive poll
             """,
@@ -410,6 +421,7 @@ def setup_commands(bot):
 `/send_embed` - Send custom embed
 `/avatar` - Show user avatar
 `/ping` - Check bot latency
+`/loop_stats` - Event-loop lag and slow callbacks
 `/help` - Show this help menu
             """,
             inline=False
@@ -606,7 +618,7 @@ def setup_commands(bot):
             await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
             return
         
-        matches = load_data('data/matches.json', [])
+        stats = bot.match_manager.match_stats(interaction.guild_id)
         
         embed = discord.Embed(
             title="📈 Match Statistics",
@@ -615,22 +627,69 @@ def setup_commands(bot):
             timestamp=datetime.utcnow()
         )
         
-        embed.add_field(name="📊 Total Matches", value=f"**{len(matches)}** active", inline=True)
-        embed.add_field(name="⏰ Next Match", value="<t:1234567890:R>" if matches else "None", inline=True)
+        embed.add_field(name="📊 Total Matches", value=f"**{stats['total']}** active", inline=True)
+        next_match = stats['next_match']
+        if next_match:
+            next_ts = int(datetime.fromisoformat(next_match['time']).timestamp())
+            next_display = f"<t:{next_ts}:R>\n{next_match['team1']} vs {next_match['team2']}"
+        else:
+            next_display = "None"
+        embed.add_field(name="⏰ Next Match", value=next_display, inline=True)
         embed.add_field(name="🔔 Reminders", value="Auto-enabled", inline=True)
+        embed.add_field(name="📅 Upcoming", value=f"**{stats['upcoming']}** not started", inline=True)
+        embed.add_field(name="👑 Organizers", value=f"**{len(stats['creators'])}**", inline=True)
+        if interaction.guild_id is None:
+            embed.add_field(name="🏰 Servers", value=f"**{stats['guilds']}**", inline=True)
         
-        languages = {}
-        for match in matches:
-            lang = match.get('language', 'en')
-            languages[lang] = languages.get(lang, 0) + 1
-        
-        lang_display = "\n".join([f"{lang}: {count}" for lang, count in languages.items()]) if languages else "No data"
+        languages = stats['languages']
+        lang_display = "\n".join([f"{lang}: {count}" for lang, count in sorted(languages.items(), key=lambda item: -item[1])]) if languages else "No data"
         embed.add_field(name="🌍 Languages Used", value=lang_display, inline=False)
         
+        top_creators = sorted(stats['creators'].items(), key=lambda item: -item[1])[:3]
+        if top_creators:
+            embed.add_field(
+                name="🏅 Top Organizers",
+                value="\n".join(f"<@{creator}>: {count}" for creator, count in top_creators),
+                inline=False
+            )
+        
         embed.set_footer(text="Live statistics update automatically")
         
         await interaction.response.send_message(embed=embed)
 
+    # Event Loop Stats Command
+    @bot.tree.command(name="loop_stats", description="Show event-loop lag and recent slow callbacks (Admin only)")
+    async def loop_stats(interaction: discord.Interaction):
+        
+        if not await has_admin_permission(interaction.user, bot.settings):
+            await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+            return
+        
+        lag = bot.loop_monitor.percentiles()
+        
+        embed = discord.Embed(
+            title="🐢 Event Loop Health",
+            description=f"Lag over the last **{lag['samples']}** samples",
+            color=0x00ff00 if lag['p99'] < bot.loop_monitor.slow_threshold else 0xff9900,
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="p50", value=f"`{lag['p50'] * 1000:.1f}ms`", inline=True)
+        embed.add_field(name="p90", value=f"`{lag['p90'] * 1000:.1f}ms`", inline=True)
+        embed.add_field(name="p99", value=f"`{lag['p99'] * 1000:.1f}ms`", inline=True)
+        embed.add_field(name="Max", value=f"`{lag['max'] * 1000:.1f}ms`", inline=True)
+        embed.add_field(name="Slow Threshold", value=f"`{bot.loop_monitor.slow_threshold * 1000:.0f}ms`", inline=True)
+        
+        # Most recent slow callbacks, innermost frames of their stacks
+        for event in list(bot.loop_monitor.slow_events)[-3:][::-1]:
+            stack_tail = event['stack'][-900:]
+            embed.add_field(
+                name=f"Blocked {event['duration'] * 1000:.0f}ms <t:{int(event['at'])}:R>",
+                value=f"```{stack_tail}```",
+                inline=False
+            )
+        
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
     # Test Reminder System Command
     @bot.tree.command(name="test_reminder", description="Test the reminder system (Admin only)")
     async def test_reminder(interaction: discord.Interaction):
@@ -645,7 +704,8 @@ def setup_commands(bot):
         
         # Create test match
         match_id = await bot.match_manager.create_match(
-            f"@{interaction.user.display_name}", "Test Team", test_time, 'ar', interaction.user.id
+            f"@{interaction.user.display_name}", "Test Team", test_time, 'ar', interaction.user.id,
+            guild_id=interaction.guild_id, channel_id=interaction.channel_id, notify=False
         )
         
         embed = discord.Embed(
@@ -662,37 +722,49 @@ def setup_commands(bot):
         await interaction.response.send_message(embed=embed, ephemeral=True)
 
 
+# label, style and footer for each translate button; 'orig' restores the original message
+TRANSLATE_BUTTONS = {
+    'pt': ('🇵🇹 Português', discord.ButtonStyle.secondary, "Traduzido para Português"),
+    'es': ('🇪🇸 Español', discord.ButtonStyle.secondary, "Traducido al Español"),
+    'en': ('🇬🇧 English', discord.ButtonStyle.secondary, "Translated to English"),
+    'orig': ('🔄 Original', discord.ButtonStyle.primary, None)
+}
+
+
+class TranslateButton(discord.ui.DynamicItem[discord.ui.Button], template=r'lords:tr:(?P<lang>[a-z]+):(?P<key>[0-9a-f]+)'):
+    """Stateless translate button; the custom_id carries the target language and template key"""
+
+    def __init__(self, lang, key):
+        label, style, _ = TRANSLATE_BUTTONS[lang]
+        super().__init__(discord.ui.Button(label=label, style=style, custom_id=f"lords:tr:{lang}:{key}"))
+        self.lang = lang
+        self.key = key
+
+    @classmethod
+    async def from_custom_id(cls, interaction, item, match):
+        if match['lang'] not in TRANSLATE_BUTTONS:
+            raise ValueError(f"Unknown translation button {match['lang']}")
+        return cls(match['lang'], match['key'])
+
+    async def callback(self, interaction: discord.Interaction):
+        template = TEMPLATES.get(self.key)
+        if template is None:
+            await interaction.response.send_message("❌ This message can no longer be translated.", ephemeral=True)
+            return
+        
+        if self.lang == 'orig':
+            embed = TEMPLATES.render(self.key)
+        else:
+            translated_text = get_translation(template['text'], self.lang)
+            embed = TEMPLATES.render(self.key, description=translated_text, footer=TRANSLATE_BUTTONS[self.lang][2])
+        await interaction.response.edit_message(embed=embed)
+
+
 class TranslationView(discord.ui.View):
+    """Persistent translate buttons for a DM; one instance can be shared by every recipient"""
+
     def __init__(self, original_embed, original_text, original_language):
-        super().__init__(timeout=3600)  # 1 hour timeout
-        self.original_embed = original_embed
-        self.original_text = original_text
-        self.original_language = original_language
-    
-    @discord.ui.button(label='🇵🇹 Português', style=discord.ButtonStyle.secondary)
-    async def translate_portuguese(self, interaction: discord.Interaction, button: discord.ui.Button):
-        translated_text = get_translation(self.original_text, 'pt')
-        embed = self.original_embed.copy()
-        embed.description = translated_text
-        embed.set_footer(text="Traduzido para Português")
-        await interaction.response.edit_message(embed=embed, view=self)
-    
-    @discord.ui.button(label='🇪🇸 Español', style=discord.ButtonStyle.secondary) 
-    async def translate_spanish(self, interaction: discord.Interaction, button: discord.ui.Button):
-        translated_text = get_translation(self.original_text, 'es')
-        embed = self.original_embed.copy()
-        embed.description = translated_text
-        embed.set_footer(text="Traducido al Español")
-        await interaction.response.edit_message(embed=embed, view=self)
-    
-    @discord.ui.button(label='🇬🇧 English', style=discord.ButtonStyle.secondary)
-    async def translate_english(self, interaction: discord.Interaction, button: discord.ui.Button):
-        translated_text = get_translation(self.original_text, 'en')
-        embed = self.original_embed.copy()
-        embed.description = translated_text
-        embed.set_footer(text="Translated to English")
-        await interaction.response.edit_message(embed=embed, view=self)
-    
-    @discord.ui.button(label='🔄 Original', style=discord.ButtonStyle.primary)
-    async def show_original(self, interaction: discord.Interaction, button: discord.ui.Button):
-        await interaction.response.edit_message(embed=self.original_embed, view=self)
+        super().__init__(timeout=None)
+        self.template_key = TEMPLATES.register(original_embed, original_text, original_language)
+        for lang in TRANSLATE_BUTTONS:
+            self.add_item(TranslateButton(lang, self.template_key))
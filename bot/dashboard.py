@@ -0,0 +1,146 @@
+import logging
+from collections import OrderedDict
+from datetime import datetime
+import discord
+from .utils import has_admin_permission
+
+logger = logging.getLogger(__name__)
+
+PAGE_SIZE = 8
+
+class DashboardPages:
+    """Renders /view_matches pages from the match index, caching them per index version"""
+
+    def __init__(self, bot, page_size=PAGE_SIZE, max_cached=256):
+        self.bot = bot
+        self.page_size = page_size
+        self.max_cached = max_cached
+        self._cache = OrderedDict()
+        self._version = None
+
+    def page_count(self, total):
+        return max(1, -(-total // self.page_size))
+
+    def get(self, page, guild_id=None, creator_id=None):
+        """Return (embed, page, page_count) with page clamped to the view's range"""
+        index = self.bot.match_manager.index
+        if index.version != self._version:
+            # Any create/end/expire invalidates every cached page at once
+            self._cache.clear()
+            self._version = index.version
+        pages = self.page_count(index.count(guild_id, creator_id))
+        page = min(max(page, 0), pages - 1)
+        key = (guild_id, creator_id, page)
+        embed = self._cache.get(key)
+        if embed is None:
+            embed = self._cache[key] = self.render(page, guild_id, creator_id)
+            while len(self._cache) > self.max_cached:
+                self._cache.popitem(last=False)
+        else:
+            self._cache.move_to_end(key)
+        return embed, page, pages
+
+    def render(self, page, guild_id=None, creator_id=None):
+        manager = self.bot.match_manager
+        matches, total = manager.get_matches_page(page, self.page_size, guild_id, creator_id)
+        if not matches:
+            return discord.Embed(
+                title="📅 Current Matches",
+                description="No matches scheduled.",
+                color=0xff9900
+            )
+
+        embed = discord.Embed(
+            title="🏆 📅 CURRENT MATCHES 📅 🏆",
+            description="**Live Match Dashboard**" + (f"\n👑 Organizer: <@{creator_id}>" if creator_id else ""),
+            color=0x00d4ff,
+            timestamp=datetime.utcnow()
+        )
+
+        for match in matches:
+            match_time = datetime.fromisoformat(match['time'])
+            timestamp = int(match_time.timestamp())
+
+            # Stable match ID, the same one /end_match takes
+            embed.add_field(
+                name=f"🏅 Match #{match['id']:03d}",
+                value=f"""
+**⚔️ {match['team1']} vs {match['team2']}**
+⏰ **Time:** <t:{timestamp}:F>
+📅 **Date:** <t:{timestamp}:D>
+🕐 **Relative:** <t:{timestamp}:R>
+👑 **Organizer:** <@{match['creator']}>
+🌍 **Language:** {match.get('language', 'en').upper()}
+                """,
+                inline=False
+            )
+
+        embed.set_footer(text=f"Page {page + 1}/{self.page_count(total)} | Total Active Matches: {total}")
+        embed.set_thumbnail(url="https://cdn.discordapp.com/emojis/trophy.png")
+        return embed
+
+
+class JumpToPageModal(discord.ui.Modal, title="Jump to page"):
+    page_number = discord.ui.TextInput(label="Page number", max_length=6)
+
+    def __init__(self, view):
+        super().__init__()
+        self.view = view
+
+    async def on_submit(self, interaction: discord.Interaction):
+        try:
+            page = int(self.page_number.value) - 1
+        except ValueError:
+            await interaction.response.send_message("❌ Please enter a page number.", ephemeral=True)
+            return
+        await self.view.show(interaction, page)
+
+
+class MatchDashboardView(discord.ui.View):
+    """Prev/next/jump navigation over a (guild, creator) filtered match list"""
+
+    def __init__(self, pages, guild_id=None, creator_id=None, timeout=600):
+        super().__init__(timeout=timeout)
+        self.pages = pages
+        self.guild_id = guild_id
+        self.creator_id = creator_id
+        self.page = 0
+        self.page_total = 1
+
+    def current(self, page=None):
+        """Fetch a page and update the buttons to match it"""
+        embed, self.page, self.page_total = self.pages.get(self.page if page is None else page,
+                                                           self.guild_id, self.creator_id)
+        self.first.disabled = self.previous.disabled = self.page == 0
+        self.next.disabled = self.last.disabled = self.page >= self.page_total - 1
+        self.jump.disabled = self.page_total == 1
+        return embed
+
+    async def show(self, interaction, page):
+        await interaction.response.edit_message(embed=self.current(page), view=self)
+
+    async def interaction_check(self, interaction: discord.Interaction):
+        if await has_admin_permission(interaction.user, interaction.client.settings):
+            return True
+        await interaction.response.send_message("❌ You don't have permission to use this command.", ephemeral=True)
+        return False
+
+    @discord.ui.button(label="⏮", style=discord.ButtonStyle.secondary)
+    async def first(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, 0)
+
+    @discord.ui.button(label="◀ Prev", style=discord.ButtonStyle.primary)
+    async def previous(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page - 1)
+
+    @discord.ui.button(label="🔢 Jump", style=discord.ButtonStyle.secondary)
+    async def jump(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await interaction.response.send_modal(JumpToPageModal(self))
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.primary)
+    async def next(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page + 1)
+
+    @discord.ui.button(label="⏭", style=discord.ButtonStyle.secondary)
+    async def last(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self.show(interaction, self.page_total - 1)
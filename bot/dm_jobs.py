@@ -0,0 +1,172 @@
+import asyncio
+import itertools
+import logging
+import time
+from collections import OrderedDict
+from datetime import datetime
+import discord
+
+logger = logging.getLogger(__name__)
+
+PROGRESS_INTERVAL = 5.0
+
+def format_duration(seconds):
+    seconds = int(seconds)
+    hours, rest = divmod(seconds, 3600)
+    minutes, seconds = divmod(rest, 60)
+    if hours:
+        return f"{hours}h {minutes:02d}m"
+    if minutes:
+        return f"{minutes}m {seconds:02d}s"
+    return f"{seconds}s"
+
+
+class DMJob:
+    """One background bulk DM to the deduplicated members of one or more roles"""
+
+    def __init__(self, job_id, guild, roles, make_message, author_id):
+        self.id = job_id
+        self.guild = guild
+        self.roles = roles
+        self.make_message = make_message
+        self.author_id = author_id
+        self.status = 'running'
+        self.sent = 0
+        self.failed = 0
+        self.discovered = 0
+        # Without a chunked member cache the total is only known once the member scan ends
+        self.scanning = True
+        self.started = time.monotonic()
+        self.finished = None
+        self.task = None
+        self.message = None
+
+    @property
+    def done(self):
+        return self.sent + self.failed
+
+    @property
+    def remaining(self):
+        return self.discovered - self.done
+
+    @property
+    def running(self):
+        return self.status == 'running'
+
+    def eta(self):
+        """Seconds left at the rate achieved so far, or None before the first DM"""
+        elapsed = time.monotonic() - self.started
+        if not self.done or elapsed <= 0:
+            return None
+        return self.remaining / (self.done / elapsed)
+
+    def on_result(self, recipient, error):
+        if error is None:
+            self.sent += 1
+        else:
+            self.failed += 1
+
+    def embed(self):
+        colors = {'running': 0x00d4ff, 'completed': 0x00ff00, 'cancelled': 0xff9900, 'failed': 0xff0000}
+        titles = {'running': "📨 Bulk DM in progress", 'completed': "📊 Bulk DM Results",
+                  'cancelled': "🛑 Bulk DM cancelled", 'failed': "❌ Bulk DM failed"}
+        embed = discord.Embed(
+            title=f"{titles[self.status]} (job #{self.id})",
+            description="Roles: " + ", ".join(role.mention for role in self.roles) + f"\n👑 Started by <@{self.author_id}>",
+            color=colors[self.status],
+            timestamp=datetime.utcnow()
+        )
+        embed.add_field(name="✅ Sent", value=str(self.sent), inline=True)
+        embed.add_field(name="❌ Failed", value=str(self.failed), inline=True)
+        # "≥" while still scanning: more recipients may turn up
+        embed.add_field(name="⏳ Remaining", value=f"{'≥ ' if self.scanning else ''}{self.remaining}", inline=True)
+        if self.running:
+            eta = self.eta()
+            eta_text = "estimating..." if eta is None else f"{'≥ ' if self.scanning else '~'}{format_duration(eta)}"
+            embed.add_field(name="🕐 ETA", value=eta_text, inline=True)
+        else:
+            embed.add_field(name="🕐 Took", value=format_duration((self.finished or time.monotonic()) - self.started), inline=True)
+        if self.running:
+            embed.set_footer(text=f"Use /dm_job cancel {self.id} to stop")
+        return embed
+
+
+class DMJobManager:
+    """Runs bulk DM jobs in the background and keeps a short history for /dm_job"""
+
+    def __init__(self, bot, history=20, progress_interval=PROGRESS_INTERVAL):
+        self.bot = bot
+        self.history = history
+        self.progress_interval = progress_interval
+        self.jobs = OrderedDict()
+        self._ids = itertools.count(1)
+
+    def start(self, guild, roles, make_message, author_id, channel=None):
+        job = DMJob(next(self._ids), guild, roles, make_message, author_id)
+        self.jobs[job.id] = job
+        while len(self.jobs) > self.history:
+            oldest = next(iter(self.jobs.values()))
+            if oldest.running:
+                break
+            self.jobs.popitem(last=False)
+        job.task = asyncio.create_task(self._run(job, channel))
+        return job
+
+    def get(self, guild_id, job_id=None):
+        """A job of this guild by id, or its most recent job"""
+        if job_id is not None:
+            job = self.jobs.get(job_id)
+            return job if job and job.guild.id == guild_id else None
+        return next((job for job in reversed(self.jobs.values()) if job.guild.id == guild_id), None)
+
+    def cancel(self, job):
+        if not job.running:
+            return False
+        job.status = 'cancelled'
+        job.task.cancel()
+        return True
+
+    async def _run(self, job, channel):
+        if channel is not None:
+            try:
+                job.message = await channel.send(embed=job.embed())
+            except discord.HTTPException as e:
+                logger.warning(f"Could not post progress for DM job #{job.id}: {e}")
+        progress = asyncio.create_task(self._report_progress(job))
+        fanout = self.bot.dm_sender.for_shard(job.guild.shard_id)
+        try:
+            async for chunk in self.bot.member_resolver.iter_members_with_roles(job.guild, job.roles):
+                recipients = [member for member in chunk if not member.bot]
+                job.discovered += len(recipients)
+                await fanout.send(recipients, job.make_message, on_result=job.on_result, source='role_dm')
+            job.status = 'completed'
+        except asyncio.CancelledError:
+            job.status = 'cancelled'
+        except Exception as e:
+            job.status = 'failed'
+            logger.error(f"DM job #{job.id} failed: {e}")
+        finally:
+            job.scanning = False
+            job.finished = time.monotonic()
+            progress.cancel()
+        logger.info(f"📨 DM job #{job.id} {job.status}: {job.sent} sent, {job.failed} failed")
+        await self._update_message(job)
+
+    async def _report_progress(self, job):
+        while True:
+            await asyncio.sleep(self.progress_interval)
+            await self._update_message(job)
+
+    async def _update_message(self, job):
+        if job.message is None:
+            return
+        try:
+            await job.message.edit(embed=job.embed())
+        except discord.HTTPException as e:
+            logger.warning(f"Could not update progress for DM job #{job.id}: {e}")
+
+    async def close(self):
+        running = [job for job in self.jobs.values() if job.running]
+        for job in running:
+            self.cancel(job)
+        await asyncio.gather(*(job.task for job in running), return_exceptions=True)
@@ -0,0 +1,145 @@
+import asyncio
+import logging
+import time
+from collections import Counter
+import discord
+from .metrics import DMS_SENT, DMS_FAILED, dm_failure_reason
+
+logger = logging.getLogger(__name__)
+
+class TokenBucket:
+    """Token-bucket rate limiter: `rate` tokens per second, bursting up to `capacity`"""
+
+    def __init__(self, rate, capacity=None):
+        self.rate = rate
+        self.capacity = capacity or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = asyncio.Lock()
+
+    def _refill(self):
+        now = time.monotonic()
+        self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+        self.updated = now
+
+    async def acquire(self):
+        async with self._lock:
+            self._refill()
+            while self.tokens < 1:
+                await asyncio.sleep((1 - self.tokens) / self.rate)
+                self._refill()
+            self.tokens -= 1
+
+
+class UserDM:
+    """A DM recipient known only by user id; the DM channel is opened on send, no member lookup needed"""
+
+    def __init__(self, client, user_id):
+        self.client = client
+        self.id = user_id
+
+    async def send(self, **kwargs):
+        # create_dm reuses the cached channel once one is open for this user
+        channel = await self.client.create_dm(discord.Object(id=self.id))
+        return await channel.send(**kwargs)
+
+
+class FanoutResult:
+    """Per-recipient outcome of a fan-out send"""
+
+    def __init__(self):
+        self.sent = []
+        self.failed = {}
+        self.started = time.monotonic()
+        self.finished = None
+
+    @property
+    def sent_count(self):
+        return len(self.sent)
+
+    @property
+    def failed_count(self):
+        return len(self.failed)
+
+    @property
+    def duration(self):
+        return (self.finished or time.monotonic()) - self.started
+
+
+class DMFanout:
+    """Send DMs to many recipients with bounded concurrency and a shared rate limit"""
+
+    def __init__(self, concurrency=5, rate=10.0, burst=None, bucket=None):
+        self.concurrency = max(1, int(concurrency))
+        self.bucket = bucket or TokenBucket(rate, burst)
+        self.in_flight = 0
+        self.queued = 0
+        self._shards = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            concurrency=settings.get('dm_concurrency', 5),
+            rate=settings.get('dm_rate_per_second', 10.0),
+            burst=settings.get('dm_burst')
+        )
+
+    def for_shard(self, shard_id):
+        """Fan-out with its own workers for one shard, sharing this sender's (per-account) rate limit"""
+        fanout = self._shards.get(shard_id)
+        if fanout is None:
+            fanout = self._shards[shard_id] = DMFanout(self.concurrency, bucket=self.bucket)
+        return fanout
+
+    def shard_stats(self):
+        return {shard_id: {'queued': f.queued, 'in_flight': f.in_flight} for shard_id, f in self._shards.items()}
+
+    async def send(self, recipients, make_message, on_result=None, source='dm'):
+        """Send make_message(recipient) (a dict of send() kwargs) to every recipient.
+
+        on_result(recipient, error) is called after each attempt, error being None on success.
+        """
+        result = FanoutResult()
+        recipients = list(recipients)
+        pending = iter(recipients)
+        self.queued += len(recipients)
+        reasons = Counter()
+
+        async def worker():
+            for recipient in pending:
+                # Counted off before waiting on the bucket, so a cancelled wait cannot leak it
+                self.queued -= 1
+                await self.bucket.acquire()
+                self.in_flight += 1
+                error = None
+                try:
+                    await recipient.send(**make_message(recipient))
+                    result.sent.append(recipient.id)
+                    DMS_SENT.inc(source=source)
+                except Exception as e:
+                    error = e
+                    result.failed[recipient.id] = e
+                    reason = dm_failure_reason(e)
+                    reasons[reason] += 1
+                    DMS_FAILED.inc(source=source, reason=reason)
+                    # Closed DMs and the like are expected per recipient: summarized once per fan-out below
+                    logger.debug(f"Failed to send DM to {getattr(recipient, 'display_name', recipient.id)}: {e}")
+                finally:
+                    self.in_flight -= 1
+                if on_result:
+                    try:
+                        on_result(recipient, error)
+                    except Exception as e:
+                        logger.error(f"Error in fan-out result callback: {e}")
+
+        # Workers share one iterator, so large recipient lists never spawn one task per user
+        try:
+            await asyncio.gather(*(worker() for _ in range(self.concurrency)))
+        finally:
+            # Recipients never reached (cancelled send) no longer count as queued
+            self.queued -= sum(1 for _ in pending)
+        result.finished = time.monotonic()
+        if result.failed:
+            summary = ', '.join(f"{count} {reason}" for reason, count in reasons.most_common())
+            logger.warning(f"{result.failed_count}/{len(recipients)} {source} DMs failed ({summary})")
+        return result
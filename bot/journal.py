@@ -0,0 +1,69 @@
+import json
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+class AppendLog:
+    """Append-only JSON-lines journal with batched fsync and atomic compaction"""
+
+    def __init__(self, file_path):
+        self.file_path = file_path
+        os.makedirs(os.path.dirname(file_path) or '.', exist_ok=True)
+        self._file = None
+        self.records = 0
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.file_path, 'a', encoding='utf-8')
+        return self._file
+
+    def replay(self):
+        """Yield every intact record; a torn last line from a crash is ignored"""
+        if not os.path.exists(self.file_path):
+            return
+        self.records = 0
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line_number, line in enumerate(f, 1):
+                line = line.strip()
+                if not line:
+                    continue
+                try:
+                    record = json.loads(line)
+                except json.JSONDecodeError:
+                    logger.warning(f"Skipping corrupt journal line {line_number} in {self.file_path}")
+                    continue
+                self.records += 1
+                yield record
+
+    def append(self, records, sync=True):
+        """Append records as one group commit (a single write and fsync)"""
+        if not records:
+            return
+        f = self._open()
+        f.write(''.join(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n' for r in records))
+        f.flush()
+        if sync:
+            os.fsync(f.fileno())
+        self.records += len(records)
+
+    def rewrite(self, records):
+        """Atomically replace the journal with a compacted set of records"""
+        self.close()
+        directory = os.path.dirname(self.file_path) or '.'
+        temp_path = os.path.join(directory, f".tmp-{os.path.basename(self.file_path)}")
+        with open(temp_path, 'w', encoding='utf-8') as f:
+            for r in records:
+                f.write(json.dumps(r, ensure_ascii=False, separators=(',', ':')) + '\n')
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, self.file_path)
+        self.records = len(records)
+
+    def truncate(self):
+        self.rewrite([])
+
+    def close(self):
+        if self._file is not None:
+            self._file.close()
+            self._file = None
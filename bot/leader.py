@@ -0,0 +1,192 @@
+import asyncio
+import logging
+import os
+import socket
+import sqlite3
+import time
+import uuid
+
+try:
+    import fcntl
+except ImportError:  # Windows: only the SQLite lease is available
+    fcntl = None
+
+logger = logging.getLogger(__name__)
+
+def holder_id():
+    return f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+
+class FileLockLease:
+    """Leadership held as an exclusive fcntl lock; the OS releases it the moment the holder dies"""
+
+    kind = 'file'
+
+    def __init__(self, path):
+        if fcntl is None:
+            raise RuntimeError("fcntl lock files are not supported on this platform")
+        self.path = path
+        os.makedirs(os.path.dirname(path) or '.', exist_ok=True)
+        self._fd = None
+
+    def acquire(self):
+        """Take or keep the lock; returns True while this process holds it"""
+        if self._fd is not None:
+            return True
+        fd = os.open(self.path, os.O_RDWR | os.O_CREAT, 0o644)
+        try:
+            fcntl.flock(fd, fcntl.LOCK_EX | fcntl.LOCK_NB)
+        except OSError:
+            os.close(fd)
+            return False
+        os.ftruncate(fd, 0)
+        os.write(fd, holder_id().encode())
+        self._fd = fd
+        return True
+
+    def release(self):
+        if self._fd is not None:
+            fcntl.flock(self._fd, fcntl.LOCK_UN)
+            os.close(self._fd)
+            self._fd = None
+
+
+class SQLiteLease:
+    """Leadership held as a row lease with an expiry, renewed by heartbeat"""
+
+    kind = 'sqlite'
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS leases (
+            name TEXT PRIMARY KEY,
+            holder TEXT NOT NULL,
+            expires_at REAL NOT NULL
+        );
+    """
+
+    def __init__(self, db_path, name='scheduler', ttl=10.0):
+        self.name = name
+        self.ttl = ttl
+        self.holder = holder_id()
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        # Own connection: lease calls run on executor threads, never behind queued storage writes
+        self.conn = sqlite3.connect(db_path, check_same_thread=False, timeout=5.0)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.executescript(self.SCHEMA)
+
+    def acquire(self):
+        """Take the lease if it is free or expired, or renew it if held; returns True while held"""
+        now = time.time()
+        with self.conn:
+            self.conn.execute(
+                'INSERT INTO leases (name, holder, expires_at) VALUES (?, ?, ?) '
+                'ON CONFLICT(name) DO UPDATE SET holder = excluded.holder, expires_at = excluded.expires_at '
+                'WHERE leases.holder = excluded.holder OR leases.expires_at < ?',
+                (self.name, self.holder, now + self.ttl, now)
+            )
+        row = self.conn.execute('SELECT holder FROM leases WHERE name = ?', (self.name,)).fetchone()
+        return row is not None and row[0] == self.holder
+
+    def release(self):
+        with self.conn:
+            self.conn.execute('DELETE FROM leases WHERE name = ? AND holder = ?', (self.name, self.holder))
+        self.conn.close()
+
+
+class LeaderElector:
+    """Heartbeats a lease and calls on_elected/on_demoted as leadership changes hands.
+
+    The heartbeat never waits on the callbacks: they run as tracked transition tasks, so a slow
+    takeover cannot let the lease expire under it. A takeover still in progress when the lease
+    is lost is cancelled before on_demoted runs.
+    """
+
+    def __init__(self, lease, interval=2.0):
+        self.lease = lease
+        self.interval = interval
+        self.is_leader = False
+        self._task = None
+        self._transition = None
+
+    async def _acquire(self):
+        try:
+            return await asyncio.get_running_loop().run_in_executor(None, self.lease.acquire)
+        except Exception as e:
+            logger.error(f"Error renewing the {self.lease.kind} leader lease: {e}")
+            return False
+
+    async def confirm(self):
+        """Renew the lease now and report whether it is still held, e.g. before starting to lead.
+
+        On False the takeover should stop; the next successful heartbeat elects this process anew.
+        """
+        if self.is_leader and await self._acquire():
+            return True
+        self.is_leader = False
+        return False
+
+    async def _elect(self, on_elected, previous):
+        if previous is not None and not previous.done():
+            # Re-elected while still standing down: finish that first
+            await asyncio.wait([previous])
+        logger.info("👑 This process is now the scheduler leader")
+        await on_elected()
+
+    async def _demote(self, on_demoted, takeover):
+        if takeover is not None and not takeover.done():
+            takeover.cancel()
+            try:
+                await takeover
+            except BaseException:
+                pass
+        logger.warning("🪑 Lost the scheduler lease; standing by")
+        await on_demoted()
+
+    def _run_transition(self, coro):
+        self._transition = asyncio.create_task(coro)
+        self._transition.add_done_callback(self._transition_done)
+
+    @staticmethod
+    def _transition_done(task):
+        if not task.cancelled() and task.exception() is not None:
+            logger.error(f"Error changing scheduler leadership: {task.exception()}")
+
+    async def run(self, on_elected, on_demoted):
+        while True:
+            held = await self._acquire()
+            if held and not self.is_leader:
+                self.is_leader = True
+                self._run_transition(self._elect(on_elected, self._transition))
+            elif not held and self.is_leader:
+                self.is_leader = False
+                self._run_transition(self._demote(on_demoted, self._transition))
+            await asyncio.sleep(self.interval)
+
+    def start(self, on_elected, on_demoted):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(on_elected, on_demoted))
+        return self._task
+
+    async def close(self):
+        for task in (self._task, self._transition):
+            if task and not task.done():
+                task.cancel()
+        if self.is_leader:
+            self.is_leader = False
+            await asyncio.get_running_loop().run_in_executor(None, self.lease.release)
+
+
+def open_elector(storage, scope='scheduler'):
+    """Leader elector selected by BOT_LEADER_ELECTION (file or sqlite), or None to always lead"""
+    mode = os.getenv('BOT_LEADER_ELECTION', '').lower()
+    if not mode:
+        return None
+    if not getattr(storage, 'shared', False):
+        logger.warning(f"Leader election with {storage.name} storage: replicas will not see each other's matches, use BOT_STORAGE=sqlite")
+    if mode == 'sqlite':
+        # A database of its own: heartbeats in the bot database would bump its data_version every
+        # interval and wake every replica's match sync
+        return LeaderElector(SQLiteLease(os.getenv('BOT_LEADER_DB', 'data/leader.db'), scope))
+    if mode != 'file':
+        logger.warning(f"Unknown leader election mode '{mode}', falling back to a lock file")
+    return LeaderElector(FileLockLease(os.getenv('BOT_LEADER_LOCK', f'data/{scope}.lock')))
@@ -0,0 +1,128 @@
+import asyncio
+import logging
+from datetime import datetime
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord allows at most 10 embeds per message
+MAX_EMBEDS_PER_MESSAGE = 10
+MAX_PRIORITY_IN_FLIGHT = 5
+# Loggers whose errors reach the log channel: the bot's own code, plus discord.py's reports of
+# exceptions raised inside our event handlers, commands and views
+FORWARDED_LOGGERS = ('bot', 'keep_alive', 'discord.client', 'discord.app_commands.tree',
+                     'discord.ext.commands.bot', 'discord.ui.view')
+
+class LogForwarder:
+    """Buffers bot activity embeds and posts them to the log channel in batched messages"""
+
+    def __init__(self, bot, flush_interval=5.0, max_queue=500):
+        self.bot = bot
+        self.flush_interval = flush_interval
+        self.queue = asyncio.Queue(maxsize=max_queue)
+        self.dropped = 0
+        self.sent_messages = 0
+        self.sent_events = 0
+        self._full = asyncio.Event()
+        self._task = None
+        self._priority_tasks = set()
+
+    def _channel(self):
+        channel_id = self.bot.settings.get('log_channel')
+        channel = self.bot.get_channel(channel_id) if channel_id else None
+        return channel if isinstance(channel, discord.TextChannel) else None
+
+    def submit(self, embed, priority=False):
+        """Queue an activity embed; priority embeds (errors) skip the buffer and are sent at once"""
+        # Bound concurrent bypass sends so an error storm falls back to the buffer
+        if priority and len(self._priority_tasks) < MAX_PRIORITY_IN_FLIGHT:
+            task = asyncio.create_task(self._send([embed]))
+            self._priority_tasks.add(task)
+            task.add_done_callback(self._priority_tasks.discard)
+            return
+        try:
+            self.queue.put_nowait(embed)
+        except asyncio.QueueFull:
+            self.dropped += 1
+            return
+        if self.queue.qsize() >= MAX_EMBEDS_PER_MESSAGE:
+            self._full.set()
+
+    async def _send(self, embeds):
+        channel = self._channel()
+        if channel is None:
+            return
+        try:
+            await channel.send(embeds=embeds)
+            self.sent_messages += 1
+            self.sent_events += len(embeds)
+        except Exception as e:
+            logger.warning(f"Error forwarding {len(embeds)} log events: {e}")
+
+    def _drain_batch(self):
+        embeds = []
+        while len(embeds) < MAX_EMBEDS_PER_MESSAGE and not self.queue.empty():
+            embeds.append(self.queue.get_nowait())
+        return embeds
+
+    async def flush(self):
+        """Send everything buffered as messages of up to 10 embeds"""
+        if self.dropped:
+            # Report how many events overflowed the buffer since the last flush
+            dropped, self.dropped = self.dropped, 0
+            summary = discord.Embed(
+                title="⚠️ Log Events Dropped",
+                description=f"{dropped} activity events were dropped because the log buffer was full.",
+                color=0xff9900,
+                timestamp=datetime.utcnow()
+            )
+            await self._send([summary])
+        while not self.queue.empty():
+            await self._send(self._drain_batch())
+
+    async def run(self):
+        while True:
+            try:
+                await asyncio.wait_for(self._full.wait(), self.flush_interval)
+            except asyncio.TimeoutError:
+                pass
+            self._full.clear()
+            await self.flush()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run())
+        return self._task
+
+    async def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        await self.flush()
+
+
+class LogChannelHandler(logging.Handler):
+    """Logging handler that forwards error records to the log channel as priority events"""
+
+    def __init__(self, forwarder, level=logging.ERROR):
+        super().__init__(level)
+        self.forwarder = forwarder
+
+    def emit(self, record):
+        # Never forward the forwarder's own failures (or anything before the loop runs)
+        if record.name == __name__:
+            return
+        try:
+            asyncio.get_running_loop()
+        except RuntimeError:
+            return
+        try:
+            embed = discord.Embed(
+                title="🚨 Bot Error",
+                description=self.format(record)[:4000],
+                color=0xff0000,
+                timestamp=datetime.utcnow()
+            )
+            embed.set_footer(text=record.name)
+            self.forwarder.submit(embed, priority=True)
+        except Exception:
+            self.handleError(record)
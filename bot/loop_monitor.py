@@ -0,0 +1,107 @@
+import asyncio
+import logging
+import sys
+import threading
+import time
+import traceback
+from collections import deque
+from .metrics import REGISTRY, Counter, Gauge
+
+logger = logging.getLogger(__name__)
+
+LOOP_LAG = REGISTRY.register(Gauge(
+    'bot_event_loop_lag_seconds', 'Event-loop scheduling delay percentiles over the recent window', labels=('quantile',)))
+SLOW_CALLBACKS = REGISTRY.register(Counter(
+    'bot_slow_callbacks_total', 'Times the event loop was blocked longer than the slow-callback threshold'))
+
+def percentile(sorted_values, fraction):
+    if not sorted_values:
+        return 0.0
+    index = min(len(sorted_values) - 1, int(round(fraction * (len(sorted_values) - 1))))
+    return sorted_values[index]
+
+
+class LoopMonitor:
+    """Samples event-loop scheduling delay and captures the stack of callbacks that block it"""
+
+    def __init__(self, interval=0.1, slow_threshold=0.25, window=3000, max_slow_events=20):
+        self.interval = interval
+        self.slow_threshold = slow_threshold
+        self.samples = deque(maxlen=window)
+        self.slow_events = deque(maxlen=max_slow_events)
+        self._heartbeat = time.monotonic()
+        self._loop_thread_id = None
+        self._current_stall = None
+        self._task = None
+        self._watchdog = None
+        self._stopped = threading.Event()
+        LOOP_LAG.callback = self._lag_samples
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(slow_threshold=settings.get('loop_slow_threshold_ms', 250) / 1000)
+
+    def _lag_samples(self):
+        stats = self.percentiles()
+        return [(('0.5',), stats['p50']), (('0.9',), stats['p90']), (('0.99',), stats['p99']), (('1',), stats['max'])]
+
+    def percentiles(self):
+        """Lag percentiles (seconds) over the sample window"""
+        values = sorted(self.samples)
+        return {
+            'p50': percentile(values, 0.5),
+            'p90': percentile(values, 0.9),
+            'p99': percentile(values, 0.99),
+            'max': values[-1] if values else 0.0,
+            'samples': len(values)
+        }
+
+    async def _sample(self):
+        loop = asyncio.get_running_loop()
+        while True:
+            expected = loop.time() + self.interval
+            await asyncio.sleep(self.interval)
+            lag = max(0.0, loop.time() - expected)
+            self.samples.append(lag)
+            self._heartbeat = time.monotonic()
+            stall = self._current_stall
+            if stall is not None:
+                # The loop is running again: record how long the stall really lasted
+                stall['duration'] = lag
+                self._current_stall = None
+                logger.warning(
+                    f"🐢 Event loop blocked for {lag * 1000:.0f}ms; blocking stack:\n{stall['stack']}"
+                )
+
+    def _watch(self):
+        """Runs in a thread: if the loop stops heartbeating, grab the loop thread's current stack"""
+        poll = self.slow_threshold / 2
+        while not self._stopped.wait(poll):
+            stalled_for = time.monotonic() - self._heartbeat - self.interval
+            if stalled_for < self.slow_threshold or self._current_stall is not None:
+                continue
+            frame = sys._current_frames().get(self._loop_thread_id)
+            if frame is None:
+                continue
+            stall = {
+                'at': time.time(),
+                'duration': stalled_for,
+                'stack': ''.join(traceback.format_stack(frame, limit=25))
+            }
+            self._current_stall = stall
+            self.slow_events.append(stall)
+            SLOW_CALLBACKS.inc()
+
+    def start(self):
+        if self._task is None or self._task.done():
+            self._loop_thread_id = threading.get_ident()
+            self._heartbeat = time.monotonic()
+            self._task = asyncio.create_task(self._sample())
+        if self._watchdog is None:
+            self._watchdog = threading.Thread(target=self._watch, name='loop-monitor', daemon=True)
+            self._watchdog.start()
+
+    def stop(self):
+        self._stopped.set()
+        if self._task and not self._task.done():
+            self._task.cancel()
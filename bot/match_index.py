@@ -0,0 +1,133 @@
+import bisect
+import heapq
+from datetime import datetime
+from itertools import islice
+
+def match_sort_key(match):
+    return (datetime.fromisoformat(match['time']).timestamp(), match['id'])
+
+
+class MatchIndex:
+    """Time-sorted (start_ts, match_id) lists per guild and per (guild, creator).
+
+    Inserts and removals are O(log n) searches plus a list shift; reading a page is O(page size).
+    `version` changes on every mutation so callers can cache anything derived from the index.
+    """
+
+    def __init__(self):
+        self.by_guild = {}
+        self.by_creator = {}
+        self.version = 0
+
+    def _lists(self, match):
+        guild_id = match.get('guild_id')
+        yield self.by_guild.setdefault(guild_id, [])
+        yield self.by_creator.setdefault((guild_id, match.get('creator')), [])
+
+    def add(self, match):
+        key = match_sort_key(match)
+        for entries in self._lists(match):
+            bisect.insort(entries, key)
+        self.version += 1
+
+    def discard(self, match):
+        key = match_sort_key(match)
+        guild_id = match.get('guild_id')
+        for index, index_key in ((self.by_guild, guild_id), (self.by_creator, (guild_id, match.get('creator')))):
+            entries = index.get(index_key)
+            if entries is None:
+                continue
+            position = bisect.bisect_left(entries, key)
+            if position < len(entries) and entries[position] == key:
+                del entries[position]
+            if not entries:
+                del index[index_key]
+        self.version += 1
+
+    def _sources(self, guild_id, creator_id):
+        """Sorted lists making up a view; legacy matches with no guild are shown in every guild"""
+        if guild_id is None:
+            if creator_id is None:
+                return list(self.by_guild.values())
+            return [entries for (_, creator), entries in self.by_creator.items() if creator == creator_id]
+        guild_ids = (guild_id, None)
+        if creator_id is None:
+            return [self.by_guild[g] for g in guild_ids if g in self.by_guild]
+        return [self.by_creator[(g, creator_id)] for g in guild_ids if (g, creator_id) in self.by_creator]
+
+    def count(self, guild_id=None, creator_id=None):
+        return sum(len(entries) for entries in self._sources(guild_id, creator_id))
+
+    def page(self, offset, limit, guild_id=None, creator_id=None):
+        """Match ids of one page of a view, ordered by start time"""
+        sources = self._sources(guild_id, creator_id)
+        if len(sources) == 1:
+            return [match_id for _, match_id in sources[0][offset:offset + limit]]
+        # Only reached with legacy or cross-guild views: merge lazily up to the end of the page
+        return [match_id for _, match_id in islice(heapq.merge(*sources), offset, offset + limit)]
+
+    def next_after(self, timestamp, guild_id=None):
+        """Id of the first match starting at or after timestamp, found by bisection"""
+        best = None
+        for entries in self._sources(guild_id, None):
+            position = bisect.bisect_left(entries, (timestamp,))
+            if position < len(entries) and (best is None or entries[position] < best):
+                best = entries[position]
+        return None if best is None else best[1]
+
+    def count_after(self, timestamp, guild_id=None):
+        return sum(len(entries) - bisect.bisect_left(entries, (timestamp,)) for entries in self._sources(guild_id, None))
+
+
+class MatchAggregates:
+    """Running per-guild match counts by language and creator, updated in O(1) per change"""
+
+    def __init__(self):
+        self.count = 0
+        self.by_guild = {}
+        self.languages = {}
+        self.creators = {}
+
+    @staticmethod
+    def _bump(counts, key, delta):
+        value = counts.get(key, 0) + delta
+        if value > 0:
+            counts[key] = value
+        else:
+            counts.pop(key, None)
+
+    def _update(self, match, delta):
+        guild_id = match.get('guild_id')
+        self.count += delta
+        self._bump(self.by_guild, guild_id, delta)
+        self._bump(self.languages.setdefault(guild_id, {}), match.get('language', 'en'), delta)
+        self._bump(self.creators.setdefault(guild_id, {}), match.get('creator'), delta)
+        if guild_id not in self.by_guild:
+            self.languages.pop(guild_id, None)
+            self.creators.pop(guild_id, None)
+
+    def add(self, match):
+        self._update(match, 1)
+
+    def discard(self, match):
+        self._update(match, -1)
+
+    def total(self, guild_id=None):
+        if guild_id is None:
+            return self.count
+        return self.by_guild.get(guild_id, 0) + self.by_guild.get(None, 0)
+
+    def _merged(self, table, guild_id):
+        # Legacy matches with no guild count towards every guild, like in the match views
+        guild_ids = list(table) if guild_id is None else [guild_id, None]
+        merged = {}
+        for g in guild_ids:
+            for key, count in table.get(g, {}).items():
+                merged[key] = merged.get(key, 0) + count
+        return merged
+
+    def languages_for(self, guild_id=None):
+        return self._merged(self.languages, guild_id)
+
+    def creators_for(self, guild_id=None):
+        return self._merged(self.creators, guild_id)
@@ -1,41 +1,154 @@
 import discord
 import asyncio
-import json
-from datetime import datetime, timedelta
-import pytz
-from .utils import load_data, save_data
-from .translations import get_translation, detect_language
+from datetime import datetime
+import time
+from .match_store import MatchStore
+from .scheduler import ShardedScheduler, REMINDER_OFFSETS
+from .sharding import shard_for, shard_layout
+from .outbox import DMOutbox
+from .dm_sender import UserDM
+from .recipients import RecipientIndex, parse_mentions
+from .members import MemberResolver
+from .match_index import MatchIndex, MatchAggregates
+from .utils import FILE_WRITER
+from .metrics import MATCH_STORE_SIZE, REMINDER_LATENESS, SHARD_SCHEDULER_BACKLOG
 import re
 import logging
 
 logger = logging.getLogger(__name__)
 
+REMINDER_GRACE_SECONDS = 30
+
 class MatchManager:
     def __init__(self, bot):
         self.bot = bot
-        
-    async def create_match(self, team1, team2, match_time, language, creator_id):
+        self.store = MatchStore(bot.storage)
+        self.store.load()
+        # One scheduler partition per shard this process runs
+        self.scheduler = ShardedScheduler(*shard_layout(bot))
+        self._scheduler_task = None
+        self._leader_task = None
+        self._sync_task = None
+        self._sweep_task = None
+        # Ids of matches whose creation DMs are not queued yet
+        self.unnotified = set()
+        # Reminders whose recipients are being resolved off the scheduler tick
+        self._reminder_tasks = set()
+        # With leader election only the lease holder fires reminders and sends DMs
+        self.elector = getattr(bot, 'elector', None)
+        self.is_leader = self.elector is None
+        # One journal per shard range; replicas of the same range hand it over on election
+        self.outbox = DMOutbox(f"data/dm_outbox{getattr(bot, 'shard_scope', '')}.jsonl")
+        if self.is_leader:
+            self.outbox.load()
+        # Time-sorted match ids per guild and per creator
+        self.index = MatchIndex()
+        self.aggregates = MatchAggregates()
+        self.recipients = RecipientIndex()
+        self.members = getattr(bot, 'member_resolver', None) or MemberResolver()
+        MATCH_STORE_SIZE.callback = lambda: [((), len(self.store))]
+        SHARD_SCHEDULER_BACKLOG.callback = lambda: [
+            ((shard_id,), stats['backlog']) for shard_id, stats in self.scheduler.shard_stats().items()
+        ]
+        for match in self.store.matches:
+            self._ensure_mentions(match)
+            self._index_match(match)
+            self._schedule_match(match)
+    
+    def _index_match(self, match):
+        self.index.add(match)
+        self.aggregates.add(match)
+        if match['reminders_sent'].get('created') is False:
+            self.unnotified.add(match['id'])
+    
+    def _unindex_match(self, match):
+        self.index.discard(match)
+        self.aggregates.discard(match)
+        self.unnotified.discard(match['id'])
+    
+    def match_stats(self, guild_id=None, now=None):
+        """Aggregate match statistics without walking the match list"""
+        now = time.time() if now is None else now
+        next_id = self.index.next_after(now, guild_id)
+        return {
+            'total': self.aggregates.total(guild_id),
+            'upcoming': self.index.count_after(now, guild_id),
+            'next_match': self.store.get(next_id) if next_id is not None else None,
+            'languages': self.aggregates.languages_for(guild_id),
+            'creators': self.aggregates.creators_for(guild_id),
+            'guilds': len([g for g in self.aggregates.by_guild if g is not None])
+        }
+    
+    def get_matches_page(self, page, page_size, guild_id=None, creator_id=None):
+        """Return (matches, total) for one 0-based page of the time-sorted view"""
+        ids = self.index.page(page * page_size, page_size, guild_id, creator_id)
+        return [self.store.get(match_id) for match_id in ids], self.index.count(guild_id, creator_id)
+    
+    def end_match(self, match_id, guild_id=None):
+        """Remove a match by its stable ID if it belongs to guild_id, returning it or None"""
+        match = self.store.get(match_id)
+        if match is None:
+            return None
+        if guild_id is not None and match.get('guild_id') not in (guild_id, None):
+            return None
+        return self.end_match_by_id(match_id)
+    
+    def end_match_by_id(self, match_id):
+        """Remove a match by its ID, returning it or None"""
+        match = self.store.get(match_id)
+        if match is None:
+            return None
+        self.store.remove(match)
+        self._forget_match(match)
+        return match
+    
+    def _forget_match(self, match):
+        self._unindex_match(match)
+        self.recipients.discard(match['id'])
+        self.scheduler.cancel(match['id'])
+        # A standby's outbox is not loaded; the leader forgets the match when it syncs the removal
+        if self.is_leader:
+            self.outbox.forget_match(match['id'])
+    
+    async def close(self):
+        """Stop the scheduler and flush pending match changes before shutdown"""
+        for task in (self._scheduler_task, self._leader_task, self._sync_task, self._sweep_task, *self._reminder_tasks):
+            if task and not task.done():
+                task.cancel()
+        if self.elector is not None:
+            await self.elector.close()
+        if self.is_leader:
+            await self.outbox.close()
+        await self.store.close()
+        
+    async def create_match(self, team1, team2, match_time, language, creator_id, guild_id=None, channel_id=None, notify=True):
         """Create a new match and return its ID"""
-        matches = load_data('data/matches.json', [])
-        
+        user_ids, role_ids = parse_mentions(team1, team2)
         match_data = {
-            'id': len(matches) + 1,
+            'id': await self.store.allocate_id_async(),
             'team1': team1,
             'team2': team2,
             'time': match_time.isoformat(),
             'language': language,
             'creator': creator_id,
+            'guild_id': guild_id,
+            'channel_id': channel_id,
+            'user_ids': user_ids,
+            'role_ids': role_ids,
             'reminders_sent': {
+                # False until the creation DMs are queued; the leader sends them for matches made on standbys
+                'created': not notify,
                 '10min': False,
                 '3min': False
             }
         }
         
-        if isinstance(matches, list):
-            matches.append(match_data)
-        else:
-            matches = [match_data]
-        save_data('data/matches.json', matches)
+        self.store.add(match_data)
+        self._index_match(match_data)
+        self._schedule_match(match_data)
+        guild = self.bot.get_guild(guild_id) if guild_id is not None else None
+        if guild and guild.chunked:
+            self.recipients.build(match_data, guild)
         
         return match_data['id']
     
@@ -44,7 +157,7 @@ class MatchManager:
         # Convert user mentions to username format
         def replace_user_mention(match):
             user_id = match.group(1)
-            user = guild.get_member(int(user_id))
+            user = self.members.get(guild, int(user_id))
             if user:
                 return f"@{user.display_name}"
             return f"@User{user_id}"
@@ -63,202 +176,357 @@ class MatchManager:
         
         return text
 
-    async def send_match_notifications(self, team1, team2, match_time, language, guild):
-        """Send private messages to mentioned users/roles in teams"""
-        
-        # Extract mentions from team strings
-        user_mentions = re.findall(r'<@!?(\d+)>', f"{team1} {team2}")
-        role_mentions = re.findall(r'<@&(\d+)>', f"{team1} {team2}")
-        
+    def build_match_message(self, match, kind, guild):
+        """Render the DM embed for a match notification ('created') or reminder ('10min'/'3min')"""
         # Convert mentions to text format for DMs
-        team1_text = self.convert_mentions_to_text(team1, guild)
-        team2_text = self.convert_mentions_to_text(team2, guild)
+        team1_text = self.convert_mentions_to_text(match['team1'], guild)
+        team2_text = self.convert_mentions_to_text(match['team2'], guild)
         
-        # Create base message
+        match_time = datetime.fromisoformat(match['time'])
         timestamp = int(match_time.timestamp())
+        language = match['language']
+        
+        if kind == 'created':
+            messages = {
+                'ar': f"🏆 **مباراة جديدة!**\n\n**الفرق:** {team1_text} ضد {team2_text}\n**الوقت:** <t:{timestamp}:F>\n**التاريخ:** <t:{timestamp}:D>\n**الوقت النسبي:** <t:{timestamp}:R>\n\nتم إنشاء مباراة جديدة وتم ذكرك فيها!",
+                'pt': f"🏆 **Nova Partida!**\n\n**Equipes:** {team1_text} vs {team2_text}\n**Horário:** <t:{timestamp}:F>\n**Data:** <t:{timestamp}:D>\n**Tempo Relativo:** <t:{timestamp}:R>\n\nUma nova partida foi criada e você foi mencionado!",
+                'es': f"🏆 **¡Nuevo Partido!**\n\n**Equipos:** {team1_text} vs {team2_text}\n**Hora:** <t:{timestamp}:F>\n**Fecha:** <t:{timestamp}:D>\n**Tiempo Relativo:** <t:{timestamp}:R>\n\n¡Se ha creado un nuevo partido y has sido mencionado!",
+                'en': f"🏆 **New Match!**\n\n**Teams:** {team1_text} vs {team2_text}\n**Time:** <t:{timestamp}:F>\n**Date:** <t:{timestamp}:D>\n**Relative Time:** <t:{timestamp}:R>\n\nA new match has been created and you were mentioned!"
+            }
+            title, color = "🏆 Match Notification", 0x00ff00
+        else:
+            time_before = self._time_before_text(kind, language)
+            messages = {
+                'ar': f"⏰ **تذكير بالمباراة!**\n\n**الفرق:** {team1_text} ضد {team2_text}\n**الوقت:** <t:{timestamp}:F>\n**التاريخ:** <t:{timestamp}:D>\n**الوقت النسبي:** <t:{timestamp}:R>\n\n🚨 المباراة ستبدأ خلال {time_before}! استعد الآن!",
+                'pt': f"⏰ **Lembrete de Partida!**\n\n**Equipes:** {team1_text} vs {team2_text}\n**Horário:** <t:{timestamp}:F>\n**Data:** <t:{timestamp}:D>\n**Tempo Relativo:** <t:{timestamp}:R>\n\n🚨 A partida começará em {time_before}! Prepare-se agora!",
+                'es': f"⏰ **¡Recordatorio de Partido!**\n\n**Equipos:** {team1_text} vs {team2_text}\n**Hora:** <t:{timestamp}:F>\n**Fecha:** <t:{timestamp}:D>\n**Tiempo Relativo:** <t:{timestamp}:R>\n\n🚨 ¡El partido comenzará en {time_before}! ¡Prepárate ahora!",
+                'en': f"⏰ **Match Reminder!**\n\n**Teams:** {team1_text} vs {team2_text}\n**Time:** <t:{timestamp}:F>\n**Date:** <t:{timestamp}:D>\n**Relative Time:** <t:{timestamp}:R>\n\n🚨 The match will start in {time_before}! Get ready now!"
+            }
+            title, color = "⏰ Match Reminder", 0xff9900
         
-        base_messages = {
-            'ar': f"🏆 **مباراة جديدة!**\n\n**الفرق:** {team1_text} ضد {team2_text}\n**الوقت:** <t:{timestamp}:F>\n**التاريخ:** <t:{timestamp}:D>\n**الوقت النسبي:** <t:{timestamp}:R>\n\nتم إنشاء مباراة جديدة وتم ذكرك فيها!",
-            'pt': f"🏆 **Nova Partida!**\n\n**Equipes:** {team1_text} vs {team2_text}\n**Horário:** <t:{timestamp}:F>\n**Data:** <t:{timestamp}:D>\n**Tempo Relativo:** <t:{timestamp}:R>\n\nUma nova partida foi criada e você foi mencionado!",
-            'es': f"🏆 **¡Nuevo Partido!**\n\n**Equipos:** {team1_text} vs {team2_text}\n**Hora:** <t:{timestamp}:F>\n**Fecha:** <t:{timestamp}:D>\n**Tiempo Relativo:** <t:{timestamp}:R>\n\n¡Se ha creado un nuevo partido y has sido mencionado!",
-            'en': f"🏆 **New Match!**\n\n**Teams:** {team1_text} vs {team2_text}\n**Time:** <t:{timestamp}:F>\n**Date:** <t:{timestamp}:D>\n**Relative Time:** <t:{timestamp}:R>\n\nA new match has been created and you were mentioned!"
-        }
-        
-        message_text = base_messages.get(language, base_messages['en'])
+        message_text = messages.get(language, messages['en'])
         
         # Create embed
         embed = discord.Embed(
-            title="🏆 Match Notification",
+            title=title,
             description=message_text,
-            color=0x00ff00,
+            color=color,
             timestamp=datetime.utcnow()
         )
         embed.set_footer(text=f"From: {guild.name}")
+        return embed, message_text
+    
+    def find_guild(self, match):
+        """Return the guild a match belongs to via its stored guild_id"""
+        guild_id = match.get('guild_id')
+        if guild_id is not None:
+            return self.bot.get_guild(guild_id)
+        
+        # Legacy matches created before guild_id was recorded: resolve once from mentions
+        guild = self._find_legacy_guild(match)
+        if guild:
+            self._unindex_match(match)
+            match['guild_id'] = guild.id
+            self._index_match(match)
+            self.store.mark_dirty(match)
+        return guild
+    
+    def _find_legacy_guild(self, match):
+        for g in self.bot.guilds:
+            if any(self.members.get(g, uid) for uid in match['user_ids']):
+                return g
+        for g in self.bot.guilds:
+            if any(g.get_role(rid) for rid in match['role_ids']):
+                return g
         
-        # Send to mentioned users
-        for user_id in user_mentions:
+        # Only guess when there is exactly one guild it could be
+        if len(self.bot.guilds) == 1:
+            return self.bot.guilds[0]
+        return None
+    
+    def _ensure_mentions(self, match):
+        """Parse mentions once for matches stored before user_ids/role_ids existed"""
+        if 'user_ids' not in match or 'role_ids' not in match:
+            match['user_ids'], match['role_ids'] = parse_mentions(match['team1'], match['team2'])
+            self.store.mark_dirty(match)
+    
+    async def collect_recipients(self, match, guild):
+        """Return the set of member ids to DM for a match"""
+        if guild.chunked:
+            # Full member cache: resolved once and kept current by member events
+            if match['id'] not in self.recipients:
+                self.recipients.build(match, guild)
+            return self.recipients.get(match['id'])
+        # Members resolved on demand; the resolver's member and role caches make repeat calls cheap
+        return await self.recipients.build_async(match, guild, self.members)
+    
+    async def send_match_notifications(self, match_id, guild):
+        """Queue private messages to mentioned users/roles of a newly created match"""
+        match = self.store.get(match_id)
+        if match is None or guild is None:
+            return
+        if not self.is_leader:
+            # Picked up by the leader when it syncs the new match from shared storage
+            return
+        queued = await self.outbox.enqueue(match_id, 'created', list(await self.collect_recipients(match, guild)))
+        match['reminders_sent']['created'] = True
+        self.unnotified.discard(match_id)
+        self.store.mark_dirty(match)
+        logger.info(f"📨 Queued {queued} match notifications for match {match_id}")
+    
+    async def _send_pending_notifications(self, matches):
+        """Queue creation DMs of matches created by a standby replica (or lost to a crash or a failed command)"""
+        now = time.time()
+        for match in matches:
+            if match['reminders_sent'].get('created') is not False:
+                continue
+            if datetime.fromisoformat(match['time']).timestamp() <= now:
+                continue
+            guild = self.find_guild(match)
+            if guild:
+                try:
+                    await self.send_match_notifications(match['id'], guild)
+                except Exception as e:
+                    # Still unnotified, so the next sweep tries again
+                    logger.error(f"Error queuing match notifications for match {match['id']}: {e}")
+    
+    def _schedule_match(self, match):
+        """Queue the pending reminder and expiry deadlines of a match"""
+        start_ts = datetime.fromisoformat(match['time']).timestamp()
+        for kind in ('10min', '3min'):
+            if not match['reminders_sent'].get(kind):
+                self.scheduler.schedule(match['id'], kind, start_ts + REMINDER_OFFSETS[kind], match.get('guild_id'))
+        self.scheduler.schedule(match['id'], 'expire', start_ts + REMINDER_OFFSETS['expire'], match.get('guild_id'))
+    
+    def _time_before_text(self, kind, language):
+        minutes = kind.replace('min', '')
+        if language == 'ar':
+            return f"{minutes} دقائق"
+        if language in ['pt', 'es']:
+            return f"{minutes} minutos"
+        return f"{minutes} minutes"
+    
+    def build_recipients(self):
+        """Resolve recipients up front for chunked guilds so reminders never walk members"""
+        for match in self.store.matches:
+            guild = self.find_guild(match)
+            if guild and guild.chunked:
+                self.recipients.build(match, guild)
+        logger.info(f"👥 Resolved recipients for {len(self.recipients.recipients)} matches")
+    
+    def _reschedule_all(self, layout=None):
+        self.scheduler.configure(*(layout or self.scheduler.layout))
+        for match in self.store.matches:
+            self._schedule_match(match)
+    
+    def start(self):
+        """Start the deadline-driven reminder scheduler once the bot is ready"""
+        async def run():
+            await self.bot.wait_until_ready()
+            # With BOT_SHARDING=auto the shard count is only known once connected
+            layout = shard_layout(self.bot)
+            if layout != self.scheduler.layout:
+                logger.info(f"🧩 Partitioning reminders over shards {layout[1]} of {layout[0]}")
+                self._reschedule_all(layout)
+            if self.store.storage.shared:
+                self._sync_task = asyncio.create_task(self._sync_loop())
+            if self.elector is None:
+                await self._start_leading()
+            else:
+                self.elector.start(self._on_elected, self._on_demoted)
+        
+        if self._scheduler_task is None or self._scheduler_task.done():
+            self._scheduler_task = asyncio.create_task(run())
+    
+    async def _start_leading(self):
+        self.build_recipients()
+        # Resume any DMs left undelivered by a previous run (or a previous leader)
+        self.outbox.start(self.deliver_outbox_batch)
+        self._leader_task = asyncio.create_task(self.scheduler.run(self.check_match_reminders))
+        self._sweep_task = asyncio.create_task(self._notification_sweep())
+    
+    async def _notification_sweep(self, interval=60.0):
+        """Re-queue creation DMs still unsent, e.g. when /create_match failed after saving the match.
+
+        Runs once on election, then every `interval`; the outbox dedupes entries already queued.
+        """
+        while True:
             try:
-                user = guild.get_member(int(user_id))
-                if user and not user.bot:  # Skip bots
-                    from .commands import TranslationView
-                    view = TranslationView(embed, message_text, language)
-                    await user.send(embed=embed, view=view)
-                    await asyncio.sleep(1)  # Rate limiting
+                pending = [self.store.get(match_id) for match_id in list(self.unnotified)]
+                await self._send_pending_notifications([m for m in pending if m is not None])
             except Exception as e:
-                logger.error(f"Failed to send DM to user {user_id}: {e}")
-        
-        # Send to users with mentioned roles
-        for role_id in role_mentions:
+                logger.error(f"Error re-queuing match notifications: {e}")
+            await asyncio.sleep(interval)
+    
+    async def _on_elected(self):
+        """Take over from a previous leader: catch up on shared storage and its outbox, then run"""
+        await self.sync_from_storage()
+        self._reschedule_all()
+        self.outbox = DMOutbox(self.outbox.log.file_path)
+        await FILE_WRITER.run(self.outbox.load)
+        # Catching up can outlast the lease TTL; never start firing reminders on a lost lease
+        if not await self.elector.confirm():
+            logger.warning("🪑 Lost the scheduler lease during takeover; standing by")
+            return
+        self.is_leader = True
+        await self._start_leading()
+    
+    async def _on_demoted(self):
+        self.is_leader = False
+        for task in (self._leader_task, self._sweep_task):
+            if task and not task.done():
+                task.cancel()
+        for task in self._reminder_tasks:
+            task.cancel()
+        await self.outbox.close()
+    
+    async def sync_from_storage(self):
+        """Apply matches created, changed or ended by other processes sharing the storage"""
+        added, updated, removed = await self.store.reload()
+        for match in removed:
+            self._forget_match(match)
+        for old, new in updated:
+            self._unindex_match(old)
+            self.scheduler.cancel(old['id'])
+            self.recipients.discard(old['id'])
+            self._index_match(new)
+            self._schedule_match(new)
+        for match in added:
+            self._ensure_mentions(match)
+            self._index_match(match)
+            self._schedule_match(match)
+        if added or updated or removed:
+            logger.info(f"🔄 Synced matches from shared storage: {len(added)} new, {len(updated)} changed, {len(removed)} ended")
+        if self.is_leader and added:
+            await self._send_pending_notifications(added)
+    
+    async def _sync_loop(self, interval=2.0):
+        """Poll the database's data_version and sync the changed rows whenever another process has committed"""
+        version = None
+        while True:
+            await asyncio.sleep(interval)
             try:
-                role = guild.get_role(int(role_id))
-                if role:
-                    for member in role.members:
-                        try:
-                            if not member.bot:  # Skip bots
-                                from .commands import TranslationView
-                                view = TranslationView(embed, message_text, language)
-                                await member.send(embed=embed, view=view)
-                                await asyncio.sleep(1)  # Rate limiting
-                        except Exception as e:
-                            logger.error(f"Failed to send DM to role member {member.id}: {e}")
+                current = await FILE_WRITER.run(self.store.storage.data_version)
+                if current != version:
+                    version = current
+                    await self.sync_from_storage()
             except Exception as e:
-                logger.error(f"Failed to process role {role_id}: {e}")
+                logger.error(f"Error syncing matches from shared storage: {e}")
     
-    async def check_match_reminders(self):
-        """Check for matches that need reminders"""
-        matches = load_data('data/matches.json', [])
-        current_time = datetime.now()
-        updated = False
-        
-        for match in matches:
+    async def check_match_reminders(self, now=None, scheduler=None):
+        """Fire every due reminder/expiry deadline (of one shard's scheduler, if given); cost is O(due deadlines)"""
+        now = time.time() if now is None else now
+        fired = False
+        
+        for fire_at, match_id, kind in (scheduler or self.scheduler).pop_due(now):
+            match = self.store.get(match_id)
+            if match is None:
+                continue
             try:
-                match_time = datetime.fromisoformat(match['time'])
-                time_diff = match_time - current_time
-                total_minutes = time_diff.total_seconds() / 60
-                
-                # Check for 10-minute reminder (send between 9.5-10.5 minutes before)
-                if (9.5 <= total_minutes <= 10.5 and not match['reminders_sent']['10min']):
-                    logger.info(f"🔔 Sending 10-minute reminder for match {match['id']} (time remaining: {total_minutes:.1f} minutes)")
-                    await self.send_match_reminder(match, "10 دقائق" if match['language'] == 'ar' else "10 minutos" if match['language'] in ['pt', 'es'] else "10 minutes")
-                    match['reminders_sent']['10min'] = True
-                    updated = True
-                
-                # Check for 3-minute reminder (send between 2.5-3.5 minutes before)
-                elif (2.5 <= total_minutes <= 3.5 and not match['reminders_sent']['3min']):
-                    logger.info(f"🔔 Sending 3-minute reminder for match {match['id']} (time remaining: {total_minutes:.1f} minutes)")
-                    await self.send_match_reminder(match, "3 دقائق" if match['language'] == 'ar' else "3 minutos" if match['language'] in ['pt', 'es'] else "3 minutes")
-                    match['reminders_sent']['3min'] = True
-                    updated = True
+                start_ts = fire_at - REMINDER_OFFSETS[kind]
                 
                 # Remove expired matches (1 hour after match time)
-                elif total_minutes < -60:
+                if kind == 'expire':
                     logger.info(f"🗑️ Removing expired match {match['id']}")
-                    if isinstance(matches, list):
-                        matches.remove(match)
-                        updated = True
+                    self.end_match_by_id(match_id)
+                    continue
+                
+                # Skip stale reminders (created too late or missed during downtime), keeping
+                # the old half-minute tolerance around the target time
+                if now - fire_at > REMINDER_GRACE_SECONDS or now >= start_ts:
+                    logger.info(f"⏭️ Skipping stale {kind} reminder for match {match['id']}")
+                else:
+                    total_minutes = (start_ts - now) / 60
+                    logger.info(f"🔔 Sending {kind} reminder for match {match['id']} (time remaining: {total_minutes:.1f} minutes)")
+                    guild = self.find_guild(match)
+                    if guild is not None and not guild.chunked:
+                        # Member lookups and role scans can take seconds; they run in the background
+                        # so this tick's other deadlines are not held up
+                        self._spawn_reminder(match, kind)
+                        continue
+                    # Journals one outbox entry per recipient; delivery happens in the outbox worker
+                    await self.send_match_reminder(match, kind)
+                
+                match['reminders_sent'][kind] = True
+                self.store.mark_dirty(match)
+                fired = True
                     
             except Exception as e:
                 logger.error(f"Error processing match reminder for match {match.get('id', 'unknown')}: {e}")
         
-        if updated:
-            save_data('data/matches.json', matches)
+        # One flush per tick, after every due reminder is journaled: a flush copies the whole store,
+        # and a restart before it re-fires reminders whose outbox entries already dedupe the DMs
+        if fired:
+            await self.store.flush_async()
     
-    async def send_match_reminder(self, match, time_before):
-        """Send reminder for an upcoming match"""
-        
-        # Extract mentions from team strings
-        user_mentions = re.findall(r'<@!?(\d+)>', f"{match['team1']} {match['team2']}")
-        role_mentions = re.findall(r'<@&(\d+)>', f"{match['team1']} {match['team2']}")
-        
-        match_time = datetime.fromisoformat(match['time'])
-        timestamp = int(match_time.timestamp())
-        
-        # Get guild from the bot's guilds first
-        guild = None
-        for g in self.bot.guilds:
-            # Try to find the guild by checking if any mentioned users are in this guild
-            for uid in user_mentions:
-                if uid.isdigit() and g.get_member(int(uid)):
-                    guild = g
-                    break
-            if guild:
-                break
-        
-        # If no guild found from user mentions, try role mentions
-        if not guild:
-            for g in self.bot.guilds:
-                for rid in role_mentions:
-                    if rid.isdigit() and g.get_role(int(rid)):
-                        guild = g
-                        break
-                if guild:
-                    break
-        
-        # If still no guild found, use the first available guild
-        if not guild and self.bot.guilds:
-            guild = self.bot.guilds[0]
-        
+    def _spawn_reminder(self, match, kind):
+        task = asyncio.create_task(self._queue_reminder(match, kind))
+        self._reminder_tasks.add(task)
+        task.add_done_callback(self._reminder_tasks.discard)
+    
+    async def _queue_reminder(self, match, kind):
+        """Resolve a reminder's recipients and journal it, marking it sent only once queued"""
+        try:
+            await self.send_match_reminder(match, kind)
+        except Exception as e:
+            logger.error(f"Error queuing {kind} reminder for match {match['id']}: {e}")
+            return
+        # The match may have ended (or been replaced by a sync) while its members were looked up
+        if self.store.get(match['id']) is match:
+            match['reminders_sent'][kind] = True
+            self.store.mark_dirty(match)
+    
+    async def send_match_reminder(self, match, kind):
+        """Queue reminder DMs for an upcoming match in the durable outbox"""
+        guild = self.find_guild(match)
         if not guild:
             logger.warning("No guild found for sending reminders")
             return
         
-        # Convert mentions to text for reminders
-        team1_text = self.convert_mentions_to_text(match['team1'], guild)
-        team2_text = self.convert_mentions_to_text(match['team2'], guild)
-        
-        # Create reminder messages in different languages
-        reminder_messages = {
-            'ar': f"⏰ **تذكير بالمباراة!**\n\n**الفرق:** {team1_text} ضد {team2_text}\n**الوقت:** <t:{timestamp}:F>\n**التاريخ:** <t:{timestamp}:D>\n**الوقت النسبي:** <t:{timestamp}:R>\n\n🚨 المباراة ستبدأ خلال {time_before}! استعد الآن!",
-            'pt': f"⏰ **Lembrete de Partida!**\n\n**Equipes:** {team1_text} vs {team2_text}\n**Horário:** <t:{timestamp}:F>\n**Data:** <t:{timestamp}:D>\n**Tempo Relativo:** <t:{timestamp}:R>\n\n🚨 A partida começará em {time_before}! Prepare-se agora!",
-            'es': f"⏰ **¡Recordatorio de Partido!**\n\n**Equipos:** {team1_text} vs {team2_text}\n**Hora:** <t:{timestamp}:F>\n**Fecha:** <t:{timestamp}:D>\n**Tiempo Relativo:** <t:{timestamp}:R>\n\n🚨 ¡El partido comenzará en {time_before}! ¡Prepárate ahora!",
-            'en': f"⏰ **Match Reminder!**\n\n**Teams:** {team1_text} vs {team2_text}\n**Time:** <t:{timestamp}:F>\n**Date:** <t:{timestamp}:D>\n**Relative Time:** <t:{timestamp}:R>\n\n🚨 The match will start in {time_before}! Get ready now!"
-        }
-        
-        message_text = reminder_messages.get(match['language'], reminder_messages['en'])
+        queued = await self.outbox.enqueue(match['id'], kind, list(await self.collect_recipients(match, guild)))
+        logger.info(f"🚀 Queued {queued} reminders for match {match['id']} ({kind} before)")
+    
+    async def deliver_outbox_batch(self, match_id, kind, entries):
+        """Send one (match, kind) batch of outbox entries through the DM fan-out engine"""
+        match = self.store.get(match_id)
+        guild = self.find_guild(match) if match else None
+        if match is None or guild is None:
+            # The match ended or its guild is gone; nothing left to deliver
+            for entry in entries:
+                self.outbox.mark_failed(entry, permanent=True)
+            return
         
-        # Create embed
-        embed = discord.Embed(
-            title="⏰ Match Reminder",
-            description=message_text,
-            color=0xff9900,
-            timestamp=datetime.utcnow()
+        embed, message_text = self.build_match_message(match, kind, guild)
+        
+        # Recipients were resolved when the entries were journaled; DMs go by user id, so
+        # delivery needs no member lookup (Discord rejects DMs to users it cannot reach)
+        entry_by_user = {entry['user_id']: entry for entry in entries}
+        recipients = [UserDM(self.bot, user_id) for user_id in entry_by_user]
+        
+        # Reminder target time, for lateness metrics
+        target_ts = None
+        if kind in REMINDER_OFFSETS:
+            target_ts = datetime.fromisoformat(match['time']).timestamp() + REMINDER_OFFSETS[kind]
+        
+        def on_result(member, error):
+            entry = entry_by_user[member.id]
+            if error is None:
+                self.outbox.mark_done(entry)
+                if target_ts is not None:
+                    REMINDER_LATENESS.observe(max(0.0, time.time() - target_ts), kind=kind)
+            else:
+                # Closed DMs will never succeed; anything else is retried with backoff
+                self.outbox.mark_failed(entry, permanent=isinstance(error, discord.Forbidden))
+        
+        from .commands import TranslationView
+        # One shared, stateless view for every recipient of this batch
+        view = TranslationView(embed, message_text, match['language'])
+        # Each shard's guilds are served by that shard's own fan-out workers
+        fanout = self.bot.dm_sender.for_shard(shard_for(guild.id, self.scheduler.shard_count))
+        result = await fanout.send(
+            recipients,
+            lambda user: {'embed': embed, 'view': view},
+            on_result=on_result,
+            source='notification' if kind == 'created' else 'reminder'
         )
-        embed.set_footer(text=f"From: {guild.name}")
-        
-        # Collect all unique users to send reminders to (avoid duplicates)
-        users_to_notify = set()
-        
-        # Add mentioned users
-        for user_id in user_mentions:
-            try:
-                user = guild.get_member(int(user_id))
-                if user and not user.bot:  # Skip bots
-                    users_to_notify.add(user)
-            except Exception as e:
-                logger.error(f"Failed to get user {user_id}: {e}")
-        
-        # Add users from mentioned roles
-        for role_id in role_mentions:
-            try:
-                role = guild.get_role(int(role_id))
-                if role:
-                    for member in role.members:
-                        if not member.bot:  # Skip bots
-                            users_to_notify.add(member)
-            except Exception as e:
-                logger.error(f"Failed to process role {role_id} for reminder: {e}")
-        
-        # Send reminders to unique users only
-        reminder_sent_count = 0
-        for user in users_to_notify:
-            try:
-                from .commands import TranslationView
-                view = TranslationView(embed, message_text, match['language'])
-                await user.send(embed=embed, view=view)
-                reminder_sent_count += 1
-                logger.info(f"📨 Reminder sent to {user.display_name} for match {match['id']}")
-                await asyncio.sleep(1)  # Rate limiting
-            except Exception as e:
-                logger.error(f"Failed to send reminder to {user.display_name}: {e}")
-        
-        logger.info(f"🚀 Total reminders sent: {reminder_sent_count} for match {match['id']} ({time_before} before)")
+        logger.info(f"📨 Delivered {result.sent_count}/{len(entries)} {kind} DMs for match {match_id} ({result.failed_count} failed)")
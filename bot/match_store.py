@@ -0,0 +1,205 @@
+import asyncio
+import logging
+import time
+from .storage import JSONStorage, dedupe_match_ids
+from .metrics import STORAGE_FLUSH
+from .utils import FILE_WRITER
+
+logger = logging.getLogger(__name__)
+
+class MatchStore:
+    """In-memory match store with debounced write-behind persistence.
+
+    Matches live in an insertion-ordered id -> match dict, so lookup and removal are O(1).
+    Ids come from a monotonic allocator whose high-water mark is persisted as storage
+    metadata, so ids of ended or expired matches are never handed out again.
+    """
+
+    def __init__(self, storage=None, flush_delay=2.0):
+        self.storage = storage or JSONStorage()
+        self.flush_delay = flush_delay
+        self.by_id = {}
+        self.next_id = 1
+        self._next_id_dirty = False
+        self.dirty = False
+        self._changed = {}
+        self._deleted_ids = set()
+        self._full_rewrite = False
+        self._flush_task = None
+        # Changelog position of the last load/reload, so reload() only reads what changed since
+        self._sync_seq = None
+
+    def load(self):
+        """Load matches from the storage backend once at startup"""
+        # Read before the matches: changes committed in between are re-read, never missed
+        self._sync_seq = self.storage.change_seq()
+        matches = self.storage.load_matches()
+        self.dirty = False
+        if dedupe_match_ids(matches):
+            self.mark_dirty()
+        self.by_id = {m['id']: m for m in matches}
+        # The stored mark covers ids of matches that have since been removed
+        self.next_id = max(self.storage.get_meta('next_match_id', 1), max(self.by_id, default=0) + 1)
+        logger.info(f"📂 Loaded {len(self.by_id)} matches from {self.storage.name} storage")
+
+    @property
+    def matches(self):
+        return self.by_id.values()
+
+    def __len__(self):
+        return len(self.by_id)
+
+    def get(self, match_id):
+        return self.by_id.get(match_id)
+
+    def allocate_id(self):
+        """Hand out the next match id; persisted with the next flush"""
+        match_id = self.next_id
+        self.next_id += 1
+        self._next_id_dirty = True
+        return match_id
+
+    async def allocate_id_async(self):
+        """Like allocate_id, but reserved in the database itself when storage is shared by several processes"""
+        if not self.storage.shared:
+            return self.allocate_id()
+        match_id = await FILE_WRITER.run(self.storage.reserve_ids, 1, self.next_id)
+        self.next_id = match_id + 1
+        return match_id
+
+    def has_pending(self, match_id):
+        """Whether a local change to the match has not been flushed yet"""
+        return match_id in self._changed or match_id in self._deleted_ids
+
+    async def reload(self):
+        """Flush local changes, then re-read matches written by other processes.
+
+        Only rows in the storage changelog since the last load/reload are read; a full load
+        happens when the backend keeps no changelog or it no longer covers the gap. Returns
+        (added, updated, removed) relative to memory; matches with local changes still queued
+        keep their in-memory state.
+        """
+        await self.flush_async()
+        seq, changed, deleted_ids = None, None, None
+        if self._sync_seq is not None:
+            seq, changed, deleted_ids = await FILE_WRITER.run(self.storage.changes_since, self._sync_seq)
+        if changed is None:
+            seq = await FILE_WRITER.run(self.storage.change_seq)
+            changed = await FILE_WRITER.run(self.storage.load_matches)
+            deleted_ids = self.by_id.keys() - {m['id'] for m in changed}
+        self._sync_seq = seq
+
+        added, updated, removed = [], [], []
+        for match_id in deleted_ids:
+            match = self.by_id.get(match_id)
+            if match is not None and not self.has_pending(match_id):
+                del self.by_id[match_id]
+                removed.append(match)
+        for match in changed:
+            match_id = match['id']
+            if self.has_pending(match_id):
+                continue
+            current = self.by_id.get(match_id)
+            if current is None:
+                self.by_id[match_id] = match
+                added.append(match)
+            elif current != match:
+                self.by_id[match_id] = match
+                updated.append((current, match))
+        self.next_id = max(self.next_id, max((m['id'] for m in changed), default=0) + 1)
+        return added, updated, removed
+
+    def add(self, match):
+        self.by_id[match['id']] = match
+        self.mark_dirty(match)
+
+    def remove(self, match):
+        """Remove a match, returning False if it was already gone"""
+        if self.by_id.pop(match['id'], None) is None:
+            return False
+        self._mark_deleted(match)
+        return True
+
+    def _mark_deleted(self, match):
+        self._changed.pop(match['id'], None)
+        self._deleted_ids.add(match['id'])
+        self.dirty = True
+        self._schedule_flush()
+
+    def mark_dirty(self, match=None):
+        """Flag a changed match (or everything, if none given) and schedule a debounced flush"""
+        if match is None:
+            self._full_rewrite = True
+        else:
+            self._changed[match['id']] = match
+            self._deleted_ids.discard(match['id'])
+        self.dirty = True
+        self._schedule_flush()
+
+    def _schedule_flush(self):
+        if self._flush_task and not self._flush_task.done():
+            return
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            # No loop yet (startup/tests) - state is flushed on close()
+            return
+        self._flush_task = loop.create_task(self._delayed_flush())
+
+    async def _delayed_flush(self):
+        await asyncio.sleep(self.flush_delay)
+        await self.flush_async()
+
+    def _take_delta(self):
+        """Snapshot the dirty state and reset it; returns None when there is nothing to write"""
+        if not self.dirty:
+            return None
+        snapshot = list(self.by_id.values())
+        if self._full_rewrite:
+            changed, deleted_ids = None, None
+        else:
+            changed, deleted_ids = list(self._changed.values()), set(self._deleted_ids)
+        self.dirty = False
+        self._full_rewrite = False
+        self._changed = {}
+        self._deleted_ids = set()
+        next_id = self.next_id if self._next_id_dirty else None
+        self._next_id_dirty = False
+        return snapshot, changed, deleted_ids, next_id
+
+    def _flush_failed(self, e, delta):
+        snapshot, changed, deleted_ids, next_id = delta
+        if changed is None:
+            self._full_rewrite = True
+        else:
+            # Requeue the failed delta under anything changed since; a full rewrite would clobber
+            # rows other processes wrote to shared storage
+            for match in changed:
+                if match['id'] in self.by_id and match['id'] not in self._deleted_ids:
+                    self._changed.setdefault(match['id'], match)
+            self._deleted_ids.update(i for i in deleted_ids if i not in self.by_id)
+        self.dirty = True
+        self._next_id_dirty = self._next_id_dirty or next_id is not None
+        logger.error(f"Error flushing matches to {self.storage.name} storage: {e}")
+
+    async def flush_async(self):
+        """Write dirty state on the single writer thread; the delta is taken on the loop so it stays consistent"""
+        delta = self._take_delta()
+        if delta is None:
+            return
+        snapshot, changed, deleted_ids, next_id = delta
+        started = time.perf_counter()
+        try:
+            # The id mark goes first, so a crash in between can never lead to an id being reused
+            if next_id is not None:
+                await self.storage.set_meta_async('next_match_id', next_id)
+            await self.storage.write_matches_async(snapshot, changed, deleted_ids)
+            STORAGE_FLUSH.observe(time.perf_counter() - started, backend=self.storage.name)
+        except Exception as e:
+            self._flush_failed(e, delta)
+
+    async def close(self):
+        """Cancel any pending debounce and force a final flush"""
+        if self._flush_task and not self._flush_task.done():
+            self._flush_task.cancel()
+        await self.flush_async()
@@ -0,0 +1,181 @@
+import asyncio
+import logging
+import os
+import time
+from collections import OrderedDict
+import discord
+
+logger = logging.getLogger(__name__)
+
+# Discord's cap on user ids per gateway member request
+QUERY_BATCH_SIZE = 100
+
+def lazy_members_enabled():
+    """Members are resolved on demand unless BOT_CHUNK_MEMBERS=1 restores full startup chunking"""
+    return os.getenv('BOT_CHUNK_MEMBERS', '').lower() not in ('1', 'true', 'yes')
+
+
+class MemberResolver:
+    """Resolves guild members on demand instead of relying on a fully chunked member cache.
+
+    Members are kept in a bounded LRU keyed by (guild_id, user_id); misses are batched into
+    gateway member requests by id. Role membership, which Discord cannot query directly, is
+    collected by paging through the guild's member list in chunks and cached for `role_ttl`.
+
+    With the member cache off, discord.py only dispatches on_member_update for cached members,
+    i.e. never, so role changes are not seen as events: cached role sets are only as fresh as
+    `role_ttl`. Joins and removals still arrive (on_member_join, on_raw_member_remove).
+    """
+
+    def __init__(self, max_members=10000, role_ttl=300.0, chunk_size=1000):
+        self.max_members = max_members
+        self.role_ttl = role_ttl
+        self.chunk_size = chunk_size
+        self._members = OrderedDict()
+        # (guild_id, role_id) -> (fetched_at, frozenset of member ids)
+        self._roles = {}
+        # guild_id -> lock held while scanning that guild's member list for roles
+        self._role_locks = {}
+
+    @classmethod
+    def from_settings(cls, settings):
+        return cls(
+            max_members=settings.get('member_cache_size', 10000),
+            role_ttl=settings.get('role_cache_seconds', 300)
+        )
+
+    def __len__(self):
+        return len(self._members)
+
+    def remember(self, member):
+        key = (member.guild.id, member.id)
+        self._members[key] = member
+        self._members.move_to_end(key)
+        while len(self._members) > self.max_members:
+            self._members.popitem(last=False)
+
+    def forget(self, guild_id, user_id):
+        self._members.pop((guild_id, user_id), None)
+
+    def get(self, guild, user_id):
+        """Cached member or None; never touches the network"""
+        member = guild.get_member(user_id)
+        if member is not None:
+            return member
+        member = self._members.get((guild.id, user_id))
+        if member is not None:
+            self._members.move_to_end((guild.id, user_id))
+        return member
+
+    async def resolve(self, guild, user_ids):
+        """Return ({user_id: member}, failed ids), batching cache misses.
+
+        Ids missing from the result but not in `failed` are no longer in the guild; failed ids
+        could not be looked up (timeout, HTTP error), so the caller decides whether to retry.
+        """
+        found = {}
+        failed = []
+        misses = []
+        for user_id in dict.fromkeys(user_ids):
+            member = self.get(guild, user_id)
+            if member is not None:
+                found[user_id] = member
+            else:
+                misses.append(user_id)
+
+        for start in range(0, len(misses), QUERY_BATCH_SIZE):
+            batch = misses[start:start + QUERY_BATCH_SIZE]
+            try:
+                members = await guild.query_members(user_ids=batch, limit=len(batch), cache=False)
+            except (asyncio.TimeoutError, discord.ClientException, discord.HTTPException) as e:
+                logger.warning(f"Member lookup for {len(batch)} ids in guild {guild.id} failed: {e}")
+                failed.extend(batch)
+                continue
+            for member in members:
+                self.remember(member)
+                found[member.id] = member
+        return found, failed
+
+    async def iter_members_with_roles(self, guild, roles):
+        """Yield members holding any of the roles in chunks of `chunk_size`, each member once"""
+        if guild.chunked:
+            members = list({m.id: m for role in roles for m in role.members}.values())
+            for start in range(0, len(members), self.chunk_size):
+                yield members[start:start + self.chunk_size]
+            return
+
+        # Not chunked: one pass over the member list serves every role, so no member repeats
+        role_ids = {role.id for role in roles}
+        chunk = []
+        async for member in guild.fetch_members(limit=None):
+            if not any(r.id in role_ids for r in member.roles):
+                continue
+            self.remember(member)
+            chunk.append(member)
+            if len(chunk) >= self.chunk_size:
+                yield chunk
+                chunk = []
+        if chunk:
+            yield chunk
+
+    def _cached_role(self, guild_id, role_id):
+        cached = self._roles.get((guild_id, role_id))
+        if cached and time.monotonic() - cached[0] < self.role_ttl:
+            return cached[1]
+        return None
+
+    async def roles_member_ids(self, guild, roles):
+        """Ids of non-bot members holding any of the roles, cached per role for role_ttl.
+
+        Roles missing from the cache are collected together in a single pass over the member
+        list; one scan per guild runs at a time and concurrent callers reuse its results.
+        """
+        if guild.chunked:
+            return {m.id for role in roles for m in role.members if not m.bot}
+
+        ids = set()
+        stale = []
+        for role in roles:
+            cached = self._cached_role(guild.id, role.id)
+            if cached is None:
+                stale.append(role)
+            else:
+                ids.update(cached)
+        if not stale:
+            return ids
+
+        lock = self._role_locks.setdefault(guild.id, asyncio.Lock())
+        async with lock:
+            missing = []
+            for role in stale:
+                cached = self._cached_role(guild.id, role.id)
+                if cached is None:
+                    missing.append(role)
+                else:
+                    ids.update(cached)
+            if missing:
+                by_role = {role.id: set() for role in missing}
+                async for chunk in self.iter_members_with_roles(guild, missing):
+                    for member in chunk:
+                        if member.bot:
+                            continue
+                        for role in member.roles:
+                            if role.id in by_role:
+                                by_role[role.id].add(member.id)
+                fetched_at = time.monotonic()
+                for role_id, members in by_role.items():
+                    self._roles[(guild.id, role_id)] = (fetched_at, frozenset(members))
+                    ids.update(members)
+        return ids
+
+    def invalidate_role(self, guild_id, role_id):
+        self._roles.pop((guild_id, role_id), None)
+
+    def member_joined(self, member):
+        self.remember(member)
+        for role in member.roles:
+            self.invalidate_role(member.guild.id, role.id)
+
+    def member_removed(self, guild_id, user_id):
+        self.forget(guild_id, user_id)
+        # Role sets may still list the member; a DM to them then fails and is dropped
@@ -0,0 +1,201 @@
+import bisect
+import logging
+import time
+import discord
+from discord import app_commands
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0)
+
+def _format_labels(names, values, extra=None):
+    pairs = list(zip(names, values)) + (extra or [])
+    if not pairs:
+        return ''
+    escaped = (str(v).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, v in pairs)
+    return '{' + ','.join(f'{k}="{v}"' for (k, _), v in zip(pairs, escaped)) + '}'
+
+def _format_value(value):
+    if value == float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Counter:
+    """Monotonic counter with optional labels"""
+
+    type = 'counter'
+
+    def __init__(self, name, documentation, labels=()):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.values = {}
+
+    def inc(self, amount=1, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.label_names)
+        self.values[key] = self.values.get(key, 0) + amount
+
+    def get(self, **labels):
+        return self.values.get(tuple(str(labels.get(n, '')) for n in self.label_names), 0)
+
+    def samples(self):
+        for key, value in self.values.items():
+            yield self.name, _format_labels(self.label_names, key), value
+
+
+class Gauge(Counter):
+    """Point-in-time value, either set directly or read from a callback at scrape time"""
+
+    type = 'gauge'
+
+    def __init__(self, name, documentation, labels=(), callback=None):
+        super().__init__(name, documentation, labels)
+        self.callback = callback
+
+    def set(self, value, **labels):
+        self.values[tuple(str(labels.get(n, '')) for n in self.label_names)] = value
+
+    def samples(self):
+        if self.callback is not None:
+            try:
+                for key, value in self.callback():
+                    self.values[tuple(str(k) for k in key)] = value
+            except Exception as e:
+                logger.warning(f"Error collecting gauge {self.name}: {e}")
+        yield from super().samples()
+
+
+class Histogram:
+    """Cumulative-bucket histogram with optional labels"""
+
+    type = 'histogram'
+
+    def __init__(self, name, documentation, labels=(), buckets=DEFAULT_BUCKETS):
+        self.name = name
+        self.documentation = documentation
+        self.label_names = tuple(labels)
+        self.buckets = tuple(sorted(buckets)) + (float('inf'),)
+        self.series = {}
+
+    def observe(self, value, **labels):
+        key = tuple(str(labels.get(n, '')) for n in self.label_names)
+        series = self.series.get(key)
+        if series is None:
+            series = self.series[key] = {'counts': [0] * len(self.buckets), 'sum': 0.0, 'count': 0}
+        series['counts'][bisect.bisect_left(self.buckets, value)] += 1
+        series['sum'] += value
+        series['count'] += 1
+
+    def time(self, **labels):
+        return _Timer(self, labels)
+
+    def samples(self):
+        for key, series in self.series.items():
+            cumulative = 0
+            for bound, count in zip(self.buckets, series['counts']):
+                cumulative += count
+                yield f'{self.name}_bucket', _format_labels(self.label_names, key, [('le', _format_value(bound))]), cumulative
+            yield f'{self.name}_sum', _format_labels(self.label_names, key), series['sum']
+            yield f'{self.name}_count', _format_labels(self.label_names, key), series['count']
+
+
+class _Timer:
+    def __init__(self, histogram, labels):
+        self.histogram = histogram
+        self.labels = labels
+
+    def __enter__(self):
+        self.started = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.histogram.observe(time.perf_counter() - self.started, **self.labels)
+
+
+class Registry:
+    """Collection of metrics rendered in the Prometheus text exposition format"""
+
+    def __init__(self):
+        self.metrics = {}
+
+    def register(self, metric):
+        self.metrics[metric.name] = metric
+        return metric
+
+    def render(self):
+        lines = []
+        for metric in self.metrics.values():
+            lines.append(f'# HELP {metric.name} {metric.documentation}')
+            lines.append(f'# TYPE {metric.name} {metric.type}')
+            for name, labels, value in metric.samples():
+                lines.append(f'{name}{labels} {_format_value(value)}')
+        return '\n'.join(lines) + '\n'
+
+
+REGISTRY = Registry()
+
+COMMAND_LATENCY = REGISTRY.register(Histogram(
+    'bot_command_latency_seconds', 'Slash command handling time', labels=('command', 'status')))
+DMS_SENT = REGISTRY.register(Counter(
+    'bot_dm_sent_total', 'DMs delivered', labels=('source',)))
+DMS_FAILED = REGISTRY.register(Counter(
+    'bot_dm_failed_total', 'DMs that failed to send', labels=('source', 'reason')))
+RATE_LIMIT_HITS = REGISTRY.register(Counter(
+    'bot_rate_limit_hits_total', 'Discord 429s (http: any retried request, global: global limit, dm: surfaced to the DM sender)',
+    labels=('scope',)))
+REMINDER_LATENESS = REGISTRY.register(Histogram(
+    'bot_reminder_lateness_seconds', 'Reminder DM send time minus its target time', labels=('kind',),
+    buckets=(0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, 60.0, 120.0, 300.0, 600.0)))
+MATCH_STORE_SIZE = REGISTRY.register(Gauge(
+    'bot_match_store_size', 'Matches held in the in-memory match store'))
+STORAGE_FLUSH = REGISTRY.register(Histogram(
+    'bot_storage_flush_seconds', 'Time spent flushing match state to storage', labels=('backend',)))
+SHARD_LATENCY = REGISTRY.register(Gauge(
+    'bot_shard_latency_seconds', 'Gateway heartbeat latency per shard', labels=('shard',)))
+SHARD_SCHEDULER_BACKLOG = REGISTRY.register(Gauge(
+    'bot_shard_scheduler_backlog', 'Reminder deadlines already due per shard', labels=('shard',)))
+SHARD_DM_QUEUED = REGISTRY.register(Gauge(
+    'bot_shard_dm_queued', 'DMs waiting in a fan-out send per shard', labels=('shard',)))
+
+def dm_failure_reason(error):
+    if isinstance(error, discord.Forbidden):
+        return 'forbidden'
+    if isinstance(error, discord.HTTPException):
+        if error.status == 429:
+            RATE_LIMIT_HITS.inc(scope='dm')
+        return str(error.status)
+    return type(error).__name__
+
+
+class RateLimitLogCounter(logging.Handler):
+    """Counts the 429 warnings discord.py logs while it transparently retries rate-limited requests"""
+
+    def __init__(self):
+        super().__init__(logging.WARNING)
+
+    def emit(self, record):
+        message = record.getMessage()
+        if message.startswith('We are being rate limited'):
+            RATE_LIMIT_HITS.inc(scope='http')
+        elif message.startswith('Global rate limit has been hit'):
+            RATE_LIMIT_HITS.inc(scope='global')
+
+
+class InstrumentedCommandTree(app_commands.CommandTree):
+    """Command tree that records per-command latency for every registered slash command"""
+
+    async def interaction_check(self, interaction):
+        interaction.extras['started_at'] = time.perf_counter()
+        return True
+
+    def observe(self, interaction, status):
+        started = interaction.extras.get('started_at')
+        command = interaction.command
+        if started is not None and command is not None:
+            COMMAND_LATENCY.observe(time.perf_counter() - started,
+                                    command=command.qualified_name, status=status)
+
+    async def on_error(self, interaction, error):
+        self.observe(interaction, 'error')
+        await super().on_error(interaction, error)
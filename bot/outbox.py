@@ -0,0 +1,202 @@
+import asyncio
+import logging
+import time
+from .journal import AppendLog
+from .utils import FILE_WRITER
+
+logger = logging.getLogger(__name__)
+
+class DMOutbox:
+    """Journaled DM outbox: one entry per (match_id, kind, user_id), retried until done"""
+
+    def __init__(self, file_path='data/dm_outbox.jsonl', max_attempts=5, base_delay=30,
+                 max_delay=900, compact_threshold=10000):
+        self.log = AppendLog(file_path)
+        self.max_attempts = max_attempts
+        self.base_delay = base_delay
+        self.max_delay = max_delay
+        self.compact_threshold = compact_threshold
+        self.pending = {}
+        # Delivered or dropped keys per match, kept so re-queued work is never re-sent
+        self.done = {}
+        self._buffer = []
+        self._inflight = set()
+        self._wakeup = asyncio.Event()
+        self._task = None
+
+    @staticmethod
+    def key(match_id, kind, user_id):
+        return f"{match_id}:{kind}:{user_id}"
+
+    def __len__(self):
+        return len(self.pending)
+
+    def is_done(self, key, match_id):
+        return key in self.done.get(match_id, ())
+
+    def load(self):
+        """Replay the journal so undelivered work resumes after a restart"""
+        for record in self.log.replay():
+            self._apply(record)
+        if self.pending:
+            logger.info(f"📬 Resuming {len(self.pending)} undelivered DMs from the outbox")
+
+    def _apply(self, record):
+        op = record['op']
+        key = record.get('key')
+        if op == 'enqueue':
+            if not self.is_done(key, record['match_id']):
+                self.pending[key] = {
+                    'key': key,
+                    'match_id': record['match_id'],
+                    'kind': record['kind'],
+                    'user_id': record['user_id'],
+                    'attempts': record.get('attempts', 0),
+                    'next_at': record.get('next_at', 0)
+                }
+        elif op == 'retry':
+            if key in self.pending:
+                self.pending[key]['attempts'] = record['attempts']
+                self.pending[key]['next_at'] = record['next_at']
+        elif op in ('done', 'drop'):
+            self.pending.pop(key, None)
+            self.done.setdefault(record['match_id'], set()).add(key)
+        elif op == 'forget':
+            match_id = record['match_id']
+            self.done.pop(match_id, None)
+            for k in [k for k, e in self.pending.items() if e['match_id'] == match_id]:
+                del self.pending[k]
+
+    def _record(self, record):
+        self._apply(record)
+        self._buffer.append(record)
+        if len(self._buffer) >= 100:
+            self._submit()
+
+    def _submit(self):
+        """Hand the buffered records to the writer thread as one group commit"""
+        records, self._buffer = self._buffer, []
+        future = FILE_WRITER.submit(self.log.append, records)
+        future.add_done_callback(self._commit_done)
+        return future
+
+    @staticmethod
+    def _commit_done(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error appending to the DM outbox journal: {future.exception()}")
+
+    async def commit(self):
+        """Group-commit buffered state changes to the journal without blocking the loop"""
+        if self._buffer:
+            await asyncio.wrap_future(self._submit())
+
+    async def enqueue(self, match_id, kind, user_ids):
+        """Journal a delivery per user (skipping ones already queued or done); returns how many were new"""
+        now = time.time()
+        records = []
+        for user_id in user_ids:
+            key = self.key(match_id, kind, user_id)
+            if key in self.pending or self.is_done(key, match_id):
+                continue
+            records.append({
+                'op': 'enqueue', 'key': key, 'match_id': match_id,
+                'kind': kind, 'user_id': user_id, 'next_at': now
+            })
+        for record in records:
+            self._apply(record)
+        self._buffer.extend(records)
+        # Enqueues are committed before returning so a crash right after cannot lose them
+        await self.commit()
+        if records:
+            self._wakeup.set()
+        return len(records)
+
+    def mark_done(self, entry):
+        self._record({'op': 'done', 'key': entry['key'], 'match_id': entry['match_id']})
+
+    def mark_failed(self, entry, permanent=False):
+        """Schedule a retry with exponential backoff, or drop the entry when out of attempts"""
+        attempts = entry['attempts'] + 1
+        if permanent or attempts >= self.max_attempts:
+            self._record({'op': 'drop', 'key': entry['key'], 'match_id': entry['match_id']})
+            return
+        delay = min(self.max_delay, self.base_delay * 2 ** (attempts - 1))
+        self._record({'op': 'retry', 'key': entry['key'], 'attempts': attempts, 'next_at': time.time() + delay})
+
+    def forget_match(self, match_id):
+        """Discard pending work and idempotency keys of a match that no longer exists"""
+        if match_id in self.done or any(e['match_id'] == match_id for e in self.pending.values()):
+            self._record({'op': 'forget', 'match_id': match_id})
+            self._submit()
+
+    def due_batches(self, now=None):
+        """Group due, not-in-flight entries by (match_id, kind)"""
+        now = time.time() if now is None else now
+        batches = {}
+        for key, entry in self.pending.items():
+            if entry['next_at'] <= now and key not in self._inflight:
+                batches.setdefault((entry['match_id'], entry['kind']), []).append(entry)
+        return batches
+
+    def next_retry_at(self):
+        waiting = [e['next_at'] for k, e in self.pending.items() if k not in self._inflight]
+        return min(waiting) if waiting else None
+
+    async def compact(self):
+        """Rewrite the journal as just the live state once it has grown large"""
+        live = len(self.pending) + sum(len(keys) for keys in self.done.values())
+        if self.log.records < self.compact_threshold or self.log.records < 2 * live:
+            return
+        # Pending appends are dropped from the buffer: the snapshot below already reflects them
+        self._buffer = []
+        records = [
+            {'op': 'done', 'key': key, 'match_id': match_id}
+            for match_id, keys in self.done.items() for key in keys
+        ]
+        records.extend({'op': 'enqueue', **entry} for entry in self.pending.values())
+        await FILE_WRITER.run(self.log.rewrite, records)
+        logger.info(f"🗜️ Compacted DM outbox journal to {len(records)} records")
+
+    async def _run_batch(self, deliver, match_id, kind, entries):
+        try:
+            await deliver(match_id, kind, entries)
+        except Exception as e:
+            logger.error(f"Error delivering outbox batch for match {match_id} ({kind}): {e}")
+            for entry in entries:
+                if entry['key'] in self.pending:
+                    self.mark_failed(entry)
+        finally:
+            for entry in entries:
+                self._inflight.discard(entry['key'])
+            await self.commit()
+            self._wakeup.set()
+
+    async def run(self, deliver):
+        """Deliver due entries via deliver(match_id, kind, entries), one task per batch"""
+        tasks = set()
+        while True:
+            for (match_id, kind), entries in self.due_batches().items():
+                self._inflight.update(e['key'] for e in entries)
+                task = asyncio.create_task(self._run_batch(deliver, match_id, kind, entries))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            await self.compact()
+
+            next_at = self.next_retry_at()
+            timeout = None if next_at is None else max(0.5, next_at - time.time())
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+            self._wakeup.clear()
+
+    def start(self, deliver):
+        if self._task is None or self._task.done():
+            self._task = asyncio.create_task(self.run(deliver))
+        return self._task
+
+    async def close(self):
+        if self._task and not self._task.done():
+            self._task.cancel()
+        await self.commit()
+        await FILE_WRITER.run(self.log.close)
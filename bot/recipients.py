@@ -0,0 +1,139 @@
+import logging
+import re
+
+logger = logging.getLogger(__name__)
+
+USER_MENTION_RE = re.compile(r'<@!?(\d+)>')
+ROLE_MENTION_RE = re.compile(r'<@&(\d+)>')
+
+def parse_mentions(team1, team2):
+    """Parse user and role mentions from team strings into de-duplicated id lists"""
+    text = f"{team1} {team2}"
+    user_ids = list(dict.fromkeys(int(uid) for uid in USER_MENTION_RE.findall(text)))
+    role_ids = list(dict.fromkeys(int(rid) for rid in ROLE_MENTION_RE.findall(text)))
+    return user_ids, role_ids
+
+
+class RecipientIndex:
+    """Resolved DM recipients per match; in chunked guilds kept current from member and role events"""
+
+    def __init__(self):
+        # match_id -> set of member ids to DM
+        self.recipients = {}
+        # (guild_id, role_id) / (guild_id, user_id) -> match ids mentioning it
+        self.role_matches = {}
+        self.user_matches = {}
+        self._matches = {}
+
+    def __contains__(self, match_id):
+        return match_id in self.recipients
+
+    def get(self, match_id):
+        return self.recipients.get(match_id, set())
+
+    def _register(self, match, guild):
+        match_id = match['id']
+        self.discard(match_id)
+        self._matches[match_id] = match
+        for user_id in match.get('user_ids', []):
+            self.user_matches.setdefault((guild.id, user_id), set()).add(match_id)
+        for role_id in match.get('role_ids', []):
+            self.role_matches.setdefault((guild.id, role_id), set()).add(match_id)
+
+    def build(self, match, guild):
+        """Resolve a match's recipients once from the guild cache"""
+        self._register(match, guild)
+
+        recipients = set()
+        for user_id in match.get('user_ids', []):
+            member = guild.get_member(user_id)
+            if member and not member.bot:  # Skip bots
+                recipients.add(member.id)
+
+        for role_id in match.get('role_ids', []):
+            role = guild.get_role(role_id)
+            if role:
+                recipients.update(m.id for m in role.members if not m.bot)
+
+        self.recipients[match['id']] = recipients
+        return recipients
+
+    async def build_async(self, match, guild, resolver):
+        """Resolve a match's recipients through a MemberResolver, for guilds that are not chunked"""
+        members, failed = await resolver.resolve(guild, match.get('user_ids', []))
+        recipients = {member.id for member in members.values() if not member.bot}
+        if failed:
+            # Mentioned explicitly, so DM them anyway: delivery goes by user id and a DM that
+            # cannot be delivered fails permanently in the outbox
+            logger.warning(f"Could not look up {len(failed)} mentioned members of match {match['id']}; queuing them unchecked")
+            recipients.update(failed)
+        roles = [role for role in map(guild.get_role, match.get('role_ids', [])) if role]
+        if roles:
+            recipients.update(await resolver.roles_member_ids(guild, roles))
+
+        # Registered after the awaits so a concurrent build cannot interleave with this one
+        self._register(match, guild)
+        self.recipients[match['id']] = recipients
+        return recipients
+
+    def discard(self, match_id):
+        """Forget a match and its reverse-index entries"""
+        match = self._matches.pop(match_id, None)
+        self.recipients.pop(match_id, None)
+        if match is None:
+            return
+        guild_id = match.get('guild_id')
+        for index, ids in ((self.user_matches, match.get('user_ids', [])), (self.role_matches, match.get('role_ids', []))):
+            for item_id in ids:
+                match_ids = index.get((guild_id, item_id))
+                if match_ids is not None:
+                    match_ids.discard(match_id)
+                    if not match_ids:
+                        del index[(guild_id, item_id)]
+
+    def _still_covered(self, match_id, member, role_ids):
+        match = self._matches[match_id]
+        if member.id in match.get('user_ids', []):
+            return True
+        return any(role_id in role_ids for role_id in match.get('role_ids', []))
+
+    def member_roles_changed(self, before, after):
+        """Apply role additions/removals from on_member_update"""
+        if after.bot:
+            return
+        guild_id = after.guild.id
+        before_roles = {r.id for r in before.roles}
+        after_roles = {r.id for r in after.roles}
+
+        for role_id in after_roles - before_roles:
+            for match_id in self.role_matches.get((guild_id, role_id), ()):
+                self.recipients[match_id].add(after.id)
+
+        for role_id in before_roles - after_roles:
+            for match_id in self.role_matches.get((guild_id, role_id), ()):
+                if not self._still_covered(match_id, after, after_roles):
+                    self.recipients[match_id].discard(after.id)
+
+    def member_joined(self, member):
+        if member.bot:
+            return
+        guild_id = member.guild.id
+        match_ids = set(self.user_matches.get((guild_id, member.id), ()))
+        for role in member.roles:
+            match_ids.update(self.role_matches.get((guild_id, role.id), ()))
+        for match_id in match_ids:
+            self.recipients[match_id].add(member.id)
+
+    def member_removed(self, member):
+        guild_id = member.guild.id
+        match_ids = set(self.user_matches.get((guild_id, member.id), ()))
+        for role in member.roles:
+            match_ids.update(self.role_matches.get((guild_id, role.id), ()))
+        for match_id in match_ids:
+            self.recipients[match_id].discard(member.id)
+
+    def role_deleted(self, role):
+        """Rebuild matches that mentioned a deleted role"""
+        for match_id in list(self.role_matches.get((role.guild.id, role.id), ())):
+            match = self._matches[match_id]
+            self.build(match, role.guild)
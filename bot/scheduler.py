@@ -0,0 +1,161 @@
+import asyncio
+import functools
+import heapq
+import logging
+import time
+from .sharding import shard_for
+
+logger = logging.getLogger(__name__)
+
+# Seconds relative to match start at which each deadline fires
+REMINDER_OFFSETS = {
+    '10min': -600,
+    '3min': -180,
+    'expire': 3600
+}
+
+class ReminderScheduler:
+    """Min-heap of (fire_at, match_id, kind) deadlines that sleeps until the next one is due"""
+
+    def __init__(self):
+        self._heap = []
+        # Live entries; heap items that no longer match are cancelled/rescheduled and skipped lazily
+        self._entries = {}
+        self._wakeup = asyncio.Event()
+
+    def __len__(self):
+        return len(self._entries)
+
+    def _is_live(self, item):
+        fire_at, match_id, kind = item
+        return self._entries.get((match_id, kind)) == fire_at
+
+    def schedule(self, match_id, kind, fire_at):
+        """Add or move a deadline; wakes the runner if it is now the earliest"""
+        self._entries[(match_id, kind)] = fire_at
+        heapq.heappush(self._heap, (fire_at, match_id, kind))
+        if self._heap[0][0] == fire_at:
+            self._wakeup.set()
+
+    def cancel(self, match_id, kind=None):
+        """Drop one deadline, or every deadline of a match when kind is None"""
+        kinds = [kind] if kind else list(REMINDER_OFFSETS)
+        for k in kinds:
+            self._entries.pop((match_id, k), None)
+
+    def _drop_stale_head(self):
+        while self._heap and not self._is_live(self._heap[0]):
+            heapq.heappop(self._heap)
+
+    def next_deadline(self):
+        """Timestamp of the earliest live deadline, or None"""
+        self._drop_stale_head()
+        return self._heap[0][0] if self._heap else None
+
+    def pop_due(self, now=None):
+        """Remove and return every live deadline with fire_at <= now, earliest first"""
+        now = time.time() if now is None else now
+        due = []
+        while self._heap and self._heap[0][0] <= now:
+            item = heapq.heappop(self._heap)
+            if self._is_live(item):
+                del self._entries[(item[1], item[2])]
+                due.append(item)
+        return due
+
+    def backlog(self, now=None):
+        """Number of live deadlines already due; walks only the due part of the heap"""
+        now = time.time() if now is None else now
+        count = 0
+        stack = [0] if self._heap else []
+        while stack:
+            i = stack.pop()
+            item = self._heap[i]
+            if item[0] > now:
+                continue
+            if self._is_live(item):
+                count += 1
+            stack.extend(c for c in (2 * i + 1, 2 * i + 2) if c < len(self._heap))
+        return count
+
+    async def run(self, callback):
+        """Sleep until the next deadline (or a new earlier one) and invoke callback when due"""
+        while True:
+            deadline = self.next_deadline()
+            timeout = None if deadline is None else max(0.0, deadline - time.time())
+            if timeout is None or timeout > 0:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout)
+                except asyncio.TimeoutError:
+                    pass
+            self._wakeup.clear()
+            try:
+                await callback()
+            except Exception as e:
+                logger.error(f"Error in reminder scheduler callback: {e}")
+
+
+class ShardedScheduler:
+    """One ReminderScheduler per shard this process runs, so each shard only fires its own guilds' deadlines"""
+
+    def __init__(self, shard_count=1, shard_ids=None):
+        self.configure(shard_count, shard_ids)
+
+    def configure(self, shard_count, shard_ids=None):
+        """(Re)partition; drops every deadline, so callers reschedule their matches afterwards"""
+        self.shard_count = shard_count
+        self.shards = {shard_id: ReminderScheduler() for shard_id in (shard_ids or range(shard_count))}
+        # match_id -> shard id, so cancel() does not need the match
+        self._shard_of = {}
+
+    @property
+    def layout(self):
+        return self.shard_count, sorted(self.shards)
+
+    def owns(self, guild_id):
+        return shard_for(guild_id, self.shard_count) in self.shards
+
+    def __len__(self):
+        return sum(len(s) for s in self.shards.values())
+
+    def schedule(self, match_id, kind, fire_at, guild_id=None):
+        """Queue a deadline on the guild's shard; returns False if another process owns that shard"""
+        shard_id = shard_for(guild_id, self.shard_count)
+        scheduler = self.shards.get(shard_id)
+        if scheduler is None:
+            return False
+        previous = self._shard_of.get(match_id)
+        if previous is not None and previous != shard_id:
+            self.shards[previous].cancel(match_id)
+        self._shard_of[match_id] = shard_id
+        scheduler.schedule(match_id, kind, fire_at)
+        return True
+
+    def cancel(self, match_id, kind=None):
+        shard_id = self._shard_of.get(match_id)
+        if shard_id is None:
+            return
+        self.shards[shard_id].cancel(match_id, kind)
+        if kind is None:
+            del self._shard_of[match_id]
+
+    def next_deadline(self):
+        deadlines = [d for d in (s.next_deadline() for s in self.shards.values()) if d is not None]
+        return min(deadlines) if deadlines else None
+
+    def pop_due(self, now=None):
+        return sorted(item for s in self.shards.values() for item in s.pop_due(now))
+
+    def backlog(self, now=None):
+        return sum(s.backlog(now) for s in self.shards.values())
+
+    def shard_stats(self, now=None):
+        """Per-shard deadline count and due backlog"""
+        return {
+            shard_id: {'deadlines': len(s), 'backlog': s.backlog(now)}
+            for shard_id, s in self.shards.items()
+        }
+
+    async def run(self, callback):
+        """Run every shard's scheduler; callback(scheduler=...) receives the shard whose deadline is due"""
+        await asyncio.gather(*(s.run(functools.partial(callback, scheduler=s)) for s in self.shards.values()))
@@ -0,0 +1,63 @@
+import logging
+import os
+
+logger = logging.getLogger(__name__)
+
+def shard_for(guild_id, shard_count):
+    """Shard that owns a guild, per Discord's sharding formula; guild-less matches go to shard 0"""
+    if guild_id is None or not shard_count:
+        return 0
+    return (guild_id >> 22) % shard_count
+
+def parse_shard_ids(value):
+    """Parse a shard list such as '0-3,6' into [0, 1, 2, 3, 6]"""
+    shard_ids = []
+    for part in value.split(','):
+        part = part.strip()
+        if not part:
+            continue
+        if '-' in part:
+            first, last = part.split('-', 1)
+            shard_ids.extend(range(int(first), int(last) + 1))
+        else:
+            shard_ids.append(int(part))
+    return sorted(set(shard_ids))
+
+def shard_options():
+    """AutoShardedBot kwargs from BOT_SHARDING / BOT_SHARD_COUNT / BOT_SHARD_IDS, or None when unsharded.
+
+    BOT_SHARDING=auto lets Discord pick the shard count; BOT_SHARD_COUNT fixes it and
+    BOT_SHARD_IDS (e.g. '0-3') limits this process to a range of those shards.
+    """
+    count = os.getenv('BOT_SHARD_COUNT')
+    ids = os.getenv('BOT_SHARD_IDS')
+    if count:
+        options = {'shard_count': int(count)}
+        if ids:
+            options['shard_ids'] = parse_shard_ids(ids)
+            invalid = [i for i in options['shard_ids'] if i >= options['shard_count']]
+            if invalid:
+                raise ValueError(f"BOT_SHARD_IDS {invalid} out of range for BOT_SHARD_COUNT={count}")
+        return options
+    if ids:
+        logger.warning("BOT_SHARD_IDS is ignored without BOT_SHARD_COUNT")
+    if os.getenv('BOT_SHARDING', '').lower() == 'auto':
+        return {}
+    return None
+
+def shard_scope(options):
+    """Suffix naming this process's shard range, e.g. '-0.1.2.3', or '' when it runs every shard.
+
+    Per-process state (lease names, the DM outbox journal) is keyed by it, so processes running
+    different ranges never share those files.
+    """
+    shard_ids = (options or {}).get('shard_ids')
+    if not shard_ids or len(shard_ids) == options.get('shard_count'):
+        return ''
+    return '-' + '.'.join(map(str, shard_ids))
+
+def shard_layout(bot):
+    """(shard_count, shard_ids) this process handles; (1, [0]) for an unsharded bot"""
+    shard_count = getattr(bot, 'shard_count', None) or 1
+    shard_ids = getattr(bot, 'shard_ids', None)
+    return shard_count, sorted(shard_ids) if shard_ids else list(range(shard_count))
@@ -0,0 +1,372 @@
+import copy
+import json
+import logging
+import os
+import sqlite3
+import time
+from datetime import datetime
+from .utils import load_data, save_data, save_data_atomic, FILE_WRITER
+from .journal import AppendLog
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_SETTINGS = {
+    'allowed_channels': [],
+    'log_channel': None,
+    'admin_roles': []
+}
+
+def match_timestamp(match):
+    """Return the match start time as a POSIX timestamp"""
+    return datetime.fromisoformat(match['time']).timestamp()
+
+def dedupe_match_ids(matches):
+    """Renumber duplicate legacy ids (old ids were len+1 and could collide); returns True if any changed"""
+    seen = set()
+    next_id = max((m.get('id', 0) for m in matches), default=0) + 1
+    changed = False
+    for match in matches:
+        if match.get('id') in seen:
+            match['id'] = next_id
+            next_id += 1
+            changed = True
+        seen.add(match['id'])
+    return changed
+
+
+class StorageBackend:
+    """Async entry points shared by all backends; blocking work runs on the single writer thread"""
+
+    # Whether several bot processes can safely share this backend
+    shared = False
+
+    def change_seq(self):
+        """Position in the backend's match changelog, or None if it keeps none"""
+        return None
+
+    def changes_since(self, seq):
+        """(latest seq, changed matches, deleted ids) since `seq`; changed is None to request a full reload"""
+        return None, None, None
+
+    async def write_matches_async(self, matches, changed=None, deleted_ids=None):
+        # Never coalesced: each call carries its own upsert/delete delta
+        await FILE_WRITER.run(self.write_matches, matches, changed, deleted_ids)
+
+    async def save_settings_async(self, settings):
+        # Snapshot on the loop so commands can keep editing settings while the write is queued;
+        # back-to-back saves coalesce into a single write of the latest snapshot
+        await FILE_WRITER.run(self.save_settings, copy.deepcopy(settings), key=('settings', id(self)))
+
+    async def set_meta_async(self, key, value):
+        await FILE_WRITER.run(self.set_meta, key, value, key=('meta', id(self), key))
+
+
+class JSONStorage(StorageBackend):
+    """Storage backend keeping matches and settings in plain JSON files"""
+
+    name = 'json'
+
+    def __init__(self, matches_path='data/matches.json', settings_path='data/settings.json', meta_path='data/meta.json'):
+        self.matches_path = matches_path
+        self.settings_path = settings_path
+        self.meta_path = meta_path
+        self._matches = []
+        self._meta = None
+
+    def load_matches(self):
+        data = load_data(self.matches_path, [])
+        self._matches = data if isinstance(data, list) else []
+        return list(self._matches)
+
+    def write_matches(self, matches, changed=None, deleted_ids=None):
+        """Persist matches; JSON has no partial updates so the file is rewritten"""
+        self._matches = list(matches)
+        save_data_atomic(self.matches_path, self._matches)
+
+    def load_settings(self, default=None):
+        return load_data(self.settings_path, dict(default if default is not None else DEFAULT_SETTINGS))
+
+    def save_settings(self, settings):
+        save_data(self.settings_path, settings)
+
+    def get_meta(self, key, default=None):
+        if self._meta is None:
+            data = load_data(self.meta_path, {})
+            self._meta = data if isinstance(data, dict) else {}
+        return self._meta.get(key, default)
+
+    def set_meta(self, key, value):
+        self.get_meta(key)
+        self._meta[key] = value
+        save_data_atomic(self.meta_path, self._meta)
+
+    def close(self):
+        pass
+
+
+class JournalStorage(JSONStorage):
+    """JSON snapshot plus an append-only log of match upserts/deletes.
+
+    Each flush appends one record per changed or deleted match in a single group commit,
+    so write cost follows the number of mutations rather than the store size. Once the log
+    outgrows the snapshot it is compacted: the snapshot is rewritten atomically, then the
+    log is truncated. Startup replays the log over the snapshot; both steps are idempotent.
+    """
+
+    name = 'journal'
+
+    def __init__(self, matches_path='data/matches.json', journal_path='data/matches.journal.jsonl',
+                 settings_path='data/settings.json', compact_threshold=1000):
+        super().__init__(matches_path, settings_path)
+        self.log = AppendLog(journal_path)
+        self.compact_threshold = compact_threshold
+
+    def load_matches(self):
+        data = load_data(self.matches_path, [])
+        matches = {m['id']: m for m in data} if isinstance(data, list) else {}
+        for record in self.log.replay():
+            if record['op'] == 'put':
+                matches[record['match']['id']] = record['match']
+            elif record['op'] == 'del':
+                matches.pop(record['id'], None)
+        if self.log.records:
+            logger.info(f"📜 Replayed {self.log.records} match journal records")
+        self._matches = list(matches.values())
+        return list(self._matches)
+
+    def write_matches(self, matches, changed=None, deleted_ids=None):
+        """Append the delta to the journal, or snapshot everything if no delta is given"""
+        self._matches = list(matches)
+        if changed is None and deleted_ids is None:
+            self.compact()
+            return
+        records = [{'op': 'del', 'id': match_id} for match_id in deleted_ids or ()]
+        records.extend({'op': 'put', 'match': match} for match in changed or ())
+        self.log.append(records)
+        if self.log.records >= self.compact_threshold and self.log.records > len(self._matches):
+            self.compact()
+
+    def compact(self):
+        """Snapshot the current matches and truncate the journal"""
+        save_data_atomic(self.matches_path, self._matches)
+        self.log.truncate()
+
+    def close(self):
+        if self.log.records:
+            self.compact()
+        self.log.close()
+
+
+class SQLiteStorage(StorageBackend):
+    """Storage backend on SQLite (WAL mode); matches are read in full at startup and on sync"""
+
+    name = 'sqlite'
+    shared = True
+
+    SCHEMA = """
+        CREATE TABLE IF NOT EXISTS matches (
+            id INTEGER PRIMARY KEY,
+            start_ts REAL NOT NULL,
+            guild_id INTEGER,
+            creator INTEGER,
+            data TEXT NOT NULL
+        );
+        -- Nothing queries by these any more; each one only slowed down every write
+        DROP INDEX IF EXISTS idx_matches_start;
+        DROP INDEX IF EXISTS idx_matches_guild;
+        DROP INDEX IF EXISTS idx_matches_creator;
+        DROP INDEX IF EXISTS idx_matches_reminders;
+        CREATE TABLE IF NOT EXISTS settings (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS meta (
+            key TEXT PRIMARY KEY,
+            value TEXT NOT NULL
+        );
+        CREATE TABLE IF NOT EXISTS match_changes (
+            seq INTEGER PRIMARY KEY AUTOINCREMENT,
+            match_id INTEGER,
+            at REAL NOT NULL
+        );
+    """
+
+    # Changelog rows older than this are pruned; a process lagging further behind reloads everything
+    CHANGELOG_TTL = 3600
+
+    def __init__(self, db_path='data/bot.db'):
+        self.db_path = db_path
+        os.makedirs(os.path.dirname(db_path) or '.', exist_ok=True)
+        self.conn = sqlite3.connect(db_path, check_same_thread=False)
+        self.conn.execute('PRAGMA journal_mode=WAL')
+        self.conn.execute('PRAGMA synchronous=NORMAL')
+        self.conn.executescript(self.SCHEMA)
+        self._drop_legacy_columns()
+        self.conn.commit()
+
+    def _drop_legacy_columns(self):
+        """Drop the reminder_state column of databases created before it was removed"""
+        columns = {row[1] for row in self.conn.execute('PRAGMA table_info(matches)')}
+        if 'reminder_state' not in columns:
+            return
+        try:
+            self.conn.execute('ALTER TABLE matches DROP COLUMN reminder_state')
+        except sqlite3.OperationalError as e:
+            # SQLite before 3.35 cannot drop columns; the column then just keeps its default
+            logger.info(f"Keeping legacy reminder_state column: {e}")
+
+    def _row(self, match):
+        return (
+            match['id'],
+            match_timestamp(match),
+            match.get('guild_id'),
+            match.get('creator'),
+            json.dumps(match, ensure_ascii=False, separators=(',', ':'))
+        )
+
+    def _select(self, where='', params=()):
+        cursor = self.conn.execute(f'SELECT data FROM matches {where} ORDER BY start_ts, id', params)
+        return [json.loads(row[0]) for row in cursor]
+
+    def load_matches(self):
+        return self._select()
+
+    def write_matches(self, matches, changed=None, deleted_ids=None):
+        """Apply upserts/deletes in one transaction, or replace everything if no delta is given.
+
+        Every write is recorded in the match_changes log (a NULL match_id marks a full rewrite),
+        so other processes can sync just the rows that changed.
+        """
+        now = time.time()
+        with self.conn:
+            if changed is None and deleted_ids is None:
+                self.conn.execute('DELETE FROM matches')
+                self.conn.execute('INSERT INTO match_changes (match_id, at) VALUES (NULL, ?)', (now,))
+                changed = matches
+            else:
+                touched = set(deleted_ids or ()) | {m['id'] for m in changed or ()}
+                self.conn.executemany('INSERT INTO match_changes (match_id, at) VALUES (?, ?)',
+                                      [(i, now) for i in touched])
+            if deleted_ids:
+                self.conn.executemany('DELETE FROM matches WHERE id = ?', [(i,) for i in deleted_ids])
+            if changed:
+                self.conn.executemany(
+                    'INSERT OR REPLACE INTO matches (id, start_ts, guild_id, creator, data) '
+                    'VALUES (?, ?, ?, ?, ?)',
+                    [self._row(m) for m in changed]
+                )
+            self.conn.execute('DELETE FROM match_changes WHERE at < ?', (now - self.CHANGELOG_TTL,))
+
+    def change_seq(self):
+        """Current position of the match_changes log"""
+        row = self.conn.execute("SELECT seq FROM sqlite_sequence WHERE name = 'match_changes'").fetchone()
+        return row[0] if row else 0
+
+    def changes_since(self, seq):
+        """Matches written and ids deleted after changelog position `seq`.
+
+        Returns (latest seq, changed matches, deleted ids); changed is None when the log cannot
+        cover the gap (pruned, or a full rewrite happened) and the caller must reload everything.
+        """
+        # One read transaction, so the rows are consistent with the position returned
+        self.conn.execute('BEGIN')
+        try:
+            latest = self.change_seq()
+            if seq >= latest:
+                return latest, [], set()
+            oldest = self.conn.execute('SELECT MIN(seq) FROM match_changes').fetchone()[0]
+            if oldest is None or seq < oldest - 1:
+                return latest, None, None
+            ids = [r[0] for r in self.conn.execute('SELECT DISTINCT match_id FROM match_changes WHERE seq > ?', (seq,))]
+            if None in ids:
+                return latest, None, None
+            changed = []
+            for i in range(0, len(ids), 500):
+                chunk = ids[i:i + 500]
+                cursor = self.conn.execute(f"SELECT data FROM matches WHERE id IN ({','.join('?' * len(chunk))})", chunk)
+                changed += [json.loads(row[0]) for row in cursor]
+            return latest, changed, set(ids) - {m['id'] for m in changed}
+        finally:
+            self.conn.commit()
+
+    def load_settings(self, default=None):
+        settings = dict(default if default is not None else DEFAULT_SETTINGS)
+        for key, value in self.conn.execute('SELECT key, value FROM settings'):
+            settings[key] = json.loads(value)
+        return settings
+
+    def save_settings(self, settings):
+        with self.conn:
+            self.conn.executemany(
+                'INSERT OR REPLACE INTO settings (key, value) VALUES (?, ?)',
+                [(key, json.dumps(value, ensure_ascii=False)) for key, value in settings.items()]
+            )
+
+    def get_meta(self, key, default=None):
+        row = self.conn.execute('SELECT value FROM meta WHERE key = ?', (key,)).fetchone()
+        return json.loads(row[0]) if row else default
+
+    def set_meta(self, key, value):
+        with self.conn:
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)', (key, json.dumps(value)))
+
+    def reserve_ids(self, count=1, floor=1):
+        """Atomically reserve match ids across every process sharing this database; returns the first"""
+        self.conn.execute('BEGIN IMMEDIATE')
+        try:
+            row = self.conn.execute("SELECT value FROM meta WHERE key = 'next_match_id'").fetchone()
+            highest = self.conn.execute('SELECT MAX(id) FROM matches').fetchone()[0] or 0
+            first = max(json.loads(row[0]) if row else 1, highest + 1, floor)
+            self.conn.execute('INSERT OR REPLACE INTO meta (key, value) VALUES (?, ?)',
+                              ('next_match_id', json.dumps(first + count)))
+            self.conn.commit()
+        except Exception:
+            self.conn.rollback()
+            raise
+        return first
+
+    def data_version(self):
+        """Changes whenever another connection commits to the database"""
+        return self.conn.execute('PRAGMA data_version').fetchone()[0]
+
+    def close(self):
+        self.conn.close()
+
+
+def migrate_json_to_sqlite(storage, matches_path='data/matches.json', settings_path='data/settings.json'):
+    """One-time import of the legacy JSON files into a SQLite backend"""
+    if storage.get_meta('migrated_from_json'):
+        return False
+
+    imported_matches = 0
+    if os.path.exists(matches_path):
+        matches = load_data(matches_path, [])
+        if isinstance(matches, list) and matches:
+            dedupe_match_ids(matches)
+            storage.write_matches(matches, changed=matches)
+            imported_matches = len(matches)
+
+    if os.path.exists(settings_path):
+        settings = load_data(settings_path, {})
+        if settings:
+            storage.save_settings(settings)
+
+    storage.set_meta('migrated_from_json', datetime.utcnow().isoformat())
+    logger.info(f"📦 Migrated {imported_matches} matches and settings from JSON into {storage.db_path}")
+    return True
+
+def open_storage(backend=None, db_path=None):
+    """Open the storage backend selected by BOT_STORAGE (json, journal or sqlite)"""
+    backend = (backend or os.getenv('BOT_STORAGE', 'json')).lower()
+
+    if backend == 'sqlite':
+        storage = SQLiteStorage(db_path or os.getenv('BOT_DB_PATH', 'data/bot.db'))
+        migrate_json_to_sqlite(storage)
+        return storage
+
+    if backend == 'journal':
+        return JournalStorage()
+
+    if backend != 'json':
+        logger.warning(f"Unknown storage backend '{backend}', falling back to JSON")
+    return JSONStorage()
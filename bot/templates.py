@@ -0,0 +1,114 @@
+import hashlib
+import logging
+import time
+from collections import OrderedDict
+import discord
+from .utils import load_data, load_data_async, save_data_atomic, FILE_WRITER
+
+logger = logging.getLogger(__name__)
+
+class TemplateCache:
+    """Persisted store of DM message templates referenced by button custom_ids.
+
+    A template is kept for `max_age` seconds after it was last sent (7 days by default), so
+    translate buttons keep working across restarts for that long and then answer that the
+    message can no longer be translated. Each match sends up to three templates (creation
+    and two reminders); `max_templates` only caps memory and disk if far more than
+    max_templates / 3 matches are created within `max_age`.
+    """
+
+    def __init__(self, file_path='data/message_templates.json', max_age=7 * 24 * 3600, max_templates=50000):
+        self.file_path = file_path
+        self.max_age = max_age
+        self.max_templates = max_templates
+        self.templates = None
+
+    def _load(self, data=None):
+        if self.templates is None:
+            if data is None:
+                data = load_data(self.file_path, {})
+            self.templates = OrderedDict(data if isinstance(data, dict) else {})
+            # Templates saved before sent_at existed start their max_age now
+            now = time.time()
+            for template in self.templates.values():
+                template.setdefault('sent_at', now)
+            self._evict(now)
+
+    def _evict(self, now):
+        """Drop templates past max_age (the oldest are first) and any beyond max_templates"""
+        while self.templates:
+            key, template = next(iter(self.templates.items()))
+            if len(self.templates) <= self.max_templates and now - template['sent_at'] < self.max_age:
+                break
+            del self.templates[key]
+
+    async def preload(self):
+        """Read the template file on the writer thread so the first button click never blocks the loop"""
+        if self.templates is None:
+            data = await load_data_async(self.file_path, {})
+            self._load(data)
+
+    @staticmethod
+    def make_key(title, text, language):
+        digest = hashlib.sha1(f"{language}\x00{title}\x00{text}".encode('utf-8')).hexdigest()
+        return digest[:16]
+
+    def register(self, embed, text, language):
+        """Store the template for an embed once and return its key"""
+        self._load()
+        now = time.time()
+        key = self.make_key(embed.title or '', text, language)
+        if key in self.templates:
+            # Sent again: its buttons get a fresh max_age (persisted with the next new template)
+            self.templates[key]['sent_at'] = now
+            self.templates.move_to_end(key)
+            return key
+        self.templates[key] = {
+            'title': embed.title,
+            'text': text,
+            'language': language,
+            'color': embed.color.value if embed.color else None,
+            'footer': embed.footer.text if embed.footer else None,
+            'timestamp': embed.timestamp.isoformat() if embed.timestamp else None,
+            'sent_at': now
+        }
+        self._evict(now)
+        # Fire-and-forget on the writer thread; a burst of new templates coalesces into one write
+        future = FILE_WRITER.submit(save_data_atomic, self.file_path, dict(self.templates), key=('templates', self.file_path))
+        future.add_done_callback(self._save_done)
+        return key
+
+    @staticmethod
+    def _save_done(future):
+        if not future.cancelled() and future.exception() is not None:
+            logger.error(f"Error saving message templates: {future.exception()}")
+
+    def get(self, key):
+        """The template for a key, or None once it is older than max_age (it is dropped then)"""
+        self._load()
+        template = self.templates.get(key)
+        if template is not None and time.time() - template['sent_at'] >= self.max_age:
+            # Dropped from memory only; the file loses it with the next save
+            del self.templates[key]
+            return None
+        return template
+
+    def render(self, key, description=None, footer=None):
+        """Build an embed from a stored template, optionally overriding description/footer"""
+        template = self.get(key)
+        if template is None:
+            return None
+        embed = discord.Embed(
+            title=template['title'],
+            description=description if description is not None else template['text'],
+            color=template['color']
+        )
+        if template['timestamp']:
+            embed.timestamp = discord.utils.parse_time(template['timestamp'])
+        footer_text = footer if footer is not None else template['footer']
+        if footer_text:
+            embed.set_footer(text=footer_text)
+        return embed
+
+
+TEMPLATES = TemplateCache()
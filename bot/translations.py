@@ -1,5 +1,12 @@
 # Simple translation system
 # In a production environment, you would use a proper translation service
+import json
+import logging
+import os
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
 
 TRANSLATIONS = {
     'pt': {
@@ -57,50 +64,81 @@ def detect_language(text):
     else:
         return 'en'  # Default to English
 
-def get_translation(text, target_language):
-    """Simple translation function - in production use a real translation service"""
-    
-    # Basic translation mappings
-    translations = {
-        'pt': {
-            'New Match!': 'Nova Partida!',
-            'Teams:': 'Equipes:',
-            'Time:': 'Horário:',
-            'A new match has been created and you were mentioned!': 'Uma nova partida foi criada e você foi mencionado!',
-            'Match Reminder!': 'Lembrete de Partida!',
-            'The match will start in': 'A partida começará em',
-            'minutes': 'minutos',
-            'Message from Server Admin': 'Mensagem do Administrador do Servidor'
-        },
-        'es': {
-            'New Match!': '¡Nuevo Partido!',
-            'Teams:': 'Equipos:',
-            'Time:': 'Hora:',
-            'A new match has been created and you were mentioned!': '¡Se ha creado un nuevo partido y has sido mencionado!',
-            'Match Reminder!': '¡Recordatorio de Partido!',
-            'The match will start in': 'El partido comenzará en',
-            'minutes': 'minutos',
-            'Message from Server Admin': 'Mensaje del Administrador del Servidor'
-        },
-        'ar': {
-            'New Match!': 'مباراة جديدة!',
-            'Teams:': 'الفرق:',
-            'Time:': 'الوقت:',
-            'A new match has been created and you were mentioned!': 'تم إنشاء مباراة جديدة وتم ذكرك فيها!',
-            'Match Reminder!': 'تذكير بالمباراة!',
-            'The match will start in': 'ستبدأ المباراة خلال',
-            'minutes': 'دقائق',
-            'Message from Server Admin': 'رسالة من مدير السيرفر'
-        },
-        'en': {}  # English is the base language
-    }
+# Phrase tables for get_translation (English is the base language).
+# Extra or overriding tables can be dropped into data/translations/<language>.json
+PHRASES = {
+    'pt': {
+        'New Match!': 'Nova Partida!',
+        'Teams:': 'Equipes:',
+        'Time:': 'Horário:',
+        'A new match has been created and you were mentioned!': 'Uma nova partida foi criada e você foi mencionado!',
+        'Match Reminder!': 'Lembrete de Partida!',
+        'The match will start in': 'A partida começará em',
+        'minutes': 'minutos',
+        'Message from Server Admin': 'Mensagem do Administrador do Servidor'
+    },
+    'es': {
+        'New Match!': '¡Nuevo Partido!',
+        'Teams:': 'Equipos:',
+        'Time:': 'Hora:',
+        'A new match has been created and you were mentioned!': '¡Se ha creado un nuevo partido y has sido mencionado!',
+        'Match Reminder!': '¡Recordatorio de Partido!',
+        'The match will start in': 'El partido comenzará en',
+        'minutes': 'minutos',
+        'Message from Server Admin': 'Mensaje del Administrador del Servidor'
+    },
+    'ar': {
+        'New Match!': 'مباراة جديدة!',
+        'Teams:': 'الفرق:',
+        'Time:': 'الوقت:',
+        'A new match has been created and you were mentioned!': 'تم إنشاء مباراة جديدة وتم ذكرك فيها!',
+        'Match Reminder!': 'تذكير بالمباراة!',
+        'The match will start in': 'ستبدأ المباراة خلال',
+        'minutes': 'دقائق',
+        'Message from Server Admin': 'رسالة من مدير السيرفر'
+    },
+    'en': {}
+}
+
+_compiled = {}
+
+def _compile(language):
+    """Compile a phrase table into one longest-match-first regex alternation"""
+    table = PHRASES.get(language)
+    if not table:
+        return None
+    phrases = sorted(table, key=len, reverse=True)
+    return re.compile('|'.join(re.escape(p) for p in phrases)), table
+
+def load_phrase_tables(directory='data/translations'):
+    """Merge <language>.json phrase tables from a directory and recompile the matchers"""
+    if os.path.isdir(directory):
+        for filename in sorted(os.listdir(directory)):
+            if not filename.endswith('.json'):
+                continue
+            language = filename[:-len('.json')]
+            try:
+                with open(os.path.join(directory, filename), 'r', encoding='utf-8') as f:
+                    PHRASES.setdefault(language, {}).update(json.load(f))
+            except Exception as e:
+                logger.error(f"Error loading phrase table {filename}: {e}")
     
-    if target_language not in translations:
+    _compiled.clear()
+    for language in PHRASES:
+        _compiled[language] = _compile(language)
+    _translate.cache_clear()
+
+@lru_cache(maxsize=4096)
+def _translate(text, target_language):
+    compiled = _compiled.get(target_language)
+    if compiled is None:
         return text
-    
-    # Simple word replacement
-    translated = text
-    for english, translation in translations[target_language].items():
-        translated = translated.replace(english, translation)
-    
-    return translated
+    pattern, table = compiled
+    # Single pass: each position is replaced at most once, longest phrase first
+    return pattern.sub(lambda m: table[m.group(0)], text)
+
+def get_translation(text, target_language):
+    """Translate known phrases in text; cached per (text, language)"""
+    return _translate(text, target_language)
+
+load_phrase_tables()
@@ -1,8 +1,15 @@
+import asyncio
 import json
+import logging
 import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
 import discord
 from datetime import datetime
 
+logger = logging.getLogger(__name__)
+
 def load_data(file_path, default=None):
     """Load data from JSON file, create if doesn't exist"""
     try:
@@ -19,7 +26,7 @@ def load_data(file_path, default=None):
                 return default
             return {}
     except Exception as e:
-        print(f"Error loading {file_path}: {e}")
+        logger.error(f"Error loading {file_path}: {e}")
         return default if default is not None else {}
 
 def save_data(file_path, data):
@@ -31,7 +38,68 @@ def save_data(file_path, data):
         with open(file_path, 'w', encoding='utf-8') as f:
             json.dump(data, f, indent=2, ensure_ascii=False)
     except Exception as e:
-        print(f"Error saving {file_path}: {e}")
+        logger.error(f"Error saving {file_path}: {e}")
+
+def save_data_atomic(file_path, data, indent=None):
+    """Save data to JSON file via a temp file and rename so readers never see a partial write"""
+    directory = os.path.dirname(file_path) or '.'
+    os.makedirs(directory, exist_ok=True)
+    
+    fd, temp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w', encoding='utf-8') as f:
+            # One-shot dumps uses the C encoder, which also snapshots each dict while serializing
+            f.write(json.dumps(data, indent=indent, ensure_ascii=False, separators=None if indent else (',', ':')))
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(temp_path, file_path)
+    except Exception:
+        if os.path.exists(temp_path):
+            os.remove(temp_path)
+        raise
+
+class FileWriter:
+    """Dedicated single writer thread for storage I/O.
+
+    Jobs run in submission order; a job still waiting in the queue is replaced (coalesced)
+    by a newer submission with the same key, keeping its place in the order.
+    """
+
+    def __init__(self):
+        self._executor = ThreadPoolExecutor(max_workers=1, thread_name_prefix='file-writer')
+        self._lock = threading.Lock()
+        self._queued = {}
+
+    def submit(self, fn, *args, key=None):
+        """Queue fn(*args) on the writer thread and return a concurrent Future"""
+        with self._lock:
+            if key is not None and key in self._queued:
+                job = self._queued[key]
+                job['fn'], job['args'] = fn, args
+                return job['future']
+            job = {'fn': fn, 'args': args, 'key': key}
+            job['future'] = self._executor.submit(self._run, job)
+            if key is not None:
+                self._queued[key] = job
+            return job['future']
+
+    def _run(self, job):
+        with self._lock:
+            if job['key'] is not None and self._queued.get(job['key']) is job:
+                del self._queued[job['key']]
+            fn, args = job['fn'], job['args']
+        return fn(*args)
+
+    async def run(self, fn, *args, key=None):
+        """Run fn(*args) on the writer thread without blocking the event loop"""
+        return await asyncio.wrap_future(self.submit(fn, *args, key=key))
+
+
+FILE_WRITER = FileWriter()
+
+async def load_data_async(file_path, default=None):
+    """load_data on the writer thread, ordered after any queued writes"""
+    return await FILE_WRITER.run(load_data, file_path, default)
 
 async def has_admin_permission(user, settings):
     """Check if user has admin permissions"""
@@ -1,80 +1,202 @@
-from flask import Flask, jsonify
-from threading import Thread
-import time
-import requests
+import asyncio
+import math
 import os
+import time
 import logging
+from aiohttp import web, ClientSession, ClientTimeout
+from bot.metrics import REGISTRY
 
 # Configure logging
 logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
-app = Flask(__name__)
-
-@app.route('/')
-def home():
-    return jsonify({
-        "status": "✅ Bot is running!",
-        "message": "Discord Bot Keep-Alive Server",
-        "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
-    })
-
-@app.route('/health')
-def health():
-    return jsonify({
-        "status": "healthy",
-        "uptime": time.time(),
-        "bot_status": "running"
-    })
-
-@app.route('/ping')
-def ping():
-    return jsonify({"response": "pong", "timestamp": time.time()})
-
-def run_flask():
-    """Run Flask server"""
-    app.run(host='0.0.0.0', port=5000, debug=False, use_reloader=False)
-
-def keep_alive():
-    """Keep the bot alive by running Flask server"""
-    logger.info("🔥 Starting Keep-Alive Flask server...")
-    t = Thread(target=run_flask)
-    t.daemon = True
-    t.start()
-    logger.info("🚀 Keep-Alive server started on port 5000!")
-
-def self_ping():
+START_TIME = time.time()
+
+# Readiness thresholds
+MAX_LATENCY_SECONDS = 5.0
+MAX_LOOP_LAG_SECONDS = 1.0
+MAX_SCHEDULER_BACKLOG = 100
+
+def latency_is_ok(latency):
+    return not math.isnan(latency) and not math.isinf(latency) and latency < MAX_LATENCY_SECONDS
+
+def shard_report(bot):
+    """Latency, scheduler backlog and DM fan-out load per shard, or None for an unsharded bot"""
+    latencies = getattr(bot, 'latencies', None)
+    if latencies is None:
+        return None
+    manager = getattr(bot, 'match_manager', None)
+    scheduler_stats = manager.scheduler.shard_stats() if manager is not None else {}
+    fanout_stats = bot.dm_sender.shard_stats() if getattr(bot, 'dm_sender', None) is not None else {}
+    report = {}
+    for shard_id, latency in latencies:
+        ok = latency_is_ok(latency)
+        report[str(shard_id)] = {
+            "latency_ms": round(latency * 1000, 2) if ok else None,
+            "latency_ok": ok,
+            **scheduler_stats.get(shard_id, {'deadlines': 0, 'backlog': 0}),
+            **{f"dm_{k}": v for k, v in fanout_stats.get(shard_id, {'queued': 0, 'in_flight': 0}).items()}
+        }
+    return report
+
+async def measure_loop_lag():
+    """Time how long a freshly scheduled callback waits for the event loop"""
+    loop = asyncio.get_running_loop()
+    started = loop.time()
+    await asyncio.sleep(0)
+    return loop.time() - started
+
+class KeepAliveServer:
+    """Async keep-alive and health HTTP server running on the bot's own event loop"""
+
+    def __init__(self, bot=None, host='0.0.0.0', port=5000):
+        self.bot = bot
+        self.host = host
+        self.port = port
+        self.app = web.Application()
+        self.app.router.add_get('/', self.home)
+        self.app.router.add_get('/health', self.health)
+        self.app.router.add_get('/ping', self.ping)
+        self.app.router.add_get('/metrics', self.metrics)
+        self.app.router.add_get('/shards', self.shards)
+        self.runner = None
+
+    async def home(self, request):
+        return web.json_response({
+            "status": "✅ Bot is running!",
+            "message": "Discord Bot Keep-Alive Server",
+            "timestamp": time.strftime("%Y-%m-%d %H:%M:%S")
+        })
+
+    async def ping(self, request):
+        return web.json_response({"response": "pong", "timestamp": time.time()})
+
+    async def metrics(self, request):
+        """Prometheus text exposition of the bot's metrics registry"""
+        # The exposition format version goes in the content type itself, as scrapers expect
+        return web.Response(body=REGISTRY.render().encode('utf-8'),
+                            headers={'Content-Type': 'text/plain; version=0.0.4; charset=utf-8'})
+
+    async def readiness(self):
+        """Collect readiness checks for the gateway, latency, loop lag and scheduler backlog"""
+        monitor = getattr(self.bot, 'loop_monitor', None)
+        if monitor is not None:
+            # Judge the loop on its recent p99 lag rather than a single probe
+            lag = monitor.percentiles()
+            loop_lag = lag['p99']
+            checks = {
+                "loop_lag_p50_ms": round(lag['p50'] * 1000, 2),
+                "loop_lag_p99_ms": round(lag['p99'] * 1000, 2),
+                "loop_lag_max_ms": round(lag['max'] * 1000, 2),
+                "slow_callbacks": len(monitor.slow_events)
+            }
+        else:
+            loop_lag = await measure_loop_lag()
+            checks = {"loop_lag_ms": round(loop_lag * 1000, 2)}
+        checks["loop_ok"] = loop_lag < MAX_LOOP_LAG_SECONDS
+
+        bot = self.bot
+        if bot is None:
+            return checks, checks["loop_ok"]
+
+        connected = bot.is_ready() and not bot.is_closed()
+        latency = bot.latency
+        latency_ok = connected and latency_is_ok(latency)
+        checks.update({
+            "gateway_connected": connected,
+            "latency_ms": round(latency * 1000, 2) if latency_ok else None,
+            "latency_ok": latency_ok
+        })
+
+        shards = shard_report(bot)
+        if shards is not None:
+            # bot.latency is the shard average; one stalled shard must still fail readiness
+            checks["shards"] = shards
+            checks["shards_ok"] = connected and all(s["latency_ok"] for s in shards.values())
+
+        manager = getattr(bot, 'match_manager', None)
+        if manager is not None:
+            backlog = manager.scheduler.backlog()
+            checks.update({
+                "scheduler_leader": manager.is_leader,
+                "scheduled_deadlines": len(manager.scheduler),
+                "scheduler_backlog": backlog,
+                "outbox_pending": len(manager.outbox),
+                # A standby does not run its scheduler, so its backlog is expected to grow
+                "scheduler_ok": backlog < MAX_SCHEDULER_BACKLOG or not manager.is_leader
+            })
+
+        ready = all(value for key, value in checks.items() if key.endswith('_ok')) and connected
+        return checks, ready
+
+    async def shards(self, request):
+        report = shard_report(self.bot) if self.bot is not None else None
+        return web.json_response({"sharded": report is not None, "shards": report or {}})
+
+    async def health(self, request):
+        checks, ready = await self.readiness()
+        return web.json_response({
+            "status": "healthy" if ready else "unhealthy",
+            "uptime": round(time.time() - START_TIME, 1),
+            "bot_status": "ready" if ready else "not ready",
+            "checks": checks
+        }, status=200 if ready else 503)
+
+    async def start(self):
+        self.runner = web.AppRunner(self.app, access_log=None)
+        await self.runner.setup()
+        site = web.TCPSite(self.runner, self.host, self.port)
+        await site.start()
+
+    async def stop(self):
+        if self.runner is not None:
+            await self.runner.cleanup()
+            self.runner = None
+
+async def keep_alive(bot=None, host='0.0.0.0', port=None):
+    """Keep the bot alive by running the async HTTP server on the current event loop"""
+    logger.info("🔥 Starting Keep-Alive server...")
+    server = KeepAliveServer(bot, host, port or int(os.getenv('PORT', 5000)))
+    await server.start()
+    logger.info(f"🚀 Keep-Alive server started on port {server.port}!")
+    return server
+
+def self_ping_url():
+    # Get the repl URL
+    repl_url = os.getenv('REPLIT_DOMAINS', 'localhost:5000').split(',')[0]
+    if not repl_url.startswith('http'):
+        repl_url = f"https://{repl_url}"
+    return f"{repl_url}/ping"
+
+async def self_ping(session):
     """Self-ping to keep the service alive"""
     try:
-        # Get the repl URL
-        repl_url = os.getenv('REPLIT_DOMAINS', 'localhost:5000').split(',')[0]
-        if not repl_url.startswith('http'):
-            repl_url = f"https://{repl_url}"
-        
-        response = requests.get(f"{repl_url}/ping", timeout=10)
-        if response.status_code == 200:
-            logger.info("🏓 Self-ping successful!")
-        else:
-            logger.warning(f"⚠️ Self-ping returned status: {response.status_code}")
+        async with session.get(self_ping_url()) as response:
+            if response.status == 200:
+                logger.info("🏓 Self-ping successful!")
+            else:
+                logger.warning(f"⚠️ Self-ping returned status: {response.status}")
     except Exception as e:
         logger.error(f"❌ Self-ping failed: {e}")
 
-def start_self_ping():
-    """Start periodic self-ping in background"""
-    def ping_loop():
+async def self_ping_loop(interval=300):
+    # One pooled session for the lifetime of the loop
+    async with ClientSession(timeout=ClientTimeout(total=10)) as session:
         while True:
-            time.sleep(300)  # Ping every 5 minutes
-            self_ping()
-    
-    t = Thread(target=ping_loop)
-    t.daemon = True
-    t.start()
+            await asyncio.sleep(interval)  # Ping every 5 minutes
+            await self_ping(session)
+
+def start_self_ping(interval=300):
+    """Start periodic self-ping as a task on the running event loop"""
+    task = asyncio.create_task(self_ping_loop(interval))
     logger.info("⏰ Self-ping scheduler started!")
+    return task
 
 if __name__ == "__main__":
-    keep_alive()
-    start_self_ping()
-    
-    # Keep the main thread alive
-    while True:
-        time.sleep(1)
\ No newline at end of file
+    async def main():
+        await keep_alive()
+        start_self_ping()
+        # Keep the loop alive
+        await asyncio.Event().wait()
+
+    asyncio.run(main())
@@ -0,0 +1,353 @@
+"""End-to-end DM load driver: the real MatchManager, outbox, DM fan-out and slash command code,
+talking through discord.py's HTTP client to the fake Discord API in loadtest/fake_discord.py.
+
+There is no gateway connection: the guild, its members and roles are loaded into the client's
+cache from a synthetic payload, and slash commands are invoked with synthetic interactions.
+
+    python -m loadtest.driver reminders --matches 2000 --members 5000
+    python -m loadtest.driver notifications --matches 500
+    python -m loadtest.driver role_dm --role-size 20000 --dm-rate 50
+    python -m loadtest.driver reminders --server http://127.0.0.1:8787   # external fake server
+
+Prints a JSON report: delivered/forbidden counts, rate-limit responses, throughput and the
+end-to-end delay of each DM from its target time (reminder time or command invocation).
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import os
+import sys
+import tempfile
+import time
+from datetime import datetime, timedelta
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+import aiohttp
+import discord
+from discord.ext import commands
+from bot.commands import setup_commands
+from bot.dm_jobs import DMJobManager
+from bot.dm_sender import DMFanout
+from bot.match_manager import MatchManager
+from bot.members import MemberResolver
+from bot.recipients import RecipientIndex, parse_mentions
+from bot.scheduler import REMINDER_OFFSETS
+from bot.storage import JSONStorage
+from bot.utils import save_data_atomic
+from loadtest.fake_discord import BOT_USER_ID, add_arguments, from_arguments
+
+logger = logging.getLogger(__name__)
+
+GUILD_ID = 800000000000000001
+CHANNEL_ID = 800000000000000002
+ADMIN_ID = 700000000000000001
+APPLICATION_ID = 900000000000000001
+FIRST_MEMBER_ID = 710000000000000000
+TEAM_ROLE_BASE = 810000000000000000
+BIG_ROLE_ID = 820000000000000000
+
+# Embed titles the bot uses, to tell the DM kinds apart in the fake server's delivery log
+TITLES = {
+    'reminders': "⏰ Match Reminder",
+    'notifications': "🏆 Match Notification",
+    'role_dm': "📨 Message from Server Admin",
+}
+
+
+def guild_payload(members, teams, role_size):
+    """A GUILD_CREATE-shaped payload: `members` members split over `teams` team roles, the first
+    `role_size` of them also in one large role"""
+    def role(role_id, name, position):
+        return {'id': str(role_id), 'name': name, 'color': 0, 'hoist': False, 'position': position,
+                'permissions': '0', 'managed': False, 'mentionable': True, 'flags': 0}
+
+    def member(user_id, role_ids):
+        return {'user': {'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0',
+                         'global_name': None, 'avatar': None},
+                'roles': [str(r) for r in role_ids], 'joined_at': '2024-01-01T00:00:00+00:00',
+                'deaf': False, 'mute': False, 'flags': 0}
+
+    roles = [role(GUILD_ID, '@everyone', 0), role(BIG_ROLE_ID, 'everyone-ish', 1)]
+    roles += [role(TEAM_ROLE_BASE + i, f"team-{i}", 2 + i) for i in range(teams)]
+    member_list = [member(ADMIN_ID, []), member(BOT_USER_ID, [])]
+    for i in range(members):
+        role_ids = [TEAM_ROLE_BASE + i % teams] + ([BIG_ROLE_ID] if i < role_size else [])
+        member_list.append(member(FIRST_MEMBER_ID + i, role_ids))
+    return {
+        'id': str(GUILD_ID), 'name': 'Load Test Guild', 'owner_id': str(ADMIN_ID),
+        'member_count': len(member_list),
+        'roles': roles, 'members': member_list, 'emojis': [], 'stickers': [], 'features': [],
+        'channels': [{'id': str(CHANNEL_ID), 'type': 0, 'name': 'matches', 'position': 0,
+                      'permission_overwrites': []}],
+        'threads': [], 'presences': [], 'voice_states': [], 'stage_instances': [],
+        'guild_scheduled_events': [], 'premium_tier': 0, 'system_channel_flags': 0,
+        'verification_level': 0, 'default_message_notifications': 0, 'explicit_content_filter': 0,
+        'mfa_level': 0, 'nsfw_level': 0, 'preferred_locale': 'en-US', 'large': True,
+    }
+
+
+def team_text(index, members, teams, users_per_team):
+    """Team string mentioning a team role and a few members, like admins write them"""
+    first = (index * users_per_team) % members
+    users = " ".join(f"<@{FIRST_MEMBER_ID + (first + k) % members}>" for k in range(users_per_team))
+    return f"Team {index} <@&{TEAM_ROLE_BASE + index % teams}> {users}"
+
+
+class LoadTestBot(commands.Bot):
+    """The bot's DM machinery without a gateway connection"""
+
+    _interaction_ids = itertools.count(600000000000000001)
+
+    def __init__(self, settings):
+        intents = discord.Intents.default()
+        intents.members = True
+        super().__init__(command_prefix='!', intents=intents, application_id=APPLICATION_ID)
+        self.storage = JSONStorage()
+        self.settings = self.storage.load_settings()
+        self.settings.update(settings)
+        self.elector = None
+        self.member_resolver = MemberResolver.from_settings(self.settings)
+        self.dm_sender = DMFanout.from_settings(self.settings)
+        self.dm_jobs = DMJobManager(self)
+        self.match_manager = MatchManager(self)
+
+    async def wait_until_ready(self):
+        # The cache is filled by the driver before anything waits on readiness
+        return
+
+    def load_guild(self, payload):
+        return self._connection._add_guild_from_data(payload)
+
+    def interaction(self, command, options):
+        payload = {
+            'id': str(next(self._interaction_ids)), 'application_id': str(APPLICATION_ID),
+            'type': 2, 'token': f"loadtest-{time.monotonic_ns()}", 'version': 1,
+            'guild_id': str(GUILD_ID), 'channel_id': str(CHANNEL_ID),
+            'channel': {'id': str(CHANNEL_ID), 'type': 0, 'guild_id': str(GUILD_ID), 'name': 'matches'},
+            'member': {'user': {'id': str(ADMIN_ID), 'username': 'admin', 'discriminator': '0',
+                                'global_name': None, 'avatar': None},
+                       'roles': [], 'joined_at': '2024-01-01T00:00:00+00:00', 'deaf': False,
+                       'mute': False, 'flags': 0, 'permissions': '8'},
+            'data': {'id': '1', 'name': command, 'type': 1,
+                     'options': [{'name': k, 'type': 3, 'value': v} for k, v in options.items()]},
+            'app_permissions': '8', 'attachment_size_limit': 8388608, 'locale': 'en-US',
+            'guild_locale': 'en-US', 'entitlements': [], 'authorizing_integration_owners': {}, 'context': 0,
+        }
+        return discord.Interaction(data=payload, state=self._connection)
+
+    async def invoke(self, command, **options):
+        """Run a slash command's callback as if Discord had dispatched it"""
+        interaction = self.interaction(command, options)
+        await self.tree.get_command(command).callback(interaction, **options)
+        return interaction
+
+
+def write_reminder_matches(args, now):
+    """Matches whose 10 minute reminders come due over `spread` seconds from `lead` seconds on"""
+    offset = -REMINDER_OFFSETS['10min']
+    first_start = int(now) + args.lead + offset
+    matches = []
+    targets = {}
+    for i in range(args.matches):
+        team1 = team_text(2 * i, args.members, args.teams, args.users_per_team)
+        team2 = team_text(2 * i + 1, args.members, args.teams, args.users_per_team)
+        user_ids, role_ids = parse_mentions(team1, team2)
+        # Whole seconds: the fake server recovers the target time from the <t:...> timestamp
+        start_ts = first_start + (i * args.spread) // max(1, args.matches)
+        targets[start_ts] = start_ts - offset
+        matches.append({
+            'id': i + 1, 'team1': team1, 'team2': team2,
+            'time': datetime.fromtimestamp(start_ts).isoformat(),
+            'language': 'en', 'creator': ADMIN_ID, 'guild_id': GUILD_ID, 'channel_id': CHANNEL_ID,
+            'user_ids': user_ids, 'role_ids': role_ids,
+            # Only the 10 minute reminder is measured; the 3 minute one would fire 7 minutes later
+            'reminders_sent': {'created': True, '10min': False, '3min': True}
+        })
+    os.makedirs('data', exist_ok=True)
+    save_data_atomic('data/matches.json', matches)
+    return targets
+
+
+def expected_recipients(bot):
+    """DMs the matches should produce, resolved independently of the bot's own recipient index"""
+    guild = bot.get_guild(GUILD_ID)
+    index = RecipientIndex()
+    return sum(len(index.build(match, guild)) for match in bot.match_manager.store.matches)
+
+
+async def wait_for_outbox(bot, not_before, timeout):
+    """Wait until the outbox has nothing pending or in flight after `not_before`"""
+    outbox = bot.match_manager.outbox
+    deadline = time.time() + timeout
+    while time.time() < deadline:
+        if time.time() > not_before and not len(outbox) and not outbox._inflight:
+            return True
+        await asyncio.sleep(0.2)
+    return False
+
+
+async def run_reminders(bot, args, targets):
+    expected = expected_recipients(bot)
+    bot.match_manager.start()
+    last_target = max(targets.values(), default=time.time())
+    finished = await wait_for_outbox(bot, last_target + 1, args.timeout + last_target - time.time())
+    return expected, finished
+
+
+async def run_notifications(bot, args, targets):
+    bot.match_manager.start()
+    await asyncio.sleep(0)
+    base = (datetime.now() + timedelta(days=2)).replace(hour=0, minute=0, second=0, microsecond=0)
+    semaphore = asyncio.Semaphore(args.concurrency)
+
+    async def create(i):
+        match_time = base + timedelta(minutes=i)
+        async with semaphore:
+            targets[int(match_time.timestamp())] = time.time()
+            await bot.invoke(
+                'create_match',
+                team1=team_text(2 * i, args.members, args.teams, args.users_per_team),
+                team2=team_text(2 * i + 1, args.members, args.teams, args.users_per_team),
+                day=match_time.day, hour=match_time.hour, minute=match_time.minute,
+                month=match_time.month, year=match_time.year
+            )
+
+    await asyncio.gather(*(create(i) for i in range(args.matches)))
+    expected = expected_recipients(bot)
+    finished = await wait_for_outbox(bot, time.time(), args.timeout)
+    return expected, finished
+
+
+async def run_role_dm(bot, args, targets):
+    started = time.time()
+    await bot.invoke('send_role_dm', roles=f"<@&{BIG_ROLE_ID}>", message="Load test: scrims start at 8pm, be there!")
+    job = bot.dm_jobs.get(GUILD_ID)
+    targets[None] = started
+    try:
+        await asyncio.wait_for(asyncio.shield(job.task), args.timeout)
+    except asyncio.TimeoutError:
+        bot.dm_jobs.cancel(job)
+    return job.discovered, job.status == 'completed'
+
+
+def percentile(values, fraction):
+    if not values:
+        return None
+    values = sorted(values)
+    return round(values[min(len(values) - 1, int(fraction * len(values)))], 3)
+
+
+def report(bot, args, stats, targets, expected, finished, started):
+    title = TITLES[args.scenario]
+    deliveries = [d for d in stats['deliveries'] if d['title'] == title]
+    delays = []
+    for delivery in deliveries:
+        target = targets.get(delivery['match_ts'], targets.get(None))
+        if target is not None:
+            delays.append(delivery['at'] - target)
+    responses = stats['responses']
+    forbidden = responses.get('create_message:403', 0)
+    times = [d['at'] for d in deliveries]
+    span = (max(times) - min(times)) if len(times) > 1 else 0
+    # Matches whose creation DMs were never queued, e.g. because the command's reply failed first
+    unnotified = sum(1 for match in bot.match_manager.store.matches if match['reminders_sent'].get('created') is False)
+    return {
+        'scenario': args.scenario,
+        'finished': finished,
+        'unnotified_matches': unnotified,
+        'expected_recipients': expected,
+        'delivered': len(deliveries),
+        'forbidden': forbidden,
+        'missing': max(0, expected - len(deliveries) - forbidden),
+        'rate_limited': sum(count for key, count in responses.items() if key.endswith(':429')),
+        'requests': stats['requests'],
+        'wall_seconds': round(time.time() - started, 2),
+        'dms_per_second': round(len(deliveries) / span, 1) if span else None,
+        'delay_seconds': {
+            'p50': percentile(delays, 0.50),
+            'p95': percentile(delays, 0.95),
+            'p99': percentile(delays, 0.99),
+            'max': round(max(delays), 3) if delays else None,
+        },
+    }
+
+
+async def main(args):
+    workdir = tempfile.mkdtemp(prefix='loadtest-')
+    os.chdir(workdir)
+    runner = None
+    if args.server:
+        url = args.server.rstrip('/')
+    else:
+        runner, url = await from_arguments(args).start()
+    discord.http.Route.BASE = f"{url}/api/v10"
+
+    targets = {}
+    if args.scenario == 'reminders':
+        targets = write_reminder_matches(args, time.time())
+
+    bot = LoadTestBot({
+        'dm_concurrency': args.dm_concurrency,
+        'dm_rate_per_second': args.dm_rate,
+        'dm_burst': args.dm_rate,
+    })
+    setup_commands(bot)
+    started = time.time()
+    try:
+        await bot.login('loadtest-token')
+        async with aiohttp.ClientSession() as session:
+            await session.post(f"{url}/_reset")
+        bot.load_guild(guild_payload(args.members, args.teams, args.role_size))
+        scenario = {'reminders': run_reminders, 'notifications': run_notifications, 'role_dm': run_role_dm}[args.scenario]
+        expected, finished = await scenario(bot, args, targets)
+        async with aiohttp.ClientSession() as session:
+            async with session.get(f"{url}/_stats", params={'deliveries': '1'}) as response:
+                stats = await response.json()
+        return report(bot, args, stats, targets, expected, finished, started)
+    finally:
+        await bot.dm_jobs.close()
+        await bot.match_manager.close()
+        await bot.close()
+        if runner is not None:
+            await runner.cleanup()
+
+
+def parse_args(argv=None):
+    parser = argparse.ArgumentParser(prog='python -m loadtest.driver', description="End-to-end DM load test against a fake Discord API")
+    parser.add_argument('scenario', choices=sorted(TITLES), help="DM path to load")
+    parser.add_argument('--server', help="Use an already running fake server instead of starting one in-process")
+    parser.add_argument('--matches', type=int, default=1000, help="Matches to schedule or create")
+    parser.add_argument('--members', type=int, default=5000, help="Guild members")
+    parser.add_argument('--teams', type=int, default=50, help="Team roles the members are split over")
+    parser.add_argument('--users-per-team', type=int, default=3, help="Members mentioned by name in each team")
+    parser.add_argument('--role-size', type=int, default=2000, help="Members in the large role used by role_dm")
+    parser.add_argument('--spread', type=int, default=30, help="Seconds over which scheduled reminders come due")
+    parser.add_argument('--lead', type=int, default=5, help="Seconds before the first reminder is due")
+    parser.add_argument('--concurrency', type=int, default=10, help="Concurrent /create_match invocations")
+    parser.add_argument('--dm-concurrency', type=int, default=5, help="dm_concurrency setting")
+    parser.add_argument('--dm-rate', type=float, default=10.0, help="dm_rate_per_second setting")
+    parser.add_argument('--timeout', type=float, default=600, help="Give up after this many seconds")
+    parser.add_argument('-o', '--output', help="Also write the report to this JSON file")
+    parser.add_argument('-v', '--verbose', action='store_true', help="Show the bot's INFO logs")
+    add_arguments(parser)
+    return parser.parse_args(argv)
+
+
+if __name__ == '__main__':
+    args = parse_args()
+    output = os.path.abspath(args.output) if args.output else None
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING)
+    if not args.verbose:
+        # One line per closed DM or 429 would bury the report, which counts both
+        logging.getLogger('bot.dm_sender').setLevel(logging.CRITICAL)
+        logging.getLogger('discord.http').setLevel(logging.ERROR)
+        logging.getLogger('discord.webhook.async_').setLevel(logging.ERROR)
+    result = asyncio.run(main(args))
+    print(json.dumps(result, indent=2))
+    if output:
+        with open(output, 'w', encoding='utf-8') as f:
+            json.dump(result, f, indent=2)
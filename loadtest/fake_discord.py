@@ -0,0 +1,304 @@
+"""Local stand-in for the Discord REST endpoints the bot's DM and interaction paths use.
+
+Serves `/api/v10/...` so discord.py can be pointed at it with
+`discord.http.Route.BASE = 'http://127.0.0.1:<port>/api/v10'`. Responses carry the usual
+X-RateLimit-* headers, and the server injects latency, 429s with `retry_after` (per-channel
+buckets, a global limit and random spikes) and 403 "Cannot send messages to this user" for a
+configurable share of users. Every delivered DM is recorded for the load driver (GET /_stats).
+
+    python -m loadtest.fake_discord --port 8787 --latency 0.05 --closed-dms 0.05
+"""
+import argparse
+import asyncio
+import itertools
+import json
+import logging
+import random
+import re
+import time
+from datetime import datetime, timezone
+from aiohttp import web
+
+logger = logging.getLogger(__name__)
+
+BOT_USER_ID = 900000000000000001
+# Discord's DM limit: 5 messages per 5 seconds per channel
+CHANNEL_LIMIT = (5, 5.0)
+# Opening DM channels shares one bucket per bot
+CREATE_DM_LIMIT = (50, 1.0)
+TIMESTAMP_PATTERN = re.compile(r'<t:(\d+):F>')
+
+
+def json_response(data, status=200, headers=None):
+    # discord.py only decodes bodies whose content type is exactly application/json (no charset)
+    headers = dict(headers or {}, **{'Content-Type': 'application/json'})
+    return web.Response(body=json.dumps(data).encode('utf-8'), status=status, headers=headers)
+
+
+class RateWindow:
+    """Fixed-window request counter, the shape of Discord's per-route buckets"""
+
+    def __init__(self, limit, period):
+        self.limit = limit
+        self.period = period
+        self.started = time.monotonic()
+        self.used = 0
+
+    def hit(self):
+        """Count a request; returns (allowed, remaining, reset_after)"""
+        now = time.monotonic()
+        if now - self.started >= self.period:
+            self.started = now
+            self.used = 0
+        reset_after = self.period - (now - self.started)
+        if self.used >= self.limit:
+            return False, 0, reset_after
+        self.used += 1
+        return True, self.limit - self.used, reset_after
+
+
+class FakeDiscord:
+    def __init__(self, latency=0.05, jitter=0.02, closed_dms=0.0, rate_limit_chance=0.0,
+                 retry_after=1.0, global_rate=50, seed=0):
+        self.latency = latency
+        self.jitter = jitter
+        self.closed_dms = closed_dms
+        self.rate_limit_chance = rate_limit_chance
+        self.retry_after = retry_after
+        self.global_window = RateWindow(global_rate, 1.0) if global_rate else None
+        self.random = random.Random(seed)
+        self.channel_windows = {}
+        self.create_dm_window = RateWindow(*CREATE_DM_LIMIT)
+        self.dm_channels = {}
+        self.dm_users = {}
+        self.ids = itertools.count(1100000000000000000)
+        self.started = time.time()
+        self.requests = {}
+        self.responses = {}
+        self.deliveries = []
+
+    def _closed(self, user_id):
+        # Stable per user, so retries of a closed DM keep failing like on Discord
+        return random.Random(user_id).random() < self.closed_dms
+
+    def _count(self, name, status):
+        self.requests[name] = self.requests.get(name, 0) + 1
+        key = f"{name}:{status}"
+        self.responses[key] = self.responses.get(key, 0) + 1
+
+    @staticmethod
+    def _rate_limited(retry_after, is_global=False, scope='user'):
+        headers = {
+            # discord.py treats a 429 without Via as a Cloudflare ban
+            'Via': '1.1 google',
+            'Retry-After': str(max(1, int(retry_after + 0.999))),
+            'X-RateLimit-Scope': 'global' if is_global else scope,
+        }
+        if is_global:
+            headers['X-RateLimit-Global'] = 'true'
+        body = {'message': 'You are being rate limited.', 'retry_after': round(retry_after, 3), 'global': is_global}
+        return json_response(body, status=429, headers=headers)
+
+    @web.middleware
+    async def middleware(self, request, handler):
+        name = request.match_info.route.name or 'unknown'
+        if name in ('stats', 'reset'):
+            return await handler(request)
+        if self.latency or self.jitter:
+            await asyncio.sleep(max(0.0, self.latency + self.random.uniform(-self.jitter, self.jitter)))
+        if self.global_window is not None:
+            allowed, _, reset_after = self.global_window.hit()
+            if not allowed:
+                self._count(name, 429)
+                return self._rate_limited(reset_after, is_global=True)
+        if self.rate_limit_chance and self.random.random() < self.rate_limit_chance:
+            self._count(name, 429)
+            return self._rate_limited(self.retry_after, scope='shared')
+        response = await handler(request)
+        self._count(name, response.status)
+        return response
+
+    def user(self, user_id):
+        return {'id': str(user_id), 'username': f"user{user_id}", 'discriminator': '0',
+                'global_name': None, 'avatar': None, 'bot': user_id == BOT_USER_ID}
+
+    def message(self, channel_id, payload, message_id=None):
+        return {
+            'id': str(message_id or next(self.ids)),
+            'channel_id': str(channel_id),
+            'author': self.user(BOT_USER_ID),
+            'content': payload.get('content') or '',
+            'embeds': payload.get('embeds') or [],
+            'components': payload.get('components') or [],
+            'attachments': [],
+            'mentions': [],
+            'mention_roles': [],
+            'mention_everyone': False,
+            'pinned': False,
+            'tts': False,
+            'type': 0,
+            'flags': payload.get('flags') or 0,
+            'timestamp': datetime.now(timezone.utc).isoformat(),
+            'edited_timestamp': None,
+        }
+
+    async def get_me(self, request):
+        return json_response(self.user(BOT_USER_ID))
+
+    async def application_info(self, request):
+        return json_response({
+            'id': str(BOT_USER_ID), 'name': 'Load Test Bot', 'icon': None, 'description': '',
+            'bot_public': True, 'bot_require_code_grant': False, 'verify_key': '0' * 64,
+            'owner': self.user(BOT_USER_ID + 1), 'team': None, 'flags': 0, 'summary': '',
+        })
+
+    @staticmethod
+    def _bucket_headers(bucket, limit, remaining, reset_after):
+        # Without these discord.py runs a route's requests one at a time
+        return {
+            'X-RateLimit-Limit': str(limit),
+            'X-RateLimit-Remaining': str(remaining),
+            'X-RateLimit-Reset-After': f"{reset_after:.3f}",
+            'X-RateLimit-Bucket': bucket,
+        }
+
+    async def create_dm(self, request):
+        allowed, remaining, reset_after = self.create_dm_window.hit()
+        if not allowed:
+            return self._rate_limited(reset_after)
+        headers = self._bucket_headers('create-dm', CREATE_DM_LIMIT[0], remaining, reset_after)
+        payload = await request.json()
+        user_id = int(payload['recipient_id'])
+        channel_id = self.dm_channels.setdefault(user_id, next(self.ids))
+        self.dm_users[channel_id] = user_id
+        return json_response({
+            'id': str(channel_id), 'type': 1, 'last_message_id': None,
+            'recipients': [self.user(user_id)]
+        }, headers=headers)
+
+    async def create_message(self, request):
+        channel_id = int(request.match_info['channel_id'])
+        window = self.channel_windows.get(channel_id)
+        if window is None:
+            window = self.channel_windows[channel_id] = RateWindow(*CHANNEL_LIMIT)
+        allowed, remaining, reset_after = window.hit()
+        if not allowed:
+            return self._rate_limited(reset_after)
+        headers = self._bucket_headers('channel-messages', CHANNEL_LIMIT[0], remaining, reset_after)
+
+        user_id = self.dm_users.get(channel_id)
+        if user_id is not None and self._closed(user_id):
+            return json_response({'message': 'Cannot send messages to this user', 'code': 50007},
+                                     status=403, headers=headers)
+        payload = await request.json()
+        if user_id is not None:
+            embed = (payload.get('embeds') or [{}])[0]
+            found = TIMESTAMP_PATTERN.search(embed.get('description') or '')
+            self.deliveries.append({
+                'user_id': user_id,
+                'at': time.time(),
+                'title': embed.get('title'),
+                'match_ts': int(found.group(1)) if found else None,
+            })
+        return json_response(self.message(channel_id, payload), headers=headers)
+
+    async def edit_message(self, request):
+        payload = await request.json()
+        return json_response(self.message(request.match_info['channel_id'], payload,
+                                              request.match_info['message_id']))
+
+    async def interaction_callback(self, request):
+        payload = await request.json()
+        response_type = payload.get('type')
+        data = payload.get('data') or {}
+        body = {
+            'interaction': {
+                'id': request.match_info['interaction_id'],
+                'type': 2,
+                'response_message_loading': response_type == 5,
+                'response_message_ephemeral': bool(data.get('flags', 0) & 64),
+            }
+        }
+        if response_type == 4:
+            message = self.message(0, data)
+            body['interaction']['response_message_id'] = message['id']
+            body['resource'] = {'type': 4, 'message': message}
+        return json_response(body)
+
+    async def webhook_message(self, request):
+        payload = await request.json()
+        return json_response(self.message(0, payload))
+
+    async def stats(self, request):
+        return json_response({
+            'uptime': time.time() - self.started,
+            'requests': self.requests,
+            'responses': self.responses,
+            'dm_channels': len(self.dm_channels),
+            'deliveries': self.deliveries if request.query.get('deliveries') else len(self.deliveries),
+        })
+
+    async def reset(self, request):
+        self.requests.clear()
+        self.responses.clear()
+        self.deliveries.clear()
+        return json_response({'ok': True})
+
+    def app(self):
+        app = web.Application(middlewares=[self.middleware])
+        app.add_routes([
+            web.get('/api/v10/users/@me', self.get_me, name='get_me'),
+            web.get('/api/v10/oauth2/applications/@me', self.application_info, name='application_info'),
+            web.post('/api/v10/users/@me/channels', self.create_dm, name='create_dm'),
+            web.post('/api/v10/channels/{channel_id}/messages', self.create_message, name='create_message'),
+            web.patch('/api/v10/channels/{channel_id}/messages/{message_id}', self.edit_message, name='edit_message'),
+            web.post('/api/v10/interactions/{interaction_id}/{token}/callback', self.interaction_callback, name='interaction_callback'),
+            web.post('/api/v10/webhooks/{application_id}/{token}', self.webhook_message, name='followup'),
+            web.patch('/api/v10/webhooks/{application_id}/{token}/messages/{message_id}', self.webhook_message, name='edit_original'),
+            web.get('/_stats', self.stats, name='stats'),
+            web.post('/_reset', self.reset, name='reset'),
+        ])
+        return app
+
+    async def start(self, host='127.0.0.1', port=0):
+        """Serve on the running loop; returns (runner, base url)"""
+        runner = web.AppRunner(self.app(), access_log=None)
+        await runner.setup()
+        site = web.TCPSite(runner, host, port)
+        await site.start()
+        port = runner.addresses[0][1]
+        return runner, f"http://{host}:{port}"
+
+
+def add_arguments(parser):
+    parser.add_argument('--latency', type=float, default=0.05, help="Base response latency in seconds")
+    parser.add_argument('--jitter', type=float, default=0.02, help="Random +/- latency in seconds")
+    parser.add_argument('--closed-dms', type=float, default=0.05, help="Share of users whose DMs return 403")
+    parser.add_argument('--rate-limit-chance', type=float, default=0.0, help="Chance of a random 429 per request")
+    parser.add_argument('--retry-after', type=float, default=1.0, help="retry_after of random 429s")
+    parser.add_argument('--global-rate', type=int, default=50, help="Global requests per second before 429 (0 disables)")
+
+def from_arguments(args):
+    return FakeDiscord(latency=args.latency, jitter=args.jitter, closed_dms=args.closed_dms,
+                       rate_limit_chance=args.rate_limit_chance, retry_after=args.retry_after,
+                       global_rate=args.global_rate)
+
+async def serve(args):
+    server = from_arguments(args)
+    runner, url = await server.start(args.host, args.port)
+    logger.info(f"🧪 Fake Discord API listening on {url}/api/v10")
+    try:
+        await asyncio.Event().wait()
+    finally:
+        await runner.cleanup()
+
+if __name__ == '__main__':
+    parser = argparse.ArgumentParser(prog='python -m loadtest.fake_discord', description="Fake Discord REST API for load tests")
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=8787)
+    add_arguments(parser)
+    logging.basicConfig(level=logging.INFO)
+    try:
+        asyncio.run(serve(parser.parse_args()))
+    except KeyboardInterrupt:
+        pass
@@ -1,14 +1,25 @@
 import discord
-from discord.ext import commands, tasks
+from discord.ext import commands
 import asyncio
 import os
 import json
 import logging
 from datetime import datetime, timedelta
 import pytz
-from bot.commands import setup_commands
+from bot.commands import setup_commands, TranslateButton
 from bot.match_manager import MatchManager
-from bot.utils import load_data, save_data
+from bot.storage import open_storage
+from bot.dm_sender import DMFanout
+from bot.dm_jobs import DMJobManager
+from bot.command_sync import sync_commands
+from bot.log_forwarder import LogForwarder, LogChannelHandler, FORWARDED_LOGGERS
+from bot.metrics import InstrumentedCommandTree, RateLimitLogCounter, SHARD_LATENCY, SHARD_DM_QUEUED
+from bot.sharding import shard_options, shard_scope
+from bot.leader import open_elector
+from bot.members import MemberResolver, lazy_members_enabled
+from bot.loop_monitor import LoopMonitor
+from bot.templates import TEMPLATES
+from bot.utils import FILE_WRITER
 from keep_alive import keep_alive, start_self_ping
 
 # Configure logging
@@ -20,15 +31,75 @@ intents = discord.Intents.default()
 intents.message_content = True
 intents.members = True
 
-class DiscordBot(commands.Bot):
+# Members are resolved on demand through bot/members.py instead of chunking every guild at
+# startup; BOT_CHUNK_MEMBERS=1 restores the full member cache
+LAZY_MEMBERS = lazy_members_enabled()
+
+# BOT_SHARDING=auto or BOT_SHARD_COUNT (+ optional BOT_SHARD_IDS range) switches to AutoShardedBot
+SHARD_OPTIONS = shard_options()
+BotBase = commands.AutoShardedBot if SHARD_OPTIONS is not None else commands.Bot
+
+class DiscordBot(BotBase):
     def __init__(self):
-        super().__init__(command_prefix='!', intents=intents)
+        super().__init__(
+            command_prefix='!', intents=intents, tree_cls=InstrumentedCommandTree,
+            status=discord.Status.online,
+            activity=discord.Activity(
+                type=discord.ActivityType.watching,
+                name="🏆 Managing matches | /create_match"
+            ),
+            chunk_guilds_at_startup=not LAZY_MEMBERS,
+            member_cache_flags=discord.MemberCacheFlags.none() if LAZY_MEMBERS else discord.MemberCacheFlags.from_intents(intents),
+            **(SHARD_OPTIONS or {})
+        )
+        self.storage = open_storage()
+        self.shard_scope = shard_scope(SHARD_OPTIONS)
+        if self.shard_scope and not self.storage.shared:
+            # Every process would rewrite the same JSON files with only its own guilds' matches
+            raise RuntimeError(f"BOT_SHARD_IDS runs a subset of shards, which needs shared storage: set BOT_STORAGE=sqlite (not {self.storage.name})")
+        self.settings = self.storage.load_settings()
+        self.member_resolver = MemberResolver.from_settings(self.settings)
+        # Replicas running the same shards compete for one scheduler lease
+        self.elector = open_elector(self.storage, f"scheduler{self.shard_scope}")
+        self.dm_sender = DMFanout.from_settings(self.settings)
+        self.dm_jobs = DMJobManager(self)
         self.match_manager = MatchManager(self)
-        self.settings = load_data('data/settings.json', {
-            'allowed_channels': [],
-            'log_channel': None,
-            'admin_roles': []
-        })
+        self.log_forwarder = LogForwarder(self)
+        self.loop_monitor = LoopMonitor.from_settings(self.settings)
+        if SHARD_OPTIONS is not None:
+            SHARD_LATENCY.callback = lambda: [((shard_id,), latency) for shard_id, latency in self.latencies]
+            SHARD_DM_QUEUED.callback = lambda: [
+                ((shard_id,), stats['queued']) for shard_id, stats in self.dm_sender.shard_stats().items()
+            ]
+        self.keep_alive_server = None
+        self.self_ping_task = None
+    
+    async def setup_hook(self):
+        self.loop_monitor.start()
+        # Translate buttons are stateless, so buttons on DMs keep working after a restart for as
+        # long as their message template is kept (TemplateCache.max_age)
+        self.add_dynamic_items(TranslateButton)
+        await TEMPLATES.preload()
+        # Runs once per process (not per reconnect) and only uploads a changed command tree
+        try:
+            await sync_commands(self)
+        except discord.HTTPException as e:
+            logger.error(f"❌ Failed to sync slash commands: {e}")
+        # Start the reminder scheduler; it waits for the gateway to be ready itself
+        self.match_manager.start()
+        self.log_forwarder.start()
+        # Not the root logger: library noise and expected per-recipient DM failures stay out of the channel
+        error_handler = LogChannelHandler(self.log_forwarder)
+        for name in (__name__, *FORWARDED_LOGGERS):
+            logging.getLogger(name).addHandler(error_handler)
+        logging.getLogger('discord.http').addHandler(RateLimitLogCounter())
+        
+        # Keep-alive/health server and self-ping share the bot's event loop
+        self.keep_alive_server = await keep_alive(self)
+        self.self_ping_task = start_self_ping()
+        
+    async def on_shard_ready(self, shard_id):
+        logger.info(f'🧩 Shard {shard_id} is ready')
         
     async def on_ready(self):
         logger.info(f'🔥 {self.user} has connected to Discord!')
@@ -36,49 +107,65 @@ class DiscordBot(commands.Bot):
         total_members = sum(guild.member_count or 0 for guild in self.guilds)
         logger.info(f'👥 Serving {total_members} members')
         
-        await self.tree.sync()
-        logger.info('⚡ Slash commands synced!')
-        
-        # Set bot status to online and active
-        await self.change_presence(
-            status=discord.Status.online,
-            activity=discord.Activity(
-                type=discord.ActivityType.watching,
-                name="🏆 Managing matches | /create_match"
-            )
-        )
-        
-        # Start the match reminder task
-        self.check_matches.start()
+        # Runs again after every gateway reconnect: commands are synced in setup_hook and the
+        # presence is sent with each IDENTIFY, so there is nothing to redo here
         logger.info('🔥 Discord Bot is now ONLINE and READY! 🚀')
         
     async def on_message(self, message):
-        # Log bot messages to designated channel
-        if message.author == self.user and self.settings.get('log_channel'):
+        # Log bot messages to designated channel (batched by the log forwarder)
+        if message.author == self.user and self.settings.get('log_channel') and message.channel.id != self.settings['log_channel']:
             try:
-                log_channel = self.get_channel(self.settings['log_channel'])
-                if log_channel and isinstance(log_channel, discord.TextChannel) and message.channel.id != self.settings['log_channel']:
-                    embed = discord.Embed(
-                        title="🤖 Bot Activity",
-                        description=f"Bot sent a message in {message.channel.mention}",
-                        color=0x00ff00,
-                        timestamp=datetime.utcnow()
-                    )
-                    embed.add_field(name="Content", value=message.content[:1000] if message.content else "Embed message", inline=False)
-                    await log_channel.send(embed=embed)
+                where = getattr(message.channel, 'mention', None) or 'a direct message'
+                embed = discord.Embed(
+                    title="🤖 Bot Activity",
+                    description=f"Bot sent a message in {where}",
+                    color=0x00ff00,
+                    timestamp=datetime.utcnow()
+                )
+                embed.add_field(name="Content", value=message.content[:1000] if message.content else "Embed message", inline=False)
+                self.log_forwarder.submit(embed)
             except Exception as e:
                 logger.error(f"Error logging bot activity: {e}")
         
         await self.process_commands(message)
     
-    @tasks.loop(minutes=1)
-    async def check_matches(self):
-        """Check for matches that need reminders or are starting soon"""
-        await self.match_manager.check_match_reminders()
+    async def on_app_command_completion(self, interaction, command):
+        # Pairs with InstrumentedCommandTree.interaction_check to time every slash command
+        self.tree.observe(interaction, 'ok')
+    
+    # Keep precomputed match recipients current without walking role members. Only dispatched
+    # for cached members, so with lazy members role changes reach the resolver via its TTL only
+    async def on_member_update(self, before, after):
+        if before.roles != after.roles:
+            self.match_manager.recipients.member_roles_changed(before, after)
+    
+    async def on_member_join(self, member):
+        self.match_manager.recipients.member_joined(member)
+        self.member_resolver.member_joined(member)
+    
+    async def on_member_remove(self, member):
+        self.match_manager.recipients.member_removed(member)
+    
+    async def on_raw_member_remove(self, payload):
+        # Dispatched even for members that were never cached
+        self.member_resolver.member_removed(payload.guild_id, payload.user.id)
+    
+    async def on_guild_role_delete(self, role):
+        self.match_manager.recipients.role_deleted(role)
     
-    @check_matches.before_loop
-    async def before_check_matches(self):
-        await self.wait_until_ready()
+    async def close(self):
+        # Force a final flush of in-memory match state before disconnecting
+        self.loop_monitor.stop()
+        if self.self_ping_task:
+            self.self_ping_task.cancel()
+        if self.keep_alive_server:
+            await self.keep_alive_server.stop()
+        await self.dm_jobs.close()
+        await self.match_manager.close()
+        await self.log_forwarder.close()
+        # Runs after every queued write, so nothing is lost or written to a closed connection
+        await FILE_WRITER.run(self.storage.close)
+        await super().close()
 
 # Initialize bot
 bot = DiscordBot()
@@ -87,10 +174,7 @@ bot = DiscordBot()
 setup_commands(bot)
 
 if __name__ == "__main__":
-    # Start keep-alive system
     logger.info("🔥 Starting Discord Bot with Keep-Alive system...")
-    keep_alive()
-    start_self_ping()
     
     # Get bot token from environment
     token = os.getenv('DISCORD_BOT_TOKEN')
@@ -98,6 +182,6 @@ if __name__ == "__main__":
         logger.error("DISCORD_BOT_TOKEN environment variable not set!")
         exit(1)
     
-    logger.info("🚀 Bot is ready to launch! Keep-Alive system active!")
-    # Run the bot
+    logger.info("🚀 Bot is ready to launch!")
+    # Run the bot (the keep-alive server starts on its event loop in setup_hook)
     bot.run(token)